@@ -0,0 +1,44 @@
+"""add_user_total_counters
+
+Revision ID: b7e4c1d92a3f
+Revises: 9aafdcad5a6d
+Create Date: 2026-10-18 10:12:31.418027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c1d92a3f'
+down_revision: Union[str, Sequence[str], None] = '9aafdcad5a6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('posts_cnt', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('notifications_cnt', sa.Integer(), server_default='0', nullable=False))
+    # backfill from the existing rows; from here on the app keeps them in sync
+    op.execute(
+        "UPDATE users SET posts_cnt = sub.cnt "
+        "FROM (SELECT user_id, count(*) AS cnt FROM posts GROUP BY user_id) AS sub "
+        "WHERE users.id = sub.user_id"
+    )
+    # notifications is created by main.py's create_all() rather than a migration
+    if not sa.inspect(op.get_bind()).has_table('notifications'):
+        return
+    op.execute(
+        "UPDATE users SET notifications_cnt = sub.cnt "
+        "FROM (SELECT owner_id, count(*) AS cnt FROM notifications GROUP BY owner_id) AS sub "
+        "WHERE users.id = sub.owner_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'notifications_cnt')
+    op.drop_column('users', 'posts_cnt')
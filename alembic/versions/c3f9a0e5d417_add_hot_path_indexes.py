@@ -0,0 +1,72 @@
+"""add_hot_path_indexes
+
+Revision ID: c3f9a0e5d417
+Revises: b7e4c1d92a3f
+Create Date: 2026-10-18 11:02:47.903514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a0e5d417'
+down_revision: Union[str, Sequence[str], None] = 'b7e4c1d92a3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial-index predicate)
+# main.py's create_all() may already have built these on a fresh database,
+# hence if_not_exists / if_exists everywhere.
+INDEXES = [
+    ('ix_posts_user_id_created_at', 'posts', ['user_id', 'created_at', 'id'], None),
+    ('ix_posts_created_at_id', 'posts', ['created_at', 'id'], None),
+    ('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at', 'id'], None),
+    ('ix_comments_user_id', 'comments', ['user_id'], None),
+    ('ix_notifications_owner_created_at', 'notifications', ['owner_id', 'created_at', 'id'], None),
+    ('ix_notifications_owner_unread', 'notifications', ['owner_id', 'created_at'], 'is_read = false'),
+    ('ix_messages_sender_receiver_created', 'messages', ['sender_id', 'receiver_id', 'created_at'], None),
+    ('ix_messages_receiver_created', 'messages', ['receiver_id', 'created_at'], None),
+    ('ix_votes_user_id_action', 'votes', ['user_id', 'action'], None),
+    ('ix_shared_posts_from_to_created', 'shared_posts', ['from_user_id', 'to_user_id', 'created_at'], None),
+    ('ix_shared_posts_to_user_unread', 'shared_posts', ['to_user_id'], 'is_read = false'),
+    ('ix_deleted_shared_posts_user_id', 'deleted_shared_posts', ['user_id'], None),
+    ('ix_connections_follower_id', 'connections', ['follower_id', 'followed_id'], None),
+    ('ix_users_email', 'users', ['email'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so the tables stay writable while the indexes build;
+    # it can't run inside a transaction, hence the autocommit block.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            if table not in existing:
+                # notifications is created by create_all() with these indexes already
+                continue
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+        # superseded by ix_notifications_owner_created_at (same leading column)
+        if 'notifications' in existing:
+            op.drop_index('ix_notifications_owner_id', table_name='notifications',
+                          if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    with op.get_context().autocommit_block():
+        if 'notifications' in existing:
+            op.create_index('ix_notifications_owner_id', 'notifications', ['owner_id'], unique=False,
+                            if_not_exists=True, postgresql_concurrently=True)
+        for name, table, _, _ in reversed(INDEXES):
+            if table not in existing:
+                continue
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,40 @@
+"""add_author_snapshots
+
+Revision ID: d8a2b6f1c0e4
+Revises: c3f9a0e5d417
+Create Date: 2026-10-18 15:40:12.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a2b6f1c0e4'
+down_revision: Union[str, Sequence[str], None] = 'c3f9a0e5d417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('posts', 'comments')
+COLUMNS = ('author_username', 'author_nickname', 'author_pic')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        for column in COLUMNS:
+            op.add_column(table, sa.Column(column, sa.String(), nullable=True))
+        # backfill from users; from here on author_snapshots.py keeps them in sync
+        op.execute(
+            f"UPDATE {table} SET author_username = u.username, author_nickname = u.nickname, "
+            f"author_pic = u.profile_picture FROM users u WHERE u.id = {table}.user_id"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        for column in reversed(COLUMNS):
+            op.drop_column(table, column)
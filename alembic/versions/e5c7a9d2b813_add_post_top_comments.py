@@ -0,0 +1,60 @@
+"""add_post_top_comments
+
+Revision ID: e5c7a9d2b813
+Revises: d8a2b6f1c0e4
+Create Date: 2026-10-18 19:12:30.417285
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c7a9d2b813'
+down_revision: Union[str, Sequence[str], None] = 'd8a2b6f1c0e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = ('ix_comments_post_id_likes', 'comments', ['post_id', 'likes', 'created_at', 'id'])
+
+# same shape as app/comment_previews.py: top 2 by likes + the newest comment
+ITEM = """jsonb_build_object(
+    'id', c.id, 'post_id', c.post_id, 'content', c.comment_content,
+    'likes', c.likes, 'created_at', c.created_at,
+    'user', jsonb_build_object('id', c.user_id, 'username', c.author_username,
+                               'nickname', c.author_nickname, 'profile_pic', c.author_pic))"""
+
+BACKFILL = f"""
+UPDATE posts p SET top_comments = jsonb_build_object(
+    'top', (SELECT jsonb_agg(t.item ORDER BY t.likes DESC, t.created_at DESC, t.id DESC)
+            FROM (SELECT {ITEM} AS item, c.likes, c.created_at, c.id FROM comments c
+                  WHERE c.post_id = p.id
+                  ORDER BY c.likes DESC, c.created_at DESC, c.id DESC
+                  LIMIT 2) t),
+    'latest', (SELECT {ITEM} FROM comments c
+               WHERE c.post_id = p.id
+               ORDER BY c.created_at DESC, c.id DESC
+               LIMIT 1))
+WHERE EXISTS (SELECT 1 FROM comments c WHERE c.post_id = p.id)
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('top_comments', postgresql.JSONB(), nullable=True))
+    # main.py's create_all() may already have built the index on a fresh database
+    name, table, columns = INDEX
+    with op.get_context().autocommit_block():
+        op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                        postgresql_concurrently=True)
+    # from here on comment_previews.py keeps it in sync
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(INDEX[0], table_name=INDEX[1], if_exists=True)
+    op.drop_column('posts', 'top_comments')
@@ -0,0 +1,92 @@
+# author_snapshots.py
+# Keeps the author snapshot on posts/comments (author_username,
+# author_nickname, author_pic) in line with the users row.
+#
+# WHY?
+#   Every feed, explore, search and comment page shows the owner's name and
+#   avatar. Copying them onto the post/comment row means list_queries.py
+#   never has to join users for them. The price is that a profile edit has
+#   to be copied onto every post and comment of that user.
+#
+# HOW:
+#   - On insert the route copies the values from the current principal
+#     (snapshot_values()).
+#   - /me/updateInfo and profile picture removal schedule propagate() as a
+#     background task. It reads the user's CURRENT values and rewrites the
+#     stale rows BATCH_SIZE at a time, one short transaction per batch, so a
+#     user with 50k posts never holds 50k row locks at once. Re-running it
+#     is harmless — rows that already match are skipped — so back-to-back
+#     edits just converge on the latest values.
+#   - Post comment previews (comment_previews.py) embed commenters' names
+#     too; the posts whose preview shows one of the user's comments are
+#     re-rendered the same way, BATCH_SIZE posts per transaction.
+
+from sqlalchemy import select, update, or_
+from app import comment_previews
+from app.db import AsyncSessionLocal
+from app.models import Comments, Post, User
+from app.redis_service import invalidate
+
+# ── Patchable session factory (same pattern as notification_service) ──
+_session_factory = AsyncSessionLocal
+
+BATCH_SIZE = 500
+_SNAPSHOT_TABLES = (Post, Comments)
+
+
+def snapshot_values(author) -> dict:
+    """Snapshot columns for a new post/comment from a User or Principal."""
+    return {
+        "author_username": author.username,
+        "author_nickname": author.nickname,
+        "author_pic": author.profile_picture,
+    }
+
+
+async def _propagate_table(db, model, user_id: int, values: dict) -> int:
+    stale = or_(*(getattr(model, col).is_distinct_from(val) for col, val in values.items()))
+    updated = 0
+    while True:
+        batch = (
+            select(model.id)
+            .where(model.user_id == user_id, stale)
+            .limit(BATCH_SIZE)
+            .scalar_subquery()
+        )
+        result = await db.execute(update(model).where(model.id.in_(batch)).values(**values))
+        await db.commit()
+        updated += result.rowcount
+        if result.rowcount < BATCH_SIZE:
+            return updated
+
+
+async def _refresh_previews(db, user_id: int) -> list[int]:
+    shown = {"user": {"id": user_id}}
+    post_ids = (await db.execute(
+        select(Post.id).where(
+            Post.id.in_(select(Comments.post_id).where(Comments.user_id == user_id)),
+            or_(Post.top_comments["top"].contains([shown]), Post.top_comments["latest"].contains(shown)),
+        )
+    )).scalars().all()
+    changed = []
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        changed += await comment_previews.refresh(db, post_ids[start:start + BATCH_SIZE])
+        await db.commit()
+    return changed
+
+
+async def propagate(user_id: int) -> None:
+    """Copy the user's current name/avatar onto all of their posts and comments."""
+    # runs as a BackgroundTask — the route's session is closed by now
+    async with _session_factory() as db:
+        user = (await db.execute(
+            select(User.username, User.nickname, User.profile_picture).where(User.id == user_id)
+        )).first()
+        if user is None:
+            return
+        values = snapshot_values(user)
+        for model in _SNAPSHOT_TABLES:
+            await _propagate_table(db, model, user_id, values)
+        previews = await _refresh_previews(db, user_id)
+    # cached pages still carry the old snapshot
+    await invalidate(f"user:{user_id}", *(f"post:{post_id}" for post_id in previews))
@@ -0,0 +1,68 @@
+# comment_previews.py
+# The few comments a post card shows, kept on the post row itself.
+#
+# WHY?
+#   A feed card showed a comment preview by calling /comments-on/<post_id>
+#   for every card — N more requests per page, each a COUNT plus a page of
+#   comments. Now posts.top_comments holds the preview and every list read
+#   that already selects the post (list_queries.POST_COLUMNS, getPost) gets
+#   it for free:
+#       {"top":    the TOP_N most liked comments,
+#        "latest": the newest comment}
+#   each entry shaped like a CommentDetailResponse. NULL = no comments.
+#   "latest" may also be one of "top" on a quiet post.
+#
+# HOW:
+#   refresh(db, post_ids) recomputes the preview in one UPDATE, inside the
+#   caller's transaction — a comment and the preview that shows it commit
+#   together. Called on comment create/delete, comment like/unlike and
+#   (author_snapshots.py) on a commenter's profile edit. Rows whose preview
+#   didn't change aren't written, and refresh() returns only the posts that
+#   did change, so the caller invalidates cached pages only when they're
+#   really stale — most comment likes never touch the top two.
+#   ix_comments_post_id_likes serves "most liked", ix_comments_post_id_created_at
+#   serves "newest"; both stop after a row or two.
+
+from typing import Iterable
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+TOP_N = 2
+
+# one comment as CommentDetailResponse JSON (snapshot columns, no users join)
+_ITEM = """jsonb_build_object(
+    'id', c.id, 'post_id', c.post_id, 'content', c.comment_content,
+    'likes', c.likes, 'created_at', c.created_at,
+    'user', jsonb_build_object('id', c.user_id, 'username', c.author_username,
+                               'nickname', c.author_nickname, 'profile_pic', c.author_pic))"""
+
+_PREVIEW = f"""
+CASE WHEN EXISTS (SELECT 1 FROM comments c WHERE c.post_id = p.id) THEN jsonb_build_object(
+    'top', (SELECT jsonb_agg(t.item ORDER BY t.likes DESC, t.created_at DESC, t.id DESC)
+            FROM (SELECT {_ITEM} AS item, c.likes, c.created_at, c.id FROM comments c
+                  WHERE c.post_id = p.id
+                  ORDER BY c.likes DESC, c.created_at DESC, c.id DESC
+                  LIMIT {TOP_N}) t),
+    'latest', (SELECT {_ITEM} FROM comments c
+               WHERE c.post_id = p.id
+               ORDER BY c.created_at DESC, c.id DESC
+               LIMIT 1))
+END"""
+
+_REFRESH = text(f"""
+UPDATE posts SET top_comments = fresh.preview
+FROM (SELECT p.id, {_PREVIEW} AS preview FROM posts p WHERE p.id IN :ids) fresh
+WHERE posts.id = fresh.id AND posts.top_comments IS DISTINCT FROM fresh.preview
+RETURNING posts.id
+""").bindparams(bindparam("ids", expanding=True))
+
+
+async def refresh(db: AsyncSession, post_ids: Iterable[int]) -> list[int]:
+    """Recompute the previews (caller commits); returns the posts whose preview changed."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return []
+    # the comment insert/delete/like this follows must be visible to the UPDATE
+    await db.flush()
+    result = await db.execute(_REFRESH, {"ids": post_ids})
+    return list(result.scalars().all())
@@ -11,6 +11,23 @@ class Settings(BaseSettings):
     database_password: str
     database_user: str
     database_name: str
+    # streaming replica for read-only routes (empty = no replica, reads use the primary)
+    database_replica_host: str = ""
+    # read-your-writes: after a write a user's reads stay on the primary this long (s)
+    read_your_writes_window: int = 5
+    # connection pool (per worker process — total = workers * (size + overflow))
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared-statement cache per connection (0 disables it)
+    db_statement_cache_size: int = 100
+    # max extra connections one request may hold at once for parallel reads, across all its
+    # gather_reads() calls — plus its own session (1 = run them in order)
+    db_request_fanout: int = 3
+    # set when DATABASE_HOST points at PgBouncer in transaction-pooling mode
+    db_pgbouncer_mode: bool = False
     # jwt info
     secret_key: str
     algorithm: str
@@ -57,6 +74,49 @@ class Settings(BaseSettings):
     rl_create_post_window: int = 60
     rl_follow_max: int = 20
     rl_follow_window: int = 60
+    # home timelines (Redis ZSETs) — posts kept per user and idle expiry (seconds)
+    timeline_max_len: int = 800
+    timeline_ttl: int = 604800
+    # authors with at least this many followers are merged in at read time instead of fanned out
+    feed_pull_threshold: int = 10000
+    # recent post ids cached per pull-model author
+    author_recent_len: int = 200
+    # explore ranking job — full refresh / dirty-post rescore intervals (s), posts kept,
+    # how far back posts are ranked (h) and how many hours of age halve a post's score
+    explore_refresh_interval: int = 300
+    explore_rescore_interval: int = 15
+    explore_top_k: int = 1000
+    explore_window_hours: int = 72
+    explore_half_life_hours: float = 12
+    # personalised explore — candidates scored per request, affinity job interval (s),
+    # expiry of the affinity hashes and of each user's stored ranking (s)
+    personal_explore_candidates: int = 2000
+    personal_affinity_interval: int = 3600
+    personal_affinity_ttl: int = 86400
+    personal_ranking_ttl: int = 300
+    # seen-post filter (seen_filter.py) — bloom filter bits and hashes per generation,
+    # and how long one generation takes writes (s); memory per user ≤ 2 × bits / 8 bytes
+    seen_filter_bits: int = 65536
+    seen_filter_hashes: int = 4
+    seen_filter_rotate: int = 259200
+    # first-page pre-warming on login/refresh/socket connect — warm-ups hitting the DB at
+    # once per worker, queued warm-ups before new ones are dropped, repeat window (s)
+    prewarm_concurrency: int = 4
+    prewarm_max_pending: int = 200
+    prewarm_dedupe_ttl: int = 30
+    # related posts (related_posts.py) — rebuild interval (s), newest tagged posts indexed,
+    # related ids kept per post, newest posts kept per hashtag
+    related_refresh_interval: int = 3600
+    related_max_posts: int = 50000
+    related_top_k: int = 10
+    related_postings_len: int = 1000
+    # per-worker L1 in front of the Redis page cache (redis_service.py) — max entries
+    # (0 = off) and the longest an entry is served without asking Redis (s)
+    l1_cache_size: int = 5000
+    l1_cache_ttl: int = 5
+    # auth principal cache (per worker) — max entries and TTL (seconds)
+    principal_cache_size: int = 10000
+    principal_cache_ttl: int = 60
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
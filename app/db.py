@@ -1,11 +1,12 @@
+from uuid import uuid4
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from app.config import settings as cg
+from app.pool_metrics import InstrumentedQueuePool
 
 # Detect cloud DB and add SSL if needed
 _is_cloud = "azure.com" in cg.database_host
-_async_ssl = {"ssl": True} if _is_cloud else {}
 _sync_ssl = {"sslmode": "require"} if _is_cloud else {}
 
 # ── Async engine + session (used at runtime by all routes/services) ──
@@ -13,16 +14,57 @@ ASYNC_SQL_ALCHEMY_URL = (
     f"postgresql+asyncpg://{cg.database_user}:{cg.database_password}"
     f"@{cg.database_host}/{cg.database_name}"
 )
+_async_url_query = ""
 
-async_engine = create_async_engine(ASYNC_SQL_ALCHEMY_URL, connect_args=_async_ssl)
+# ── Prepared statements vs PgBouncer ──
+# asyncpg prepares every statement and caches it per connection. Behind
+# PgBouncer in transaction mode the next transaction may land on another
+# server connection where that statement doesn't exist, so in that mode we
+# turn both caches off (asyncpg's and SQLAlchemy's) and give the statements
+# that asyncpg still prepares internally unique names so they never collide.
+if cg.db_pgbouncer_mode:
+    _async_url_query = "?prepared_statement_cache_size=0"
+    _async_connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+else:
+    _async_connect_args = {"statement_cache_size": cg.db_statement_cache_size}
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    autocommit=False,
-    autoflush=False,
-    expire_on_commit=False,
-)
+
+def _make_async_engine(host: str):
+    # pool sizes are per worker process — see pool_metrics.py for the live gauges
+    ssl = {"ssl": True} if "azure.com" in host else {}
+    return create_async_engine(
+        f"postgresql+asyncpg://{cg.database_user}:{cg.database_password}"
+        f"@{host}/{cg.database_name}{_async_url_query}",
+        connect_args={**ssl, **_async_connect_args},
+        poolclass=InstrumentedQueuePool,
+        pool_size=cg.db_pool_size,
+        max_overflow=cg.db_max_overflow,
+        pool_timeout=cg.db_pool_timeout,
+        pool_recycle=cg.db_pool_recycle,
+        pool_pre_ping=cg.db_pool_pre_ping,
+    )
+
+
+def _make_sessionmaker(engine):
+    return async_sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+async_engine = _make_async_engine(cg.database_host)
+AsyncSessionLocal = _make_sessionmaker(async_engine)
+
+# ── Optional read replica (see read_routing.py) ──
+# Without DATABASE_REPLICA_HOST every "read" session simply goes to the primary.
+replica_engine = _make_async_engine(cg.database_replica_host) if cg.database_replica_host else None
+ReplicaSessionLocal = _make_sessionmaker(replica_engine) if replica_engine else None
 
 # ── Sync engine (used ONLY by Alembic migrations + initial create_all) ──
 SYNC_SQL_ALCHEMY_URL = (
@@ -0,0 +1,195 @@
+# explore_ranking.py
+# The explore feed, ranked by engagement instead of just "newest first".
+#
+# SCORE:
+#   engagement = likes + 2·comments + 0.05·views − dislikes
+#   score      = sign(engagement)·log2(max(|engagement|, 1))
+#                + (hours since the epoch) / EXPLORE_HALF_LIFE_HOURS
+#   Every HALF_LIFE hours of age weigh as much as halving the engagement,
+#   so fresh posts with a few likes beat day-old posts with a few more.
+#   Because the age term counts from a fixed point (not from "now"), a score
+#   never has to be recomputed just because time passed — only when the
+#   post's counters change. That's what makes incremental rescoring valid.
+#
+# STORAGE:
+#   explore:ranked  ZSET  member = post id, score as above, top
+#   EXPLORE_TOP_K posts of the last EXPLORE_WINDOW_HOURS. Pages are ZREVRANGE
+#   by position — O(log n + page size), no sort on the posts table.
+#
+# JOB (started from main.py's lifespan, one loop per worker):
+#   - every EXPLORE_REFRESH_INTERVAL s: recompute the whole top-K in SQL,
+#     build it under a temp key and RENAME it over the live one (atomic)
+#   - every EXPLORE_RESCORE_INTERVAL s: rescore the posts whose counters
+#     changed (votes, comments, views, new posts add them to explore:dirty)
+#   A short Redis lock makes sure only one worker does each run.
+
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import case, extract, func, select
+from app import models, redis_service
+from app.config import settings
+from app.db import AsyncSessionLocal
+
+# ── Patchable session factory (same pattern as notification_service) ──
+_session_factory = AsyncSessionLocal
+
+RANKED_KEY = "explore:ranked"
+DIRTY_KEY = "explore:dirty"
+_REFRESH_LOCK = "explore:lock:refresh"
+_RESCORE_LOCK = "explore:lock:rescore"
+CURSOR_PREFIX = "rank."
+# chunks of limit+1 ids one page may scan while skipping seen posts
+_MAX_SCANS = 5
+
+
+def score_column():
+    """The SQL expression for a post's score (see the header)."""
+    Post = models.Post
+    engagement = (
+        Post.likes + 2 * func.coalesce(Post.comments_cnt, 0)
+        + 0.05 * func.coalesce(Post.views, 0) - Post.dis_likes
+    )
+    # Postgres only has log(base, x) for numeric — ln(x)/ln(2) stays in floats
+    magnitude = func.ln(func.greatest(func.abs(engagement), 1)) / math.log(2)
+    signed = case((engagement < 0, -magnitude), else_=magnitude)
+    age = extract("epoch", Post.created_at) / 3600.0 / settings.explore_half_life_hours
+    return (signed + age).label("score")
+
+
+def in_window():
+    since = datetime.now(timezone.utc) - timedelta(hours=settings.explore_window_hours)
+    return models.Post.created_at >= since
+
+
+# ── Writers ──
+
+async def mark_dirty(post_id: int) -> None:
+    """A post's counters changed — rescore it on the next tick."""
+    try:
+        await redis_service.redis_client.sadd(DIRTY_KEY, post_id)
+    except Exception:
+        # the next full refresh picks it up anyway
+        pass
+
+
+async def forget(post_id: int) -> None:
+    try:
+        await redis_service.redis_client.zrem(RANKED_KEY, str(post_id))
+    except Exception:
+        pass
+
+
+async def refresh() -> int:
+    """Recompute the top-K from scratch; returns how many posts were ranked."""
+    score = score_column()
+    async with _session_factory() as db:
+        rows = (await db.execute(
+            select(models.Post.id, score).where(in_window())
+            .order_by(score.desc()).limit(settings.explore_top_k)
+        )).all()
+    client = redis_service.redis_client
+    if not rows:
+        await client.delete(RANKED_KEY)
+        return 0
+    tmp = f"{RANKED_KEY}:building"
+    pipe = client.pipeline(transaction=True)
+    pipe.delete(tmp)
+    pipe.zadd(tmp, {str(r.id): float(r.score) for r in rows})
+    pipe.rename(tmp, RANKED_KEY)
+    await pipe.execute()
+    return len(rows)
+
+
+async def rescore_dirty() -> int:
+    """Rescore only the posts marked dirty since the last tick."""
+    client = redis_service.redis_client
+    ids = await client.spop(DIRTY_KEY, 1000)
+    if not ids:
+        return 0
+    score = score_column()
+    async with _session_factory() as db:
+        rows = (await db.execute(
+            select(models.Post.id, score).where(models.Post.id.in_([int(i) for i in ids]), in_window())
+        )).all()
+    if not rows:
+        return 0
+    pipe = client.pipeline(transaction=True)
+    pipe.zadd(RANKED_KEY, {str(r.id): float(r.score) for r in rows})
+    # keep only the top K (lowest scores fall off)
+    pipe.zremrangebyrank(RANKED_KEY, 0, -(settings.explore_top_k + 1))
+    await pipe.execute()
+    return len(rows)
+
+
+async def run() -> None:
+    """Ranking loop for main.py's lifespan."""
+    last_refresh = 0.0
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            if loop.time() - last_refresh >= settings.explore_refresh_interval:
+                last_refresh = loop.time()
+                if await redis_service.try_lock(_REFRESH_LOCK, settings.explore_refresh_interval - 1):
+                    await refresh()
+            elif await redis_service.try_lock(_RESCORE_LOCK, settings.explore_rescore_interval - 1):
+                await rescore_dirty()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # DB/Redis hiccup — try again on the next tick
+            pass
+        await asyncio.sleep(settings.explore_rescore_interval)
+
+
+# ── Reader ──
+
+def encode_cursor(position: int) -> str:
+    return f"{CURSOR_PREFIX}{position}"
+
+
+async def read_page(limit: int, cursor: Optional[str] = None, offset: int = 0,
+                    key: str = RANKED_KEY,
+                    skip: Optional[Callable[[list[int]], Awaitable[list[bool]]]] = None,
+                    ) -> Optional[tuple[list[int], Optional[str], int]]:
+    """
+    (post ids of the page, next cursor, ranked count), or None when the
+    ranking can't serve it (not built yet, Redis down, or a keyset cursor
+    from the old newest-first explore feed). `key` lets the per-user
+    rankings of explore_personal.py page the same way.
+
+    `skip` flags ids to leave out (seen_filter.seen). Skipped slots are
+    backfilled from further down the ranking, up to _MAX_SCANS chunks per
+    page, and the cursor then points just past what was consumed.
+    """
+    if cursor and not cursor.startswith(CURSOR_PREFIX):
+        return None
+    try:
+        start = int(cursor[len(CURSOR_PREFIX):]) if cursor else offset
+    except ValueError:
+        return None
+    # (position, id) of every id kept so far — one more than the page tells us there is a next one
+    kept, position, size = [], start, 0
+    try:
+        for _ in range(_MAX_SCANS):
+            pipe = redis_service.redis_client.pipeline(transaction=False)
+            pipe.zrevrange(key, position, position + limit)
+            pipe.zcard(key)
+            chunk, size = await pipe.execute()
+            chunk = [int(i) for i in chunk]
+            flags = await skip(chunk) if skip else [False] * len(chunk)
+            kept += [(position + n, post_id) for n, (post_id, hide) in enumerate(zip(chunk, flags)) if not hide]
+            position += len(chunk)
+            if len(kept) > limit or position >= size:
+                break
+    except Exception:
+        return None
+    if not size:
+        return None
+    if len(kept) > limit:
+        next_cursor = encode_cursor(kept[limit][0])
+    else:
+        # scan budget ran out before the page filled — carry on from there next time
+        next_cursor = encode_cursor(position) if position < size else None
+    return [post_id for _, post_id in kept[:limit]], next_cursor, size
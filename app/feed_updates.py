@@ -0,0 +1,100 @@
+# feed_updates.py
+# "N new posts" hints for the home feed, pushed over Server-Sent Events.
+#
+# WHY?
+#   Clients used to re-fetch /feed/home every few seconds just to learn
+#   whether anything was new — a full page + total query per poll. Now they
+#   either poll GET /feed/home/new-count (a ZCOUNT per timeline source, no
+#   SQL) or keep one GET /feed/home/stream open and get told.
+#
+# HOW:
+#   - create_post → timeline_service.fan_out() publishes the post id on
+#     feed-updates:<follower_id> (or feed-updates:author:<id> for a big
+#     author, whose followers aren't fanned out)
+#   - listen() — one task per worker, started in main.py's lifespan —
+#     PSUBSCRIBEs to feed-updates:* and wakes the local streams waiting on
+#     that channel. One Redis connection per worker, not per open stream.
+#   - events() waits to be woken, recounts with timeline_service.count_since()
+#     (so a burst of posts costs one count) and sends
+#         event: new_posts
+#         data: {"count": N}
+#     whenever N changed. A ": ping" comment every KEEPALIVE seconds keeps
+#     proxies from closing an idle stream.
+#
+# The route takes no DB session: a yield dependency is only cleaned up
+# after the StreamingResponse has finished, so each open stream would hold
+# a pooled connection idle in transaction for as long as it stays open.
+# open_stream() does the DB part (which big authors you follow) up front,
+# in a short session of its own, and events() only talks to Redis.
+
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator
+from app import redis_service, timeline_service
+from app.db import AsyncSessionLocal
+
+# ── Patchable session factory (same pattern as notification_service) ──
+_session_factory = AsyncSessionLocal
+
+KEEPALIVE = 15
+_PATTERN = "feed-updates:*"
+
+# channel → wake-up events of the streams open on this worker
+_waiting: dict[str, set[asyncio.Event]] = defaultdict(set)
+
+
+async def listen() -> None:
+    """Dispatch feed-update messages to this worker's open streams."""
+    ps = redis_service.redis_client.pubsub()
+    await ps.psubscribe(_PATTERN)
+    try:
+        async for message in ps.listen():
+            if message["type"] != "pmessage":
+                continue
+            for wake in list(_waiting.get(message["channel"], ())):
+                wake.set()
+    except asyncio.CancelledError:
+        await ps.punsubscribe(_PATTERN)
+        raise
+
+
+def _event(count: int) -> str:
+    return f"event: new_posts\ndata: {json.dumps({'count': count})}\n\n"
+
+
+async def events(channels: list[str], keys: list[str], since: int) -> AsyncIterator[str]:
+    """SSE frames for one open stream; `since` is a timeline score."""
+    wake = asyncio.Event()
+    for channel in channels:
+        _waiting[channel].add(wake)
+    try:
+        last = await timeline_service.count_since(keys, since)
+        # the current count first, so the client starts from the right number
+        yield _event(last)
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            wake.clear()
+            count = await timeline_service.count_since(keys, since)
+            if count != last:
+                last = count
+                yield _event(count)
+    finally:
+        for channel in channels:
+            _waiting[channel].discard(wake)
+            if not _waiting[channel]:
+                del _waiting[channel]
+
+
+async def open_stream(user_id: int, since: datetime) -> AsyncIterator[str]:
+    """Resolve the user's feed sources now; the session is closed before any frame is sent."""
+    async with _session_factory() as db:
+        keys, pull_authors = await timeline_service.sources(db, user_id)
+    channels = [timeline_service.updates_channel(user_id)]
+    channels += [timeline_service.author_channel(a) for a in pull_authors]
+    return events(channels, keys, timeline_service.score(since))
@@ -0,0 +1,130 @@
+# list_queries.py
+# ORM-free read layer for the list endpoints (feeds, post lists, search,
+# followers/following, comments).
+#
+# WHY?
+#   A list page used to load full models.Post / models.User objects — every
+#   column, identity-map bookkeeping, instance state — only to copy five or
+#   six attributes into a response schema. Here we select() just those
+#   columns (the owner's username/avatar come from the author snapshot on
+#   the row itself, see author_snapshots.py) and get plain row tuples back,
+#   which map straight onto response dicts.
+#   benchmarks/list_read_path.py compares both paths.
+#
+# The selects below are meant to be combined with my_utils/pagination.py:
+#   keyset(feed_select().where(...), models.Post.created_at, models.Post.id, ...)
+
+from typing import Iterable
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.blob_service import get_blob_url
+
+Post, User = models.Post, models.User
+
+POST_COLUMNS = (
+    Post.id, Post.title, Post.media_path, Post.media_type,
+    Post.likes, Post.comments_cnt, Post.created_at, Post.top_comments,
+)
+OWNER_COLUMNS = (Post.user_id, Post.author_username, Post.author_pic)
+USER_COLUMNS = (User.id, User.username, User.nickname, User.profile_picture)
+
+
+# ── selects ──
+
+def post_list_select() -> Select:
+    """Columns of a PostListItemResponse."""
+    return select(*POST_COLUMNS)
+
+
+def feed_select() -> Select:
+    """Post columns + the owner's username and avatar, no users join."""
+    return select(*POST_COLUMNS, *OWNER_COLUMNS)
+
+
+def user_list_select() -> Select:
+    """Columns of a UserBasicResponse."""
+    return select(*USER_COLUMNS)
+
+
+def comment_select() -> Select:
+    C = models.Comments
+    return select(C.id, C.post_id, C.comment_content, C.likes, C.created_at,
+                  C.user_id, C.author_username, C.author_nickname, C.author_pic)
+
+
+async def liked_post_ids(db: AsyncSession, user_id: int, post_ids: Iterable[int]) -> set[int]:
+    """Which of these posts the user liked — only the ids on the page, not every like ever."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set()
+    result = await db.execute(
+        select(models.Votes.post_id).where(
+            models.Votes.user_id == user_id,
+            models.Votes.post_id.in_(post_ids),
+            models.Votes.action == True,  # noqa: E712
+        )
+    )
+    return set(result.scalars().all())
+
+
+# ── cache tags (redis_service.set_cache(..., tags=...)) ──
+
+def post_tags(rows) -> list[str]:
+    """The posts on a page — a like or edit of one of them drops the page."""
+    return [f"post:{row.id}" for row in rows]
+
+
+def user_tags(rows) -> list[str]:
+    """The authors (user_id) shown on a page — their profile edits drop it."""
+    return [f"user:{row.user_id}" for row in rows]
+
+
+# ── row → response dict ──
+
+def post_item(row, liked_ids: set[int] = frozenset()) -> dict:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "media_url": get_blob_url("posts-media", row.media_path) if row.media_path else None,
+        "media_type": row.media_type,
+        "likes": row.likes,
+        "comments_count": row.comments_cnt or 0,
+        "created_at": row.created_at,
+        "is_liked": row.id in liked_ids,
+        "top_comments": row.top_comments,
+    }
+
+
+def feed_item(row, liked_ids: set[int] = frozenset()) -> dict:
+    return {
+        "post_id": row.id,
+        "post": post_item(row, liked_ids),
+        "owner": {"id": row.user_id, "username": row.author_username, "profile_pic": row.author_pic},
+    }
+
+
+def user_item(row, following_ids: set[int] = frozenset()) -> dict:
+    return {
+        "id": row.id,
+        "username": row.username,
+        "nickname": row.nickname,
+        "profile_pic": row.profile_picture,
+        "is_following": row.id in following_ids,
+    }
+
+
+def comment_item(row) -> dict:
+    return {
+        "id": row.id,
+        "post_id": row.post_id,
+        "content": row.comment_content,
+        "likes": row.likes,
+        "created_at": row.created_at,
+        "user": {
+            "id": row.user_id,
+            "username": row.author_username,
+            "nickname": row.author_nickname,
+            "profile_pic": row.author_pic,
+        },
+    }
@@ -2,13 +2,13 @@
 import asyncio
 import json as _json
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from app import models, config
+from app import models, config, principal_cache, pool_metrics, oauth2, read_routing, explore_ranking, explore_personal, feed_updates, related_posts, parallel_reads
 from app import redis_service as _redis_svc   # accessed via module so tests can patch redis_client
-from app.db import sync_engine
+from app.db import sync_engine, async_engine, replica_engine
 from app.routes import changepassword, posts,users,auth,like,connect,comment,search,me,feed
-from app.routes import notifications
+from app.routes import notifications, trending
 from app.redis_service import check_redis_connection
 from app.my_utils.socket_manager import manager
 from chat_system import chat,chat_history,share,delete_msg,delete_shares,edit_msg,msg_info,msg_reaction,share_reaction,media_msg,clear_chat
@@ -18,6 +18,12 @@ from fastapi.middleware.cors import CORSMiddleware
 models.Base.metadata.create_all(bind=sync_engine)
 
 _listener_task: asyncio.Task | None = None
+_principal_listener_task: asyncio.Task | None = None
+_explore_ranking_task: asyncio.Task | None = None
+_affinity_task: asyncio.Task | None = None
+_feed_updates_task: asyncio.Task | None = None
+_related_posts_task: asyncio.Task | None = None
+_cache_listener_task: asyncio.Task | None = None
 
 async def _notification_listener() -> None:
     ps = _redis_svc.redis_client.pubsub()
@@ -43,6 +49,26 @@ async def _notification_listener() -> None:
         raise   # re-raise so asyncio records the task as Cancelled, not Failed
 
 
+# Every worker keeps its own principal cache (see principal_cache.py), so
+# logout / password change / profile edits are broadcast over pub/sub and
+# each worker drops the matching entries here.
+async def _principal_invalidation_listener() -> None:
+    ps = _redis_svc.redis_client.pubsub()
+    await ps.subscribe(principal_cache.INVALIDATION_CHANNEL)
+    try:
+        async for message in ps.listen():
+            if message["type"] != "message":
+                continue
+            try:
+                principal_cache.apply_invalidation(_json.loads(message["data"]))
+            except Exception:
+                # malformed payload — ignore and keep listening
+                pass
+    except asyncio.CancelledError:
+        await ps.unsubscribe(principal_cache.INVALIDATION_CHANNEL)
+        raise
+
+
 # ── Lifespan: replaces the deprecated @app.on_event("startup"/"shutdown") ────
 # asynccontextmanager turns this one function into both startup AND shutdown.
 # Everything before `yield` runs at startup; everything after runs at shutdown.
@@ -51,22 +77,34 @@ async def _notification_listener() -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # ── startup ──
-    global _listener_task
+    global _listener_task, _principal_listener_task, _explore_ranking_task, _affinity_task, _feed_updates_task, _related_posts_task, _cache_listener_task
     redis_ok = await check_redis_connection()
     if redis_ok:
         _listener_task = asyncio.create_task(_notification_listener())
+        _principal_listener_task = asyncio.create_task(_principal_invalidation_listener())
+        # keeps explore:ranked fresh (explore_ranking.py)
+        _explore_ranking_task = asyncio.create_task(explore_ranking.run())
+        # and the affinity profiles behind mode=personal (explore_personal.py)
+        _affinity_task = asyncio.create_task(explore_personal.run())
+        # wakes the open /feed/home/stream connections (feed_updates.py)
+        _feed_updates_task = asyncio.create_task(feed_updates.listen())
+        # hashtag co-occurrence index behind /posts/{id}/related (related_posts.py)
+        _related_posts_task = asyncio.create_task(related_posts.run())
+        # keeps this worker's L1 page cache in line with the others (redis_service.py)
+        _cache_listener_task = asyncio.create_task(_redis_svc.listen_invalidations())
     else:
         print("⚠️  Skipping Redis notification listener (Redis unavailable)")
 
     yield   # app is running between these two points
 
     # ── shutdown ──
-    if _listener_task:
-        _listener_task.cancel()
-        try:
-            await _listener_task
-        except asyncio.CancelledError:
-            pass
+    for task in (_listener_task, _principal_listener_task, _explore_ranking_task, _affinity_task, _feed_updates_task, _related_posts_task, _cache_listener_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
 
 
 # fastapi instance — lifespan wires up the startup/shutdown hooks above
@@ -98,6 +136,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# read-your-writes: any successful write pins the caller's reads to the
+# primary for a few seconds (see read_routing.py). Runs after the route, so
+# the token has just been verified and is normally a principal cache hit.
+@app.middleware("http")
+async def markWrites(request: Request, call_next):
+    response = await call_next(request)
+    if (request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400
+            and read_routing.enabled()):
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            principal = principal_cache.get(token)
+            try:
+                user_id = principal.id if principal else (await oauth2.decodeToken(token))["userId"]
+            except Exception:
+                user_id = None
+            if user_id is not None:
+                await read_routing.mark_write(user_id)
+    return response
+
+# one DB_REQUEST_FANOUT budget per request, shared by all its gather_reads()
+# calls (see parallel_reads.py); the route runs in a context copied from here
+@app.middleware("http")
+async def readFanoutGate(request: Request, call_next):
+    parallel_reads.start_request()
+    return await call_next(request)
+
 app.include_router(posts.router)
 app.include_router(users.router)
 app.include_router(auth.router)
@@ -109,6 +173,7 @@ app.include_router(me.router)
 app.include_router(changepassword.router)
 app.include_router(feed.router)
 app.include_router(notifications.router)
+app.include_router(trending.router)
 app.include_router(chat.router)
 app.include_router(chat_history.router)
 app.include_router(share.router)
@@ -125,4 +190,17 @@ app.include_router(clear_chat.router)
 def hello():
     return {
         "message":"fine"
-    }
\ No newline at end of file
+    }
+
+# pool gauges of whichever worker answered — poll it a few times to see them all
+@app.get("/health/pool",status_code=200)
+def poolHealth():
+    return {
+        "primary": pool_metrics.snapshot(async_engine),
+        "replica": pool_metrics.snapshot(replica_engine) if replica_engine is not None else None,
+    }
+
+# L1/L2 page-cache hit ratios of whichever worker answered
+@app.get("/health/cache",status_code=200)
+def cacheHealth():
+    return _redis_svc.cache_stats()
\ No newline at end of file
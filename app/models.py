@@ -1,8 +1,9 @@
 import enum
 from app.db import Base
-from sqlalchemy import Column,Integer,String,Boolean,ForeignKey,Table,DateTime,UniqueConstraint,Enum
+from sqlalchemy import Column,Integer,String,Boolean,ForeignKey,Table,DateTime,UniqueConstraint,Enum,Index
 from sqlalchemy.sql.expression import null,text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 from sqlalchemy.sql import func
@@ -14,10 +15,31 @@ class NotificationType(str, enum.Enum):
     follow  = "follow"
 # structure or model of the db tables
 
+# ── Relationship loading policy ──
+# Every relationship below is lazy="raise": touching one that the query did
+# not explicitly load raises instead of silently firing extra SELECTs (or,
+# worse, cascading into each related row's own eager graph). Each route
+# states what it needs with selectinload()/joinedload()/load_only() — see
+# the loader options next to the queries in app/routes and chat_system.
+# Collections backed by ON DELETE CASCADE foreign keys use
+# passive_deletes=True so deleting a parent leaves the cleanup to Postgres
+# instead of loading the whole collection first.
+
+# ── Index policy ──
+# Every hot query in app/routes and chat_system has an index that matches
+# its WHERE + ORDER BY (newest-first lists page on (created_at, id), see
+# my_utils/pagination.py). Unique constraints already act as indexes, so
+# e.g. deleted_messages(user_id, message_id) needs nothing extra.
+# pytests/test_query_plans.py EXPLAINs each of these queries and fails if
+# one of them falls back to a sequential scan — add the query there when
+# you add an index here.
+
 connections = Table(
     'connections', Base.metadata,
     Column('followed_id',Integer,ForeignKey('users.id',ondelete="CASCADE"),primary_key=True),
-    Column('follower_id',Integer,ForeignKey('users.id',ondelete="CASCADE"),primary_key=True)
+    Column('follower_id',Integer,ForeignKey('users.id',ondelete="CASCADE"),primary_key=True),
+    # the PK leads with followed_id; "who do I follow" needs the reverse
+    Index('ix_connections_follower_id','follower_id','followed_id')
 )
 
 class SharedPostReplies(Base):
@@ -27,8 +49,8 @@ class SharedPostReplies(Base):
     shared_post_id = Column(Integer, ForeignKey("shared_posts.id", ondelete="CASCADE"), primary_key=True)
 
     # Relationships
-    reply_message = relationship("Message", foreign_keys=[reply_msg_id],backref=backref("replies_to_share", lazy="selectin"), lazy="selectin")
-    shared_post = relationship("SharedPost", foreign_keys=[shared_post_id],backref=backref("replies", lazy="selectin"), lazy="selectin")
+    reply_message = relationship("Message", foreign_keys=[reply_msg_id],backref=backref("replies_to_share", lazy="raise", passive_deletes=True), lazy="raise")
+    shared_post = relationship("SharedPost", foreign_keys=[shared_post_id],backref=backref("replies", lazy="raise", passive_deletes=True), lazy="raise")
 
 class SharedPost(Base):
     __tablename__ = "shared_posts"
@@ -42,15 +64,22 @@ class SharedPost(Base):
     is_read=Column(Boolean,default=False,server_default="false")
     is_deleted_for_everyone = Column(Boolean, default=False, server_default='false')
     reaction_cnt=Column(Integer,default=0,server_default="0")
+    __table_args__ = (
+        # chat history between two users
+        Index('ix_shared_posts_from_to_created','from_user_id','to_user_id','created_at'),
+        # unread shares pushed on websocket connect
+        Index('ix_shared_posts_to_user_unread','to_user_id',postgresql_where=(is_read==False)),
+    )
     # Relationships
-    post = relationship("Post",back_populates="shared_posts", lazy="selectin")
-    from_user = relationship("User", foreign_keys=[from_user_id],back_populates="sent_posts", lazy="selectin")
-    to_user = relationship("User", foreign_keys=[to_user_id],back_populates="received_posts", lazy="selectin")
+    post = relationship("Post",back_populates="shared_posts", lazy="raise")
+    from_user = relationship("User", foreign_keys=[from_user_id],back_populates="sent_posts", lazy="raise")
+    to_user = relationship("User", foreign_keys=[to_user_id],back_populates="received_posts", lazy="raise")
     reactions = relationship(
         "SharedPostReaction",
-        backref=backref("shared_post", lazy="selectin"),
+        backref=backref("shared_post", lazy="raise"),
         cascade="all, delete-orphan",
-        lazy="selectin"
+        passive_deletes=True,
+        lazy="raise"
     )
 
 # models.py
@@ -71,12 +100,13 @@ class DeletedSharedPost(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     shared_post_id = Column(Integer, ForeignKey("shared_posts.id", ondelete="CASCADE"))
     deleted_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (Index('ix_deleted_shared_posts_user_id','user_id'),)
     
     # Relationships
     # which user has deleted
-    user = relationship("User", lazy="selectin")
+    user = relationship("User", lazy="raise")
     # which post has been deleted
-    shared_post = relationship("SharedPost", lazy="selectin")
+    shared_post = relationship("SharedPost", lazy="raise")
 
 class OTP(Base):
     __tablename__ = "otps"
@@ -91,6 +121,8 @@ class Votes(Base):
     post_id=Column(Integer,ForeignKey("posts.id",ondelete="CASCADE"),primary_key=True,nullable=False)
     user_id=Column(Integer,ForeignKey("users.id",ondelete="CASCADE"),primary_key=True,nullable=False)
     action=Column(Boolean,nullable=False)
+    # "posts I liked/disliked" — the PK leads with post_id
+    __table_args__ = (Index('ix_votes_user_id_action','user_id','action'),)
 
 class CommentVotes(Base):
     __tablename__='comment_votes'
@@ -106,6 +138,16 @@ class Comments(Base):
     comment_content=Column(String,nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     likes=Column(Integer,default=0,server_default=text("0"),nullable=False)
+    # author snapshot — copied from users on insert, refreshed by author_snapshots.py
+    author_username=Column(String,nullable=True)
+    author_nickname=Column(String,nullable=True)
+    author_pic=Column(String,nullable=True)
+    __table_args__ = (
+        Index('ix_comments_post_id_created_at','post_id','created_at','id'),
+        # "most liked" for the post's comment preview (comment_previews.py)
+        Index('ix_comments_post_id_likes','post_id','likes','created_at','id'),
+        Index('ix_comments_user_id','user_id'),
+    )
 class Post(Base):
     __tablename__='posts'
     id=Column(Integer,primary_key=True,nullable=False)
@@ -121,8 +163,20 @@ class Post(Base):
     views=Column(Integer,default=0,server_default=text("0"))
     comments_cnt=Column(Integer,default=0,server_default=text("0"))
     hashtags=Column(String,nullable=True)
+    # author snapshot — list pages render the owner from these, no users join
+    author_username=Column(String,nullable=True)
+    author_nickname=Column(String,nullable=True)
+    author_pic=Column(String,nullable=True)
+    # comment preview for post cards, kept by comment_previews.py; NULL = no comments
+    top_comments=Column(JSONB,nullable=True)
+    __table_args__ = (
+        # profile lists + home feed (user_id IN followed)
+        Index('ix_posts_user_id_created_at','user_id','created_at','id'),
+        # explore feed
+        Index('ix_posts_created_at_id','created_at','id'),
+    )
 
-    shared_posts = relationship("SharedPost",back_populates="post", lazy="selectin")
+    shared_posts = relationship("SharedPost",back_populates="post", passive_deletes=True, lazy="raise")
 class PostView(Base):
     __tablename__ = "post_views"
     post_id = Column(Integer, ForeignKey("posts.id",ondelete="CASCADE"),primary_key=True)
@@ -135,46 +189,51 @@ class User(Base):
       password=Column(String,nullable=False)
       nickname=Column(String,nullable=False)
       bio=Column(String,nullable=True)
-      email=Column(String,nullable=True)
+      email=Column(String,nullable=True,index=True)
       profile_picture=Column(String,nullable=True)
       created_at=Column(TIMESTAMP(timezone=True),nullable=False,server_default=text('now()'))
       followers_cnt=Column(Integer,default=0,server_default="0",nullable=False)
       following_cnt=Column(Integer,default=0,server_default="0",nullable=False)
+      # maintained in the same transaction as the insert/delete (see totals_service.py)
+      posts_cnt=Column(Integer,default=0,server_default="0",nullable=False)
+      notifications_cnt=Column(Integer,default=0,server_default="0",nullable=False)
       # added relationship between the posts table and the users table so that
       # when you actually need all the posts of a user there's no need from now on 
       # to go check the posts table and query it for Posts.user_id==currentUser.id
       # inorder to get all posts of a certain user but rather by declaring this relationship
       # you just do the currentUser.posts and sqlAlchemy internally does the joins
       # and retrievs you all of the users posts!
-      posts=relationship('Post',backref=backref('user', lazy='selectin'), lazy='selectin')
+      posts=relationship('Post',backref=backref('user', lazy='raise'), passive_deletes=True, lazy='raise')
       # a many to many relationship
       followers = relationship(
         'User',
         secondary=connections,  # The middle table
         primaryjoin=(connections.c.followed_id == id),  # "I am the follwed guyy"
         secondaryjoin=(connections.c.follower_id == id),  # "They are my followers"
-        backref=backref('following', lazy='selectin'),  # reverse property
-        lazy='selectin'
+        backref=backref('following', lazy='raise', passive_deletes=True),  # reverse property
+        passive_deletes=True,
+        lazy='raise'
     )
       voted_posts = relationship(
         'Post',
         secondary='votes',  # The middle table
         primaryjoin=(Votes.user_id == id),  # User.id links to Votes.user_id
         secondaryjoin=(Votes.post_id == Post.id),  # Votes.post_id links to Post.id
-        backref=backref('voters', lazy='selectin'),  # allows posts to access users who voted on them
-        lazy='selectin'
+        backref=backref('voters', lazy='raise', passive_deletes=True),  # allows posts to access users who voted on them
+        passive_deletes=True,
+        lazy='raise'
     )
-      total_comments=relationship('Comments',backref=backref('user', lazy='selectin'), lazy='selectin')
-      sent_posts = relationship("SharedPost", foreign_keys=[SharedPost.from_user_id],back_populates="from_user", lazy="selectin")
-      received_posts = relationship("SharedPost", foreign_keys=[SharedPost.to_user_id],back_populates="to_user", lazy="selectin")
-      shared_post_reactions = relationship("SharedPostReaction", back_populates="user", lazy="selectin")
+      total_comments=relationship('Comments',backref=backref('user', lazy='raise'), passive_deletes=True, lazy='raise')
+      sent_posts = relationship("SharedPost", foreign_keys=[SharedPost.from_user_id],back_populates="from_user", passive_deletes=True, lazy="raise")
+      received_posts = relationship("SharedPost", foreign_keys=[SharedPost.to_user_id],back_populates="to_user", passive_deletes=True, lazy="raise")
+      shared_post_reactions = relationship("SharedPostReaction", back_populates="user", passive_deletes=True, lazy="raise")
 class MessageReplies(Base):
     __tablename__ = "message_replies"
     reply_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), primary_key=True)
     original_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), primary_key=True)
     # Relationships (optional, for easier querying)
-    reply_msg = relationship("Message", foreign_keys=[reply_id], lazy="selectin")
-    original_msg = relationship("Message", foreign_keys=[original_id], lazy="selectin")
+    reply_msg = relationship("Message", foreign_keys=[reply_id], lazy="raise")
+    original_msg = relationship("Message", foreign_keys=[original_id], lazy="raise")
 class Message(Base):
     __tablename__ = "messages"
     id = Column(Integer, primary_key=True, index=True)
@@ -192,20 +251,27 @@ class Message(Base):
     reaction_cnt=Column(Integer,default=0,server_default="0")
     is_reply_msg = Column(Boolean,default=False)
     is_reply_to_share = Column(Boolean,default=False,server_default="false")
+    __table_args__ = (
+        # one conversation (both directions are two range scans on this)
+        Index('ix_messages_sender_receiver_created','sender_id','receiver_id','created_at'),
+        # missed messages + the receiver side of recent chats
+        Index('ix_messages_receiver_created','receiver_id','created_at'),
+    )
     # optional relationships for later maybe useful
     # when you do a Obj.sender where Obj is the object of class Message
     # it returns which user has sent that message and the same for Obj.recceiver
     # and also when you add a 'backpopulates' or 'backref' with a somename and on
     # User side you do that Object.thatBackrefName on a User object then it returns  
     # a list of all the messages that particular user has sent or received
-    sender = relationship("User", foreign_keys=[sender_id], lazy="selectin")
-    receiver = relationship("User", foreign_keys=[receiver_id], lazy="selectin")
+    sender = relationship("User", foreign_keys=[sender_id], lazy="raise")
+    receiver = relationship("User", foreign_keys=[receiver_id], lazy="raise")
     # get the hecking list of all reactions on this message
     reactions = relationship(
         "MessageReaction",
-        backref=backref("message", lazy="selectin"),
+        backref=backref("message", lazy="raise"),
         cascade="all, delete-orphan",
-        lazy="selectin"
+        passive_deletes=True,
+        lazy="raise"
     )
     # get the list of all reacted users on this message
     reacted_users = relationship(
@@ -213,7 +279,8 @@ class Message(Base):
     secondary="message_reactions",
     primaryjoin="Message.id == message_reactions.c.message_id",
     secondaryjoin="User.id == message_reactions.c.user_id",
-    viewonly=True
+    viewonly=True,
+    lazy="raise"
     )
     # if the Message obj is a reply message
     # thrn we need to know the original message
@@ -223,7 +290,8 @@ class Message(Base):
         foreign_keys=[MessageReplies.original_id],
         back_populates="original_msg",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        passive_deletes=True,
+        lazy="raise"
     )
     # One message can reply to one
     replies_to = relationship(
@@ -231,7 +299,7 @@ class Message(Base):
         foreign_keys=[MessageReplies.reply_id],
         back_populates="reply_msg",
         uselist=False,  # important: only one parent
-        lazy="selectin"
+        lazy="raise"
     )
     # Add this inside class Message (in models.py)
 
@@ -242,7 +310,8 @@ class Message(Base):
         primaryjoin="Message.id == SharedPostReplies.reply_msg_id",
         secondaryjoin="SharedPostReplies.shared_post_id == SharedPost.id",
         uselist=False,           # One message replies to exactly one shared post
-        viewonly=True
+        viewonly=True,
+        lazy="raise"
     )
 # separate message reaction table to track who reacted to teh msg
 class MessageReaction(Base):
@@ -253,7 +322,7 @@ class MessageReaction(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     reaction = Column(String,nullable=False)  # ex: "❤️", "😂"
     # get the user reacted
-    user = relationship("User", backref=backref("message_reactions", lazy="selectin"), lazy="selectin")
+    user = relationship("User", backref=backref("message_reactions", lazy="raise", passive_deletes=True), lazy="raise")
     __table_args__ = (UniqueConstraint('message_id', 'user_id', name='unique_user_reaction'),)
 
 class SharedPostReaction(Base):
@@ -265,7 +334,7 @@ class SharedPostReaction(Base):
     reaction = Column(String,nullable=False)
 
     # Relationships
-    user = relationship("User", back_populates="shared_post_reactions", lazy="selectin")
+    user = relationship("User", back_populates="shared_post_reactions", lazy="raise")
     __table_args__ = (UniqueConstraint('shared_post_id', 'user_id', name='unique_shared_post_reaction'),)
 
 
@@ -286,7 +355,7 @@ class Notification(Base):
     __tablename__ = "notifications"
 
     id          = Column(Integer, primary_key=True)
-    owner_id    = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    owner_id    = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     actor_id    = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     type        = Column(Enum(NotificationType), nullable=False)
     entity_id   = Column(Integer, nullable=True)   # post_id or comment_id; NULL for follows
@@ -295,10 +364,17 @@ class Notification(Base):
     is_read     = Column(Boolean, default=False, server_default="false", nullable=False)
     created_at  = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # the notification list (also covers plain owner_id lookups)
+        Index('ix_notifications_owner_created_at', 'owner_id', 'created_at', 'id'),
+        # unread badge + missed notifications on connect
+        Index('ix_notifications_owner_unread', 'owner_id', 'created_at', postgresql_where=(is_read == False)),  # noqa: E712
+    )
+
     # who receives this notification
-    owner = relationship("User", foreign_keys=[owner_id], backref=backref("notifications", lazy="selectin"), lazy="selectin")
+    owner = relationship("User", foreign_keys=[owner_id], backref=backref("notifications", lazy="raise", passive_deletes=True), lazy="raise")
     # who triggered this notification (we need their username + profile pic for the client)
-    actor = relationship("User", foreign_keys=[actor_id], lazy="selectin")
+    actor = relationship("User", foreign_keys=[actor_id], lazy="raise")
 
 
 class RefreshToken(Base):
@@ -320,4 +396,4 @@ class RefreshToken(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("User", lazy="selectin")
\ No newline at end of file
+    user = relationship("User", lazy="raise")
\ No newline at end of file
@@ -0,0 +1,63 @@
+# pagination.py
+# Keyset ("cursor") pagination helpers shared by every list endpoint.
+#
+# WHY NOT OFFSET?
+#   OFFSET n makes Postgres walk and throw away n rows, so deep pages get
+#   slower and slower, and rows shift between pages when new posts arrive.
+#   Instead we remember the (created_at, id) of the last row we served and
+#   ask for rows strictly "older" than it — an index range scan every time.
+#
+# The cursor is opaque to clients: base64 of "<iso created_at>|<id>".
+# `offset` is still accepted as a legacy fallback when no cursor is sent.
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Turn a cursor back into (created_at, id); 400 if it was tampered with."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset(stmt: Select, created_col, id_col, limit: int,
+           cursor: Optional[str] = None, offset: int = 0) -> Select:
+    """
+    Apply newest-first keyset pagination to `stmt`.
+    Fetches limit+1 rows so `page()` can tell whether there is a next page.
+    """
+    stmt = stmt.order_by(created_col.desc(), id_col.desc())
+    if cursor:
+        stmt = stmt.where(tuple_(created_col, id_col) < tuple_(*decode_cursor(cursor)))
+    elif offset:
+        # legacy clients still paging by offset
+        stmt = stmt.offset(offset)
+    return stmt.limit(limit + 1)
+
+
+def page(rows: Sequence, limit: int) -> Tuple[list, Optional[str]]:
+    """Trim the extra row fetched by `keyset()` and build the next cursor."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def page_key(cursor: Optional[str], offset: int) -> str:
+    """Cache-key fragment identifying the requested page."""
+    return f"c:{cursor}" if cursor else f"o:{offset}"
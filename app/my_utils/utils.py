@@ -1,5 +1,6 @@
 import bcrypt
 import asyncio
+import re
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
@@ -35,4 +36,10 @@ async def verifyPassword(plain_password: str, hashed_password: str) -> bool:
 # optional now --cleans up expired otps from the db
 async def cleanUpExpiredOtps(db:AsyncSession):
     await db.execute(delete(models.OTP).where(models.OTP.expires_at<datetime.now()))
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+
+_HASHTAG = re.compile(r"\w+")
+
+# posts.hashtags is free text ("#Travel #food", "travel,food") — normalise it to a tag list
+def parseHashtags(raw: str | None) -> list[str]:
+    return list(dict.fromkeys(_HASHTAG.findall(raw.lower()))) if raw else []
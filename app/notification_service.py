@@ -1,9 +1,13 @@
 import json
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, func
+from sqlalchemy.orm import joinedload
 from app.db import AsyncSessionLocal
-from app.models import Notification, NotificationType
-from app.redis_service import redis_client, delete_cache_pattern
+from app.models import Notification, NotificationType, User
+from app.redis_service import redis_client, delete_cache, bump
+from app.my_utils.pagination import keyset, page
+from app import totals_service
 
 # ── Patchable session factory ──
 # Mirrors exactly what redis_service.py does with redis_client.
@@ -54,12 +58,13 @@ async def create_notification(
             text=text,
         )
         db.add(notif)
+        await totals_service.bump_user_counter(db, owner_id, "notifications_cnt", 1)
         await db.commit()
         await db.refresh(notif)     # ← needed to get the auto-assigned id + created_at
 
         # Invalidate notification caches for the recipient
-        await delete_cache_pattern(f"notifications:{owner_id}:*")
-        await delete_cache_pattern(f"notif:unread:{owner_id}")
+        await bump(f"notifications:{owner_id}")
+        await delete_cache(f"notif:unread:{owner_id}")
 
         # Publish to Redis Pub/Sub
         # Channel name is unique per user: "notifications:42"
@@ -97,16 +102,17 @@ async def get_notifications(
     user_id: int,
     limit: int = 20,
     offset: int = 0,
-) -> list[Notification]:
-    """Return paginated notifications for a user, newest first."""
-    result = await db.execute(
+    cursor: Optional[str] = None,
+) -> tuple[list[Notification], Optional[str]]:
+    """Return a page of notifications for a user (newest first) and the next cursor."""
+    result = await db.execute(keyset(
         select(Notification)
         .where(Notification.owner_id == user_id)
-        .order_by(Notification.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-    )
-    return result.scalars().all()
+        # NotificationResponse embeds the actor's username + profile pic
+        .options(joinedload(Notification.actor).load_only(User.username, User.profile_picture)),
+        Notification.created_at, Notification.id, limit, cursor, offset,
+    ))
+    return page(result.scalars().all(), limit)
 
 
 async def get_unread_count(db: AsyncSession, user_id: int) -> int:
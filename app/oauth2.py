@@ -7,7 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi.security import OAuth2PasswordBearer
 from app.config import settings as cg
-from app import redis_service
+from app import redis_service, principal_cache
+from app.principal_cache import Principal
 
 # a scheme for Extracting the sent JWT token 
 # from the Authorization Header
@@ -52,7 +53,8 @@ async def decodeToken(token: str) -> dict:
     """Decode a JWT token — offloaded to a thread pool to avoid blocking the event loop."""
     return await asyncio.to_thread(_decodeToken_sync, token)
 
-async def verifyAccesstoken(token:str,credentials_exception,dbs:AsyncSession):
+async def _verifyTokenClaims(token:str,credentials_exception) -> dict:
+    """Blacklist check + JWT decode — the slow part a principal cache hit skips."""
     if await redis_service.is_blacklisted(token):
         raise credentials_exception
     try:
@@ -60,32 +62,68 @@ async def verifyAccesstoken(token:str,credentials_exception,dbs:AsyncSession):
         # while creating a token (userId,userName) 
         # offloaded to thread pool via our async decodeToken() wrapper
         decodedToken=await decodeToken(token)
-        # extract those userId and userName from the returned dict
-        id: int=decodedToken.get("userId")
-        username: str=decodedToken.get("userName")
-        # if they aren't found meaning a malformed jwt token is sent
-        # so we raise an exception
-        if id is None or username is None:
-            raise credentials_exception
-        # if not then we query the db using the async select() pattern
-        result=await dbs.execute(select(models.User).where(models.User.id == id))
-        user=result.scalars().first()
-        # If the user was deleted but the token is still valid, treat as unauthorized
-        if user is None:
-            raise credentials_exception
-        return user
     # if the token itself is invalid we raise a JWTError
     except JWTError:
         raise credentials_exception
+    # if userId or userName aren't found meaning a malformed jwt token is sent
+    # so we raise an exception
+    if decodedToken.get("userId") is None or decodedToken.get("userName") is None:
+        raise credentials_exception
+    return decodedToken
+
+async def verifyAccesstoken(token:str,credentials_exception,dbs:AsyncSession):
+    principal=principal_cache.get(token)
+    if principal is None:
+        decodedToken=await _verifyTokenClaims(token,credentials_exception)
+        user_id=decodedToken.get("userId")
+    else:
+        # cache HIT — token already verified, only the full row is needed
+        user_id=principal.id
+    # query the db using the async select() pattern
+    result=await dbs.execute(select(models.User).where(models.User.id == user_id))
+    user=result.scalars().first()
+    # If the user was deleted but the token is still valid, treat as unauthorized
+    if user is None:
+        raise credentials_exception
+    if principal is None:
+        principal_cache.put(token,Principal.from_user(user),decodedToken["expTime"])
+    return user
+
+async def verifyPrincipal(token:str,credentials_exception,dbs:AsyncSession) -> Principal:
+    # cache HIT → zero DB round trips and zero thread hops
+    principal=principal_cache.get(token)
+    if principal is not None:
+        return principal
+    decodedToken=await _verifyTokenClaims(token,credentials_exception)
+    # only the four columns the snapshot needs — no eager relationship graph
+    result=await dbs.execute(
+        select(models.User.id,models.User.username,models.User.nickname,models.User.profile_picture)
+        .where(models.User.id == decodedToken.get("userId"))
+    )
+    row=result.first()
+    if row is None:
+        raise credentials_exception
+    principal=Principal(id=row.id,username=row.username,nickname=row.nickname,profile_picture=row.profile_picture)
+    principal_cache.put(token,principal,decodedToken["expTime"])
+    return principal
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 # Get current user (for protected routes)
 # in the parentheses the Depends(oauth2_scheme) returns the
 # JWT Token which is stored in the token variable below
 # and sent to the verifyAccesstoken() mtd
+# use this one only when the route needs the full User row
+# (e.g. it edits the user or reads bio/email/password/counters)
 async def getCurrentUser(token: str = Depends(oauth2_scheme),dbs:AsyncSession=Depends(db.getDb)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    return await verifyAccesstoken(token,credentials_exception,dbs)
\ No newline at end of file
+    return await verifyAccesstoken(token,_credentials_exception(),dbs)
+
+# Get current principal (id, username, nickname, profile_picture)
+# served from the per-worker principal cache — the default for read routes
+async def getCurrentPrincipal(token: str = Depends(oauth2_scheme),dbs:AsyncSession=Depends(db.getDb)) -> Principal:
+    return await verifyPrincipal(token,_credentials_exception(),dbs)
@@ -0,0 +1,53 @@
+# page_cache.py
+# redis_service.get_or_set() for route pages whose loader needs the database.
+#
+# WHY?
+#   A page served stale (hard_ttl, see redis_service.py) is reloaded in the
+#   background after the response has gone out — by then the request's
+#   session is closed. The loader used for that refresh has to open a
+#   session of its own.
+#
+# HOW:
+#   cached(key, db, load, *args, ttl=..., hard_ttl=...) calls load(db, *args)
+#   on a miss, with the request's session as before, and
+#   load(<own session>, *args) when it refreshes a stale entry. So a page
+#   loader only ever takes the session as its first argument.
+#   Refreshes read from the primary: they run ahead of any user, there is
+#   nobody's read-your-writes window to respect (read_routing.py).
+#   Entries every user reads (profiles, follow lists, a profile's posts,
+#   comment pages) pass shared=True and are loaded from the primary on a
+#   miss as well. The request's session may be a replica that hasn't seen
+#   the write which just invalidated the entry yet; refilled from there,
+#   the writer would be served their own old data for the whole window.
+#
+# WINDOWS IN USE (fresh / served stale until):
+#   notifications pages, unread count    20 s / 120 s
+#   home feed, comment pages             30 s / 300 s
+#   explore, a profile's posts, users    60 s / 600 s
+#   profiles, post detail, follow lists 120 s / 1200 s
+
+from typing import Any, Awaitable, Callable, Iterable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import redis_service
+from app.db import AsyncSessionLocal
+
+# ── Patchable session factory (same pattern as notification_service) ──
+_session_factory = AsyncSessionLocal
+
+PageLoader = Callable[..., Awaitable[tuple[Any, Iterable[str]]]]
+
+
+async def cached(key: str, db: AsyncSession, load: PageLoader, *args: Any,
+                 ttl: int, hard_ttl: Optional[int] = None, shared: bool = False) -> Any:
+    """
+    The cached page at `key`, built by load(db, *args) when there is none.
+    shared=True: the entry isn't per user, load it from the primary too.
+    """
+    async def refresh():
+        async with _session_factory() as own:
+            return await load(own, *args)
+
+    return await redis_service.get_or_set(
+        key, refresh if shared else (lambda: load(db, *args)),
+        ttl=ttl, hard_ttl=hard_ttl, refresh=refresh,
+    )
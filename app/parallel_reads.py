@@ -0,0 +1,89 @@
+# parallel_reads.py
+# Run a request's independent read queries at the same time.
+#
+# WHY?
+#   One AsyncSession is one connection, and a connection runs one query at
+#   a time. A handler that needs "the page + the unread count + the total"
+#   awaits three round trips back to back even though none of them depends
+#   on another. Each of those reads can instead run on its own short-lived
+#   session (= its own pooled connection) and be awaited together, so the
+#   request takes as long as its slowest query instead of the sum.
+#
+# HOW:
+#   results = await gather_reads(db, stmt_a, stmt_b, lambda s: some_service(s, ...))
+#   - a Select is executed and its (already buffered) Result is returned
+#   - a callable gets the fresh session and its return value is returned
+#   The fresh sessions are bound to the same engine as `db`, so a route on
+#   the replica (read_routing.getReadDb) fans out on the replica, and a
+#   sticky user stays on the primary.
+#
+# LIMITS:
+#   A request never holds more than DB_REQUEST_FANOUT of these connections at
+#   once (the rest wait their turn), so one request can't drain the pool —
+#   on top of its own session, so DB_REQUEST_FANOUT + 1 in all. The gate is
+#   per request, not per call: main.py's middleware puts a fresh one in a
+#   ContextVar as each request starts (start_request()), and every
+#   gather_reads() of that request — one after another or side by side —
+#   waits on it. Outside a request (background jobs) the first call makes
+#   one for its task. A gather_reads() nested inside one of the reads runs
+#   in order on that read's session instead of asking for more — it
+#   already holds a slot.
+#   With DB_REQUEST_FANOUT=1 everything simply runs in order on `db` itself.
+#   Only pass reads that don't need `db`'s uncommitted writes — the other
+#   sessions can't see them.
+
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, Union
+from sqlalchemy import Executable
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import _make_sessionmaker
+from app.config import settings
+
+Read = Union[Executable, Callable[[AsyncSession], Awaitable[Any]]]
+
+# the current request's gate, and whether this task already holds one of its slots
+_gate: ContextVar[Optional[asyncio.Semaphore]] = ContextVar("parallel_reads_gate", default=None)
+_in_read: ContextVar[bool] = ContextVar("parallel_reads_in_read", default=False)
+
+
+def start_request() -> None:
+    """Give the request now starting its own DB_REQUEST_FANOUT budget."""
+    _gate.set(asyncio.Semaphore(max(settings.db_request_fanout, 1)))
+
+
+def _request_gate(fanout: int) -> asyncio.Semaphore:
+    gate = _gate.get()
+    if gate is None:
+        gate = asyncio.Semaphore(fanout)
+        _gate.set(gate)
+    return gate
+
+
+async def _run(session: AsyncSession, read: Read):
+    if isinstance(read, Executable):
+        return await session.execute(read)
+    return await read(session)
+
+
+async def gather_reads(db: AsyncSession, *reads: Read, fanout: int | None = None) -> list:
+    """
+    Run independent reads concurrently; results come back in argument order.
+    An explicit `fanout` gives this call a budget of its own instead of the request's.
+    """
+    own_gate = fanout is not None
+    fanout = settings.db_request_fanout if fanout is None else fanout
+    if fanout <= 1 or len(reads) <= 1 or _in_read.get():
+        return [await _run(db, read) for read in reads]
+
+    session_factory = _make_sessionmaker(db.bind)
+    gate = asyncio.Semaphore(fanout) if own_gate else _request_gate(fanout)
+
+    async def one(read: Read):
+        # runs in its own task, so this only marks reads started from here
+        _in_read.set(True)
+        async with gate:
+            async with session_factory() as session:
+                return await _run(session, read)
+
+    return list(await asyncio.gather(*(one(read) for read in reads)))
@@ -0,0 +1,87 @@
+# pool_metrics.py
+# Live gauges for the SQLAlchemy connection pool of THIS worker process.
+#
+# WHY?
+#   "QueuePool limit of size X overflow Y reached" only tells you that a
+#   request waited pool_timeout seconds and gave up. To size the pool you
+#   need to see how many connections are checked out, how far into
+#   overflow we go and how long requests wait to get a connection.
+#
+# HOW:
+#   db.py builds the engines with InstrumentedQueuePool, which times every
+#   checkout (queue wait + connect when the pool grows) into a histogram
+#   kept on the pool itself (primary and replica are counted separately).
+#   snapshot() reads the rest straight off the pool. Every worker has its
+#   own pools, so every worker reports its own numbers (tagged with its pid).
+
+import os
+import time
+from bisect import bisect_left
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# upper bounds in milliseconds; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class WaitHistogram:
+    """Cumulative-style histogram of checkout waits (Prometheus layout)."""
+
+    def __init__(self, buckets=WAIT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total_ms = 0.0
+        self.timeouts = 0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.total_ms += ms
+
+    def snapshot(self) -> dict:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {
+            "buckets_ms": cumulative,
+            "count": running,
+            "sum_ms": round(self.total_ms, 3),
+            "timeouts": self.timeouts,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout took."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.checkout_wait = WaitHistogram()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_wait.timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe((time.perf_counter() - start) * 1000)
+
+
+def snapshot(engine) -> dict:
+    """Current pool gauges + the checkout wait histogram for this worker."""
+    pool = engine.pool
+    gauges = {"pool_class": type(pool).__name__, "pid": os.getpid()}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        gauges.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # negative while the pool is still filling up to `size`
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout_s=pool.timeout(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        gauges["checkout_wait"] = pool.checkout_wait.snapshot()
+    return gauges
@@ -0,0 +1,72 @@
+# prewarm_service.py
+# Fills a user's first home feed and notification pages into the cache
+# right after they show up, so their first real request is a cache hit.
+#
+# WHY?
+#   Those pages are cached for 20-60 s, so the first request after a login
+#   always missed and was the slowest request a user ever saw. Login,
+#   token refresh and the chat socket connect all come a moment before
+#   the app opens the home screen — enough time to build the pages.
+#
+# HOW:
+#   schedule(user_id) starts warm(user_id) as a task and returns at once.
+#   warm() runs the same page builders the routes use (homeFeedPage,
+#   notifications_page) with the routes' default page size, so the cache
+#   keys match exactly. Impressions are recorded by the routes when a page
+#   is actually delivered, never here. The default explore page hides seen
+#   posts and is never cached (routes/feed.py), so there is nothing to warm.
+#
+# LOGIN STORMS:
+#   - at most PREWARM_CONCURRENCY warm-ups per worker touch the database at
+#     once (semaphore); the rest wait their turn
+#   - past PREWARM_MAX_PENDING queued warm-ups new ones are dropped — the
+#     user just gets the old cold miss
+#   - prewarm:<user_id> (SET NX, PREWARM_DEDUPE_TTL s) skips repeats across
+#     workers, e.g. login followed by the socket connect a second later
+
+import asyncio
+from sqlalchemy import select
+from app import models, redis_service
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.principal_cache import Principal
+from app.routes.feed import homeFeedPage
+from app.routes.notifications import notifications_page
+
+# ── Patchable session factory (same pattern as notification_service) ──
+_session_factory = AsyncSessionLocal
+
+_gate = asyncio.Semaphore(settings.prewarm_concurrency)
+# strong references — the event loop only keeps weak ones to running tasks
+_pending: set[asyncio.Task] = set()
+
+
+def schedule(user_id: int) -> None:
+    """Fire-and-forget warm-up; never blocks or fails the caller."""
+    if len(_pending) >= settings.prewarm_max_pending:
+        return
+    task = asyncio.create_task(warm(user_id))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def warm(user_id: int) -> bool:
+    """Build and cache the user's first pages; False when skipped."""
+    try:
+        if not await redis_service.try_lock(f"prewarm:{user_id}", settings.prewarm_dedupe_ttl):
+            return False
+        async with _gate:
+            async with _session_factory() as db:
+                user = (await db.execute(
+                    select(models.User.id, models.User.username, models.User.nickname, models.User.profile_picture)
+                    .where(models.User.id == user_id)
+                )).first()
+                if user is None:
+                    return False
+                principal = Principal.from_user(user)
+                await homeFeedPage(db, principal)
+                await notifications_page(db, principal)
+        return True
+    except Exception:
+        # Redis/DB trouble — the routes build the pages on demand as before
+        return False
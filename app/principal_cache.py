@@ -0,0 +1,142 @@
+# principal_cache.py
+# A per-worker cache of "who does this access token belong to?"
+#
+# WHY?
+#   Every authenticated request used to pay for a Redis blacklist check,
+#   a JWT decode on the thread pool and a SELECT on the users table before
+#   the route even started. The answer only changes when the user logs out,
+#   changes their password, edits their profile or deletes the account —
+#   so we remember it for a short while, keyed by a hash of the token.
+#
+# HOW INVALIDATION WORKS:
+#   Each worker process has its own copy of the cache. When one of the
+#   events above happens, the worker handling it drops its local entries
+#   AND publishes a message on the "principal:invalidate" Redis channel.
+#   main.py runs a listener in every worker that drops the same entries.
+#   The TTL is kept short so a missed pub/sub message can't live for long.
+#   _tokens_by_user (user → cached token hashes) is what lets one message
+#   drop every token of a user. Tokens leave the cache silently when they
+#   expire or the LRU evicts them, so the index is swept whenever it holds
+#   twice as many users as the cache can hold tokens — at most once per
+#   PRINCIPAL_CACHE_SIZE new users, and it never grows past that bound.
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+from app import redis_service
+from app.config import settings
+from app.my_utils.ttl_cache import TTLCache
+
+INVALIDATION_CHANNEL = "principal:invalidate"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Slim, immutable snapshot of the authenticated user."""
+    id: int
+    username: str
+    nickname: Optional[str] = None
+    profile_picture: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            nickname=user.nickname,
+            profile_picture=user.profile_picture,
+        )
+
+
+# token hash → (Principal, token expiry as a unix timestamp)
+_cache = TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl)
+# user id → token hashes cached for that user (so we can drop them all at once)
+_tokens_by_user: dict[int, set[str]] = {}
+
+
+def token_hash(token: str) -> str:
+    # never keep raw bearer tokens around in memory longer than needed
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get(token: str) -> Optional[Principal]:
+    """Return the cached principal for this token, or None on a miss."""
+    entry = _cache.get(token_hash(token))
+    if entry is None:
+        return None
+    principal, token_exp = entry
+    if token_exp <= time.time():
+        # the JWT itself has expired — never serve it from the cache
+        _drop_hash(token_hash(token))
+        return None
+    return principal
+
+
+def put(token: str, principal: Principal, token_exp: int) -> None:
+    """Cache a freshly verified principal until the cache TTL or token expiry."""
+    ttl = min(settings.principal_cache_ttl, token_exp - time.time())
+    if ttl <= 0:
+        return
+    h = token_hash(token)
+    _cache.set(h, (principal, token_exp), ttl=ttl)
+    # prune hashes that the LRU already evicted so this index stays bounded
+    hashes = {x for x in _tokens_by_user.get(principal.id, ()) if x in _cache}
+    hashes.add(h)
+    _tokens_by_user[principal.id] = hashes
+    if len(_tokens_by_user) > 2 * _cache.maxsize:
+        _sweep_index()
+
+
+def _sweep_index() -> None:
+    """Forget the users none of whose tokens are cached any more."""
+    for user_id in list(_tokens_by_user):
+        hashes = {h for h in _tokens_by_user[user_id] if h in _cache}
+        if hashes:
+            _tokens_by_user[user_id] = hashes
+        else:
+            del _tokens_by_user[user_id]
+
+
+def _drop_hash(h: str) -> None:
+    entry = _cache.pop(h)
+    if entry is not None:
+        hashes = _tokens_by_user.get(entry[0].id)
+        if hashes is not None:
+            hashes.discard(h)
+            if not hashes:
+                del _tokens_by_user[entry[0].id]
+
+
+def _drop_user(user_id: int) -> None:
+    for h in _tokens_by_user.pop(user_id, ()):
+        _cache.pop(h)
+
+
+def apply_invalidation(payload: dict) -> None:
+    """Drop the entries named in an invalidation message (called by the listener)."""
+    if payload.get("user_id") is not None:
+        _drop_user(int(payload["user_id"]))
+    if payload.get("token_hash"):
+        _drop_hash(payload["token_hash"])
+
+
+async def _publish(payload: dict) -> None:
+    # drop locally first so this worker is correct even if Redis is down
+    apply_invalidation(payload)
+    try:
+        await redis_service.redis_client.publish(INVALIDATION_CHANNEL, json.dumps(payload))
+    except Exception:
+        # other workers fall back to the short TTL
+        pass
+
+
+async def invalidate_token(token: str) -> None:
+    """Forget a single token everywhere (logout)."""
+    await _publish({"token_hash": token_hash(token)})
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Forget every cached token of a user (password change, profile edit, account deletion)."""
+    await _publish({"user_id": user_id})
@@ -1,5 +1,5 @@
 from fastapi import Depends, HTTPException, Request, status
-from app import models, oauth2
+from app import oauth2
 from app import redis_service as _redis_svc
 from app.config import settings
 
@@ -35,7 +35,7 @@ def ip_rate_limit(endpoint_id: str, max_calls: int, window: int):
 
 
 def user_rate_limit(endpoint_id: str, max_calls: int, window: int):
-    async def dependency(current_user: models.User = Depends(oauth2.getCurrentUser)) -> None:
+    async def dependency(current_user: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)) -> None:
         key = f"rl:{endpoint_id}:user:{current_user.id}"
         await _check(key, max_calls, window)
 
@@ -0,0 +1,66 @@
+# read_routing.py
+# Sends read-only routes to the replica — without showing users stale data.
+#
+# WHY?
+#   Feeds, profiles, follower lists, search and chat history are the bulk of
+#   our traffic, and they were all competing with writes on the primary.
+#   Routes that only read declare `db = Depends(getReadDb)` instead of getDb.
+#
+# THE LAG GUARD (read-your-writes):
+#   A streaming replica is usually a few ms behind, but can fall seconds
+#   behind under load. If you just created a post and your own profile
+#   came from a lagging replica the post would seem to have vanished. So
+#   every successful write marks the user "sticky" in Redis
+#   (rw:sticky:<user_id>, TTL = READ_YOUR_WRITES_WINDOW seconds) and while
+#   that key exists their reads stay on the primary. Other users' reads are
+#   never affected. main.py's middleware marks HTTP writes, chat.py marks
+#   websocket writes.
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import db, oauth2, redis_service
+from app.config import settings
+
+
+def enabled() -> bool:
+    return db.ReplicaSessionLocal is not None
+
+
+def sticky_key(user_id: int) -> str:
+    return f"rw:sticky:{user_id}"
+
+
+async def mark_write(user_id: int) -> None:
+    """Pin this user's reads to the primary for the next few seconds."""
+    if not enabled():
+        return
+    try:
+        await redis_service.redis_client.set(sticky_key(user_id), 1, ex=settings.read_your_writes_window)
+    except Exception:
+        # Redis down → worst case the user briefly reads slightly stale data
+        pass
+
+
+async def _is_sticky(user_id: int) -> bool:
+    try:
+        return bool(await redis_service.redis_client.exists(sticky_key(user_id)))
+    except Exception:
+        # can't tell — be safe and read from the primary
+        return True
+
+
+async def getReadDb(
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),
+    primary: AsyncSession = Depends(db.getDb),
+):
+    """
+    Session for read-only routes: the replica, unless there is none or the
+    user wrote something in the last few seconds.
+    `primary` costs nothing when unused — a session only takes a connection
+    on its first query.
+    """
+    if not enabled() or await _is_sticky(currentUser.id):
+        yield primary
+        return
+    async with db.ReplicaSessionLocal() as replica:
+        yield replica
@@ -14,12 +14,95 @@
 #   3. If NO → query the DB as usual, then STORE the result in Redis
 #      with an expiration time (TTL). Next request gets the cached copy.
 #   4. When data changes (create / update / delete), we INVALIDATE
-#      (delete) the relevant cache keys so stale data is never served.
+#      the relevant cache keys so stale data is never served.
+#
+# INVALIDATING MANY KEYS AT ONCE (generations):
+#   A page cache has many keys per resource (one per user, cursor, limit…).
+#   Deleting them by pattern means a SCAN over the whole keyspace on every
+#   vote or comment, slower the more we cache. Instead each group of keys
+#   (a "namespace") has a counter gen:<namespace>, and versioned_key()
+#   appends the current counters to the cache key:
+#       feed:home:42:o:0:10:1  →  feed:home:42:o:0:10:1@7.3
+#   bump("feed") is one INCR; afterwards every reader builds a key that
+#   doesn't exist yet (a miss), and the old keys just run out their TTL.
+#   Generations are for "which items are on the page" changes. Namespaces in use:
+#       feed                every home + explore page (a post created/deleted)
+#       feed:home:<uid>     one user's home pages (follow / unfollow)
+#       user_posts:<uid>    a profile's post list
+#       comments:<pid>      one post's comment pages
+#       notifications:<uid> one user's notification pages
+#   delete_cache_pattern() is still here for scripts and tests — request
+#   paths use bump() and invalidate().
+#
+# INVALIDATING WHAT EMBEDS AN ENTITY (tags):
+#   A like changes post 42 wherever it is shown — its detail page, but also
+#   every cached feed, explore or profile page it sits on. set_cache(...,
+#   tags=["post:42", "user:7"]) records the key under tag:post:42 and
+#   tag:user:7; invalidate("post:42") deletes exactly those keys, pipelined.
+#   Tags in use:
+#       post:<pid>   pages showing the post (likes, comments, edits)
+#       user:<uid>   pages showing the user's name/avatar (profile edits)
+#   A tag set is a ZSET of key → the key's expiry time. Every write drops
+#   the members that already expired and pushes the set's own expiry out
+#   to its newest member's, so a set only ever holds live keys and
+#   disappears with the last of them.
+#
+# L1 — A PER-WORKER COPY IN FRONT OF REDIS:
+#   get_cache() first looks in a small in-process LRU (TTLCache, holding the
+#   already-decoded object), so the hottest keys — popular profiles, first
+#   explore pages — cost neither a round trip nor a json.loads. Entries live
+#   at most L1_CACHE_TTL seconds (never longer than the Redis key), and
+#   L1_CACHE_SIZE=0 turns the layer off.
+#   delete_cache(), invalidate() and delete_cache_pattern() drop the entries
+#   in this worker and PUBLISH the keys/pattern on "cache:invalidate";
+#   listen_invalidations() (started in main.py's lifespan) drops them in
+#   every other worker. Generation bumps need no message — a new version is
+#   a new key. A key overwritten in place by another worker can be served
+#   stale for up to L1_CACHE_TTL; that short TTL is also the fallback for a
+#   missed message.
+#   Values from get_cache() may be shared with other requests: copy before
+#   changing them. cache_stats() reports L1/L2 hit ratios (GET /health/cache).
+#
+# ONE RECOMPUTE PER MISS (get_or_set):
+#   When a hot key expires, every request in that moment misses and runs
+#   the same queries. get_or_set(key, loader, ttl) is the get → load → set
+#   pattern with the stampede taken out:
+#     - in a worker, the first miss runs loader(); concurrent misses of the
+#       same key await that one in-flight future
+#     - across workers, that first miss also takes lock:<key> (SET NX of a
+#       random token, FLIGHT_LOCK_TTL s — released by compare-and-delete, so
+#       a load that outlives the lock never frees another worker's); a
+#       worker that doesn't get it polls the cache
+#       for up to FLIGHT_WAIT s for the winner's value and only then loads
+#       it itself
+#   loader() returns (value, tags) — tags as for set_cache.
+#
+# SERVING STALE WHILE REFRESHING (hard_ttl):
+#   Even with one recompute per miss, the request that lands on an expired
+#   page waits for the whole recompute — a latency spike every TTL. So an
+#   entry can have two TTLs: set_cache(key, value, ttl=30, hard_ttl=300)
+#   keeps the key in Redis for 300 s but calls it fresh for only 30.
+#     - fresh          → served as usual
+#     - past ttl       → get_cache() still returns it; get_or_set() returns
+#                        it too and refreshes it in the background, once
+#                        per key (a task per worker + lock:<key> across them)
+#     - past hard_ttl  → gone, an ordinary miss
+#   Routes pick the windows per page (see page_cache.py, which gives the
+#   refresh a database session of its own — the request's is closed by
+#   then). Invalidation is unaffected: invalidate(), delete_cache() and
+#   bump() remove the entry outright, so stale means "expired", never
+#   "known to be wrong". L1 copies never outlive the fresh window.
+#   In Redis such a value is stored as "~<fresh-until epoch>~<json>".
 
 import redis.asyncio as aioredis
+import asyncio
 import json
-from typing import Any, Optional
+import time
+import uuid
+from fnmatch import fnmatchcase
+from typing import Any, Awaitable, Callable, Iterable, Optional
 from app.config import settings
+from app.my_utils.ttl_cache import TTLCache
 
 #  1. CREATE THE ASYNC REDIS CLIENT 
 # This is similar to how db.py creates the SQLAlchemy engine.
@@ -37,6 +120,11 @@ redis_client = aioredis.Redis(
     decode_responses=True       # ← very important for convenience
 )
 
+# the per-worker L1 (see the header) and its counters
+INVALIDATION_CHANNEL = "cache:invalidate"
+_l1 = TTLCache(maxsize=settings.l1_cache_size, ttl=settings.l1_cache_ttl)
+_stats = {"l1_hits": 0, "l2_hits": 0, "stale_hits": 0, "misses": 0}
+
 # 2. HELPER FUNCTIONS
 
 async def ping_redis() -> bool:
@@ -52,7 +140,7 @@ async def ping_redis() -> bool:
     except Exception:
         return False
 
-async def set_cache(key: str, value: Any, ttl: int = 60) -> None:
+async def set_cache(key: str, value: Any, ttl: int = 60, tags: Iterable[str] = (), hard_ttl: Optional[int] = None) -> None:
     """
     Store something in Redis.
     Parameters
@@ -71,10 +159,35 @@ async def set_cache(key: str, value: Any, ttl: int = 60) -> None:
         "Time To Live" — how long the key stays in Redis.
         After this many seconds Redis auto-deletes it.
         This ensures the cache doesn't serve outdated data forever.
+
+    tags : entities the value shows, e.g. ["post:108", "user:42"] —
+        invalidate("post:108") deletes this key.
+
+    hard_ttl : seconds the key stays in Redis when that is longer than
+        `ttl` — past `ttl` it is served stale (see the header).
     """
     try:
         json_value = json.dumps(value)
-        await redis_client.setex(key,ttl,json_value)
+        stored, expires = json_value, ttl
+        now = time.time()
+        if hard_ttl and hard_ttl > ttl:
+            stored, expires = f"{_STALE_MARK}{now + ttl:.3f}{_STALE_MARK}{json_value}", hard_ttl
+        tags = set(tags)
+        if not tags:
+            await redis_client.setex(key,expires,stored)
+            _fill_l1(key, json_value, ttl)
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key,expires,stored)
+        for tag in tags:
+            tag_key = _tag_key(tag)
+            pipe.zadd(tag_key, {key: now + expires})
+            pipe.zremrangebyscore(tag_key, "-inf", now)
+            # NX gives a new set its expiry, GT only ever extends it
+            pipe.expire(tag_key, expires, nx=True)
+            pipe.expire(tag_key, expires, gt=True)
+        await pipe.execute()
+        _fill_l1(key, json_value, ttl)
     except Exception:
         # If Redis is down, silently skip caching — the route still works,
         # it just won't have the speed benefit. Never let cache failures
@@ -87,17 +200,44 @@ async def get_cache(key:str) -> Optional[Any]:
     Returns
     -------
     The original Python object (dict/list/etc.) if the key exists,
-    or None if the key has expired or was never set.
+    or None if the key has expired or was never set. A value past its
+    fresh window (set_cache's hard_ttl) is still returned.
     """
+    value, _ = await _lookup(key)
+    return value
+
+async def _lookup(key: str) -> tuple[Optional[Any], bool]:
+    """get_cache(), plus whether the value is past its fresh window."""
+    value = _l1.get(key)
+    if value is not None:
+        _stats["l1_hits"] += 1           # L1 HIT — no round trip at all
+        return value, False
     try:
         cached = await redis_client.get(key)   # → JSON string or None
         if cached is None:
-            return None                  # cache MISS
-        return json.loads(cached)        # cache HIT
+            _stats["misses"] += 1
+            return None, False           # cache MISS
+        value, fresh_for = _decode(cached)     # cache HIT
+        if fresh_for <= 0:
+            _stats["stale_hits"] += 1
+            return value, True
+        _stats["l2_hits"] += 1
+        _l1.set(key, value, ttl=min(fresh_for, _l1.ttl))
+        return value, False
     except Exception:
         # If Redis is unreachable, behave as a cache miss so the route
         # falls through to the database and still returns a response.
-        return None
+        _stats["misses"] += 1
+        return None, False
+
+_STALE_MARK = "~"
+
+def _decode(cached: str) -> tuple[Any, float]:
+    """A stored value and the seconds it stays fresh (inf without a hard_ttl)."""
+    if not cached.startswith(_STALE_MARK):
+        return json.loads(cached), float("inf")
+    _, fresh_until, json_value = cached.split(_STALE_MARK, 2)
+    return json.loads(json_value), float(fresh_until) - time.time()
 
 async def delete_cache(key: str) -> None:
     """
@@ -106,7 +246,29 @@ async def delete_cache(key: str) -> None:
     updates their profile, so the next request fetches fresh data.
     """
     try:
-        await redis_client.delete(key)
+        await _delete_everywhere([key])
+    except Exception:
+        pass
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+async def invalidate(*tags: str) -> None:
+    """
+    Delete every cached key stored with one of these tags (see set_cache).
+    Two round trips, however many keys there are — no SCAN.
+    """
+    try:
+        # read and drop the tag sets atomically: a key cached a moment later
+        # lands in a fresh set instead of being forgotten
+        pipe = redis_client.pipeline(transaction=True)
+        for tag in tags:
+            pipe.zrange(_tag_key(tag), 0, -1)
+            pipe.delete(_tag_key(tag))
+        results = await pipe.execute()
+        keys = {key for members in results[::2] for key in members}
+        if keys:
+            await _delete_everywhere(list(keys))
     except Exception:
         pass
 
@@ -123,6 +285,7 @@ async def delete_cache_pattern(pattern: str) -> None:
     on large datasets. SCAN iterates in small batches.
     """
     try:
+        await _publish_invalidation({"pattern": pattern})
         cursor = 0
         while True:
             cursor, keys = await redis_client.scan(cursor=cursor, match=pattern, count=100)
@@ -133,6 +296,211 @@ async def delete_cache_pattern(pattern: str) -> None:
     except Exception:
         pass
 
+# ── L1 helpers ──
+
+def _fill_l1(key: str, json_value: str, ttl: int) -> None:
+    if _l1.maxsize > 0:
+        # a decoded copy — the caller may go on changing `value`
+        _l1.set(key, json.loads(json_value), ttl=min(ttl, _l1.ttl))
+
+def apply_invalidation(payload: dict) -> None:
+    """Drop the L1 entries named in an invalidation message."""
+    for key in payload.get("keys", ()):
+        _l1.pop(key)
+    if payload.get("pattern"):
+        for key in _l1.keys():
+            if fnmatchcase(key, payload["pattern"]):
+                _l1.pop(key)
+
+async def _publish_invalidation(payload: dict) -> None:
+    # this worker first, so it's right even if the publish fails
+    apply_invalidation(payload)
+    if _l1.maxsize > 0:
+        await redis_client.publish(INVALIDATION_CHANNEL, json.dumps(payload))
+
+async def _delete_everywhere(keys: list[str]) -> None:
+    """DEL in Redis + drop from every worker's L1, in one round trip."""
+    apply_invalidation({"keys": keys})
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(*keys)
+    if _l1.maxsize > 0:
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps({"keys": keys}))
+    await pipe.execute()
+
+async def listen_invalidations() -> None:
+    """Apply other workers' invalidations to this worker's L1 (main.py's lifespan)."""
+    ps = redis_client.pubsub()
+    await ps.subscribe(INVALIDATION_CHANNEL)
+    try:
+        async for message in ps.listen():
+            if message["type"] != "message":
+                continue
+            try:
+                apply_invalidation(json.loads(message["data"]))
+            except Exception:
+                # malformed payload — ignore and keep listening
+                pass
+    except asyncio.CancelledError:
+        await ps.unsubscribe(INVALIDATION_CHANNEL)
+        raise
+
+def cache_stats() -> dict:
+    """This worker's lookups so far: where they were answered, and the hit ratios."""
+    lookups = sum(_stats.values())
+    reached_redis = lookups - _stats["l1_hits"]
+    return {
+        **_stats,
+        "lookups": lookups,
+        "l1_entries": len(_l1),
+        "l1_hit_ratio": _stats["l1_hits"] / lookups if lookups else 0.0,
+        # of the lookups L1 couldn't answer, how many Redis could (fresh or stale)
+        "l2_hit_ratio": (_stats["l2_hits"] + _stats["stale_hits"]) / reached_redis if reached_redis else 0.0,
+    }
+
+# counters outlive every cache TTL (hard ones included, max 1200 s) by far, so a counter that
+# expired and restarted at 0 can't meet a live key from its first run
+GEN_TTL = 86400
+
+def _gen_key(namespace: str) -> str:
+    return f"gen:{namespace}"
+
+async def versioned_key(key: str, *namespaces: str) -> str:
+    """
+    `key` with the current generation of each namespace appended — the
+    key to get_cache/set_cache for data that bump(namespace) invalidates.
+    """
+    try:
+        gens = await redis_client.mget([_gen_key(n) for n in namespaces])
+    except Exception:
+        # Redis is down — get_cache/set_cache will miss/skip anyway
+        gens = [None] * len(namespaces)
+    return f"{key}@" + ".".join(g or "0" for g in gens)
+
+async def bump(*namespaces: str) -> None:
+    """
+    Invalidate everything cached under these namespaces: one INCR each,
+    no matter how many keys they hold.
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.incr(_gen_key(namespace))
+            pipe.expire(_gen_key(namespace), GEN_TTL)
+        await pipe.execute()
+    except Exception:
+        pass
+
+# ── Single-flight get-or-load ──
+
+FLIGHT_LOCK_TTL = 5
+FLIGHT_WAIT = 1.0
+_FLIGHT_POLL = 0.05
+# key → the future its in-flight load resolves (this worker only)
+_inflight: dict[str, asyncio.Future] = {}
+_FAILED = object()
+# key → its background refresh (stale-while-revalidate), one per key per worker
+_refreshing: dict[str, asyncio.Task] = {}
+
+Loader = Callable[[], Awaitable[tuple[Any, Iterable[str]]]]
+
+# DEL the lock only while it still holds our token
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+async def _take_flight_lock(key: str) -> Optional[str]:
+    """lock:<key> for this load — its token, or None when another worker holds it."""
+    token = uuid.uuid4().hex
+    if await redis_client.set(f"lock:{key}", token, nx=True, ex=FLIGHT_LOCK_TTL):
+        return token
+    return None
+
+async def _release_flight_lock(key: str, token: str) -> None:
+    try:
+        await redis_client.eval(_RELEASE_LOCK, 1, f"lock:{key}", token)
+    except Exception:
+        # it expires on its own
+        pass
+
+async def _load(key: str, loader: Loader, ttl: int, hard_ttl: Optional[int]) -> Any:
+    value, tags = await loader()
+    await set_cache(key, value, ttl=ttl, tags=tags, hard_ttl=hard_ttl)
+    return value
+
+async def _load_once(key: str, loader: Loader, ttl: int, hard_ttl: Optional[int]) -> Any:
+    try:
+        token = await _take_flight_lock(key)
+    except Exception:
+        token = ""                       # Redis down — nothing to coordinate with
+    if token is None:
+        # another worker is loading it — its value usually lands within a few polls
+        for _ in range(int(FLIGHT_WAIT / _FLIGHT_POLL)):
+            await asyncio.sleep(_FLIGHT_POLL)
+            value = await get_cache(key)
+            if value is not None:
+                return value
+        return await _load(key, loader, ttl, hard_ttl)
+    try:
+        return await _load(key, loader, ttl, hard_ttl)
+    finally:
+        if token:
+            await _release_flight_lock(key, token)
+
+async def _refresh(key: str, loader: Loader, ttl: int, hard_ttl: Optional[int]) -> None:
+    try:
+        token = await _take_flight_lock(key)
+        if token is None:
+            return                       # another worker is refreshing it
+        try:
+            await _load(key, loader, ttl, hard_ttl)
+        finally:
+            await _release_flight_lock(key, token)
+    except Exception:
+        # the stale value stays until its hard TTL; the next stale read retries
+        pass
+
+def _schedule_refresh(key: str, loader: Loader, ttl: int, hard_ttl: Optional[int]) -> None:
+    if key in _refreshing:
+        return
+    task = asyncio.create_task(_refresh(key, loader, ttl, hard_ttl))
+    _refreshing[key] = task
+    task.add_done_callback(lambda _: _refreshing.pop(key, None))
+
+async def get_or_set(key: str, loader: Loader, ttl: int = 60, hard_ttl: Optional[int] = None,
+                     refresh: Optional[Loader] = None) -> Any:
+    """
+    The cached value of `key`, or loader()'s — run once per miss however
+    many requests miss together (see the header).
+
+    With a hard_ttl a value past `ttl` is returned as is and reloaded in
+    the background by `refresh` (default: loader — which then must not
+    depend on the request, e.g. its db session; see page_cache.py).
+    """
+    value, stale = await _lookup(key)
+    if value is not None:
+        if stale:
+            _schedule_refresh(key, refresh or loader, ttl, hard_ttl)
+        return value
+    flight = _inflight.get(key)
+    if flight is not None:
+        value = await asyncio.shield(flight)
+        if value is not _FAILED:
+            return value
+        # the leader's load failed; try ours (its error went to its own caller)
+        return await _load(key, loader, ttl, hard_ttl)
+    flight = asyncio.get_running_loop().create_future()
+    _inflight[key] = flight
+    value = _FAILED
+    try:
+        value = await _load_once(key, loader, ttl, hard_ttl)
+        return value
+    finally:
+        del _inflight[key]
+        flight.set_result(value)
+
 #  3. STARTUP CHECK 
 
 async def check_redis_connection() -> bool:
@@ -167,3 +535,11 @@ async def is_blacklisted(token: str) -> bool:
         # If redis is down, we'll allow the token.
         # This is a security trade-off. For higher security, you might want to return True.
         return False
+
+async def try_lock(name: str, ttl: int) -> bool:
+    """
+    SET NX EX — True if this worker got the lock. Used by background jobs
+    that every worker runs but only one should do each pass; the lock just
+    expires, so there is nothing to release.
+    """
+    return bool(await redis_client.set(name, 1, nx=True, ex=max(ttl, 1)))
@@ -0,0 +1,266 @@
+# related_posts.py
+# "Related posts" from hashtag overlap, precomputed so the read is one GET.
+#
+# WHY?
+#   posts.hashtags is free text and the only way to query it is
+#   ILIKE '%tag%' — a full scan of posts. Finding posts related to one post
+#   that way would be a scan per tag per page view. So the lists are built
+#   ahead of time and GET /posts/{id}/related just reads related:<id>.
+#
+# THE INDEX (rebuild(), a job in main.py's lifespan, every RELATED_REFRESH_INTERVAL s):
+#   The newest RELATED_MAX_POSTS tagged posts become a sparse post × tag
+#   incidence matrix in COO form (two int arrays). From it, with numpy:
+#     - postings: for every tag the post rows carrying it, newest first,
+#       at most RELATED_POSTINGS_LEN of them (a CSC view of the matrix)
+#     - idf[t] = log(1 + posts / posts tagged t) — rare tags say more
+#     - tag co-occurrence Aᵀ·A, kept as P(u | t) for the top COOC_TOP
+#       partners u of each tag (#sunset → #beach)
+#   A post's related score for another post q is
+#       Σ idf[t]                 over tags the two share
+#     + Σ COOC_WEIGHT·P(u|t)·idf[u]  over q's tags u that co-occur with p's tags t
+#   computed for all candidates at once: concatenate the postings of the
+#   weighted tags, np.unique + np.bincount sums the weights per post, and
+#   argpartition picks the RELATED_TOP_K best. Each post costs
+#   O(its candidates), not O(all posts).
+#
+# STORED (Redis):
+#   related:<post_id>     JSON list of post ids — what the route reads
+#   related:tag:<tag>     ZSET post id → created_at µs, the postings
+#   related:stats         HASH tag → idf, plus "-" → number of posts indexed
+#   related:cooc:<tag>    HASH partner tag → P(partner | tag)
+#
+# INCREMENTAL:
+#   A post created or re-tagged between rebuilds gets index_post() as a
+#   BackgroundTask: the same scoring run over the stored postings/idf/cooc,
+#   then the post joins its tags' postings. Older posts' lists pick it up at
+#   the next rebuild.
+
+import asyncio
+import json
+from collections import defaultdict
+from typing import Optional
+import numpy as np
+from sqlalchemy import select
+from app import models, redis_service
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.my_utils.utils import parseHashtags
+from app.timeline_service import score as time_score
+
+# ── Patchable session factory (same pattern as notification_service) ──
+_session_factory = AsyncSessionLocal
+
+COOC_TOP = 5
+COOC_WEIGHT = 0.5
+STATS_KEY = "related:stats"
+MARKER = "-"
+_JOB_LOCK = "related:lock:rebuild"
+_WRITE_CHUNK = 1000
+
+
+def related_key(post_id: int) -> str:
+    return f"related:{post_id}"
+
+
+def postings_key(tag: str) -> str:
+    return f"related:tag:{tag}"
+
+
+def cooc_key(tag: str) -> str:
+    return f"related:cooc:{tag}"
+
+
+# ── Scoring (shared by the batch job and index_post) ──
+
+def rank(postings: list[np.ndarray], weights: list[float], exclude: int, k: int) -> list[int]:
+    """
+    The k best candidates, where a candidate's score is the sum of the
+    weights of every posting list it appears in. `postings` hold ids (or
+    row numbers) — whatever they hold comes back.
+    """
+    if not postings:
+        return []
+    candidates = np.concatenate(postings)
+    per_candidate = np.concatenate([np.full(len(p), w) for p, w in zip(postings, weights)])
+    keep = candidates != exclude
+    candidates, per_candidate = candidates[keep], per_candidate[keep]
+    if not len(candidates):
+        return []
+    unique, first, inverse = np.unique(candidates, return_index=True, return_inverse=True)
+    scores = np.bincount(inverse, weights=per_candidate)
+    if len(unique) > k:
+        best = np.argpartition(-scores, k)[:k]
+    else:
+        best = np.arange(len(unique))
+    # highest score first; ties → whichever a posting list had first (postings are newest first)
+    best = best[np.lexsort((first[best], -scores[best]))]
+    return unique[best].tolist()
+
+
+def _query(tags: list[str], idf: dict, cooc: dict, unknown_idf: float) -> dict[str, float]:
+    """Tag → weight for one post: its own tags by idf, co-occurring ones scaled down."""
+    weights = {t: idf.get(t, unknown_idf) for t in tags}
+    for t in tags:
+        for partner, p in cooc.get(t, {}).items():
+            if partner not in tags:
+                weights[partner] = weights.get(partner, 0.0) + COOC_WEIGHT * p * idf.get(partner, unknown_idf)
+    return weights
+
+
+def build(rows) -> dict:
+    """
+    The whole index from (id, hashtags) rows, newest first: related lists,
+    postings (as post ids), idf, co-occurrence and the number of posts.
+    """
+    post_ids = np.array([r.id for r in rows], dtype=np.int64)
+    post_tags = [parseHashtags(r.hashtags) for r in rows]
+    vocab = {t: i for i, t in enumerate(dict.fromkeys(t for tags in post_tags for t in tags))}
+    tag_names = list(vocab)
+    n_posts, n_tags = len(rows), len(vocab)
+
+    # COO incidence matrix: one (row, col) per tag of every post
+    row_idx = np.array([r for r, tags in enumerate(post_tags) for _ in tags], dtype=np.int64)
+    col_idx = np.array([vocab[t] for tags in post_tags for t in tags], dtype=np.int64)
+    df = np.bincount(col_idx, minlength=n_tags)
+    idf = np.log1p(n_posts / np.maximum(df, 1))
+
+    # CSC view → postings; rows are newest first, so a stable sort keeps them that way
+    order = np.argsort(col_idx, kind="stable")
+    bounds = np.searchsorted(col_idx[order], np.arange(n_tags + 1))
+    postings = [row_idx[order][bounds[t]:bounds[t + 1]][:settings.related_postings_len] for t in range(n_tags)]
+
+    # Aᵀ·A off the diagonal: count every ordered pair of tags on one post
+    pairs = [(vocab[a], vocab[b]) for tags in post_tags for a in tags for b in tags if a != b]
+    cooc: dict[str, dict[str, float]] = defaultdict(dict)
+    if pairs:
+        codes, counts = np.unique(np.array([a * n_tags + b for a, b in pairs], dtype=np.int64), return_counts=True)
+        firsts, seconds = np.divmod(codes, n_tags)
+        conditional = counts / df[firsts]
+        for t in np.unique(firsts):
+            mine = np.flatnonzero(firsts == t)
+            top = mine[np.argsort(-conditional[mine], kind="stable")[:COOC_TOP]]
+            cooc[tag_names[t]] = {tag_names[seconds[i]]: float(conditional[i]) for i in top}
+
+    idf_by_tag = {t: float(idf[i]) for t, i in vocab.items()}
+    related = {}
+    for row, tags in enumerate(post_tags):
+        query = _query(tags, idf_by_tag, cooc, float(np.log1p(n_posts)))
+        hits = rank([postings[vocab[t]] for t in query], list(query.values()), row, settings.related_top_k)
+        related[int(post_ids[row])] = post_ids[hits].tolist()
+    return {"related": related, "postings": {t: post_ids[postings[i]] for t, i in vocab.items()},
+            "idf": idf_by_tag, "cooc": dict(cooc), "n_posts": n_posts}
+
+
+# ── Job ──
+
+async def rebuild() -> int:
+    """Recompute every related list from Postgres; returns posts indexed."""
+    async with _session_factory() as db:
+        rows = (await db.execute(
+            select(models.Post.id, models.Post.hashtags, models.Post.created_at)
+            .where(models.Post.hashtags.isnot(None), models.Post.hashtags != "")
+            .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+            .limit(settings.related_max_posts)
+        )).all()
+    # numpy work is CPU-bound — keep the event loop free
+    index = await asyncio.to_thread(build, rows)
+    created = {r.id: time_score(r.created_at) for r in rows}
+    ttl = 2 * settings.related_refresh_interval
+
+    client = redis_service.redis_client
+    commands = []
+    for post_id, ids in index["related"].items():
+        commands.append(("set", related_key(post_id), json.dumps(ids)))
+    for tag, ids in index["postings"].items():
+        commands.append(("postings", tag, {str(i): created[int(i)] for i in ids}))
+    for tag, partners in index["cooc"].items():
+        commands.append(("cooc", tag, partners))
+    for start in range(0, len(commands), _WRITE_CHUNK):
+        pipe = client.pipeline(transaction=False)
+        for kind, key, value in commands[start:start + _WRITE_CHUNK]:
+            if kind == "set":
+                pipe.set(key, value, ex=ttl)
+            elif kind == "postings":
+                pipe.delete(postings_key(key))
+                pipe.zadd(postings_key(key), value)
+                pipe.expire(postings_key(key), ttl)
+            else:
+                pipe.delete(cooc_key(key))
+                pipe.hset(cooc_key(key), mapping=value)
+                pipe.expire(cooc_key(key), ttl)
+        await pipe.execute()
+    pipe = client.pipeline(transaction=True)
+    pipe.delete(STATS_KEY)
+    pipe.hset(STATS_KEY, mapping={MARKER: index["n_posts"], **index["idf"]})
+    pipe.expire(STATS_KEY, ttl)
+    await pipe.execute()
+    return index["n_posts"]
+
+
+async def run() -> None:
+    """Rebuild loop for main.py's lifespan."""
+    while True:
+        try:
+            if await redis_service.try_lock(_JOB_LOCK, settings.related_refresh_interval - 1):
+                await rebuild()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # keep serving the lists we have; they expire after two missed runs
+            pass
+        await asyncio.sleep(settings.related_refresh_interval)
+
+
+# ── Incremental ──
+
+async def index_post(post_id: int, hashtags: Optional[str], created_at) -> None:
+    """Related list for one new/re-tagged post, from the stored index."""
+    tags = parseHashtags(hashtags)
+    if not tags:
+        await redis_service.delete_cache(related_key(post_id))
+        return
+    client = redis_service.redis_client
+    ttl = 2 * settings.related_refresh_interval
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hgetall(STATS_KEY)
+        for t in tags:
+            pipe.hgetall(cooc_key(t))
+        stats, *coocs = await pipe.execute()
+        n_posts = float(stats.pop(MARKER, 0)) + 1
+        idf = {t: float(w) for t, w in stats.items()}
+        cooc = {t: {u: float(p) for u, p in c.items()} for t, c in zip(tags, coocs)}
+        query = _query(tags, idf, cooc, float(np.log1p(n_posts)))
+
+        pipe = client.pipeline(transaction=False)
+        for t in query:
+            pipe.zrevrange(postings_key(t), 0, settings.related_postings_len - 1)
+        postings = [np.array([int(i) for i in ids], dtype=np.int64) for ids in await pipe.execute()]
+        ids = rank(postings, list(query.values()), post_id, settings.related_top_k)
+
+        pipe = client.pipeline(transaction=False)
+        pipe.set(related_key(post_id), json.dumps(ids), ex=ttl)
+        for t in tags:
+            pipe.zadd(postings_key(t), {str(post_id): time_score(created_at)})
+            pipe.zremrangebyrank(postings_key(t), 0, -(settings.related_postings_len + 1))
+            pipe.expire(postings_key(t), ttl)
+        await pipe.execute()
+    except Exception:
+        # the next rebuild covers it
+        pass
+
+
+async def forget(post_id: int, hashtags: Optional[str]) -> None:
+    try:
+        pipe = redis_service.redis_client.pipeline(transaction=False)
+        pipe.delete(related_key(post_id))
+        for t in parseHashtags(hashtags):
+            pipe.zrem(postings_key(t), str(post_id))
+        await pipe.execute()
+    except Exception:
+        pass
+
+
+async def read(post_id: int) -> Optional[list[int]]:
+    """The stored list; None when the post has none (untagged, or not indexed yet)."""
+    return await redis_service.get_cache(related_key(post_id))
@@ -8,8 +8,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from jose import JWTError
 from datetime import datetime, timezone
 import app.redis_service as redis_service
+import app.principal_cache as principal_cache
 import app.otp_service as otp_service
 import app.email_service as email_service
+import app.prewarm_service as prewarm_service
 from app.rate_limiter import login_limiter, forgot_password_limiter, reset_password_limiter, refresh_limiter
 
 router=APIRouter(tags=['Authentication'])
@@ -34,6 +36,8 @@ async def loginUser(userCred:OAuth2PasswordRequestForm=Depends(),db:AsyncSession
   access_token=await oauth2.createAccessToken(tokenData)
   # create a refresh token for this login session (new family)
   refresh_token=await token_service.create_refresh_token(db, isUserPresent.id)
+  # the app opens the home screen next — have its first pages cached by then
+  prewarm_service.schedule(isUserPresent.id)
   # return both tokens
   return sch.TokenModel(id=isUserPresent.id,
                         username=isUserPresent.username,
@@ -49,6 +53,7 @@ async def refresh(payload: sch.RefreshTokenRequest = Body(...), db: AsyncSession
     The old refresh token is revoked (rotation).
     """
     access_token, new_refresh = await token_service.rotate_refresh_token(db, payload.refresh_token)
+    prewarm_service.schedule((await oauth2.decodeToken(access_token))["userId"])
     return {"accessToken": access_token, "refreshToken": new_refresh}
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
@@ -64,6 +69,9 @@ async def logout(token: str = Depends(oauth2.oauth2_scheme), db: AsyncSession =
             if remaining_time > 0:
                 # Add token to blacklist with remaining time as TTL
                 await redis_service.add_to_blacklist(token, int(remaining_time))
+        # drop the token from every worker's principal cache so the
+        # blacklist is honoured immediately, not after the cache TTL
+        await principal_cache.invalidate_token(token)
         # Also revoke all refresh tokens for this user so no
         # device can silently get new access tokens after logout.
         user_id = payload.get("userId")
@@ -124,6 +132,7 @@ async def reset_password(payload: sch.ResetPasswordSchema, db: AsyncSession = De
     hashed_password = await utils.hashPassword(payload.new_password)
     user.password = hashed_password
     await db.commit()
+    await principal_cache.invalidate_user(user.id)
 
     return {"message": "Password has been reset successfully."}
 
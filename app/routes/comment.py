@@ -1,16 +1,20 @@
 from fastapi import Body,HTTPException,status,APIRouter,Depends,Query,BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select,and_,func
-from app import oauth2,models,db,schemas as sch
+from typing import Optional
+from app import oauth2,models,db,schemas as sch,list_queries,author_snapshots,explore_ranking,trending_service,comment_previews
 from app.notification_service import create_notification
 from app.models import NotificationType
 from app.rate_limiter import comment_limiter
-from app.redis_service import get_cache, set_cache, delete_cache_pattern
+from app.redis_service import versioned_key, bump, invalidate
+from app.page_cache import cached
+from app.my_utils.pagination import keyset,page,page_key
+from app.read_routing import getReadDb
 
 router=APIRouter(tags=['comment'])
 
 @router.post("/comment/createComment",status_code=status.HTTP_201_CREATED, response_model=sch.CommentDetailResponse)
-async def createComment(comment:sch.CommentCreateRequest=Body(...),db:AsyncSession=Depends(db.getDb),currentUser: models.User = Depends(oauth2.getCurrentUser),background_tasks:BackgroundTasks=BackgroundTasks(),_:None=Depends(comment_limiter)):
+async def createComment(comment:sch.CommentCreateRequest=Body(...),db:AsyncSession=Depends(db.getDb),currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),background_tasks:BackgroundTasks=BackgroundTasks(),_:None=Depends(comment_limiter)):
     # Check if the post exists
     result = await db.execute(select(models.Post).where(models.Post.id == comment.post_id))
     post = result.scalars().first()
@@ -19,18 +23,22 @@ async def createComment(comment:sch.CommentCreateRequest=Body(...),db:AsyncSessi
     if not post.enable_comments:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"this post has comments disabled")
     # Create the comment
-    new_comment =models.Comments(post_id=comment.post_id,user_id=currentUser.id,comment_content=comment.content)
+    new_comment =models.Comments(post_id=comment.post_id,user_id=currentUser.id,comment_content=comment.content,**author_snapshots.snapshot_values(currentUser))
     db.add(new_comment)
     # Update comments_cnt in the Post table
     if post.comments_cnt is None:
         post.comments_cnt =0
     post.comments_cnt += 1
+    # the new comment is now the latest one in the post's preview
+    await comment_previews.refresh(db, [comment.post_id])
     await db.commit()
     await db.refresh(new_comment)
     # Invalidate cached comments for this post and post detail caches
-    await delete_cache_pattern(f"comments:post:{comment.post_id}:*")
-    await delete_cache_pattern(f"post:{comment.post_id}:*")
-    await delete_cache_pattern("feed:*")
+    await bump(f"comments:{comment.post_id}")
+    # the new count and preview show wherever the post does
+    await invalidate(f"post:{comment.post_id}")
+    await explore_ranking.mark_dirty(comment.post_id)
+    await trending_service.record(comment.post_id, "comment", post.hashtags)
     # Notify the post owner when someone comments on their post.
     # Guard: no self-notification if the post owner comments on their own post.
     if currentUser.id != post.user_id:
@@ -61,29 +69,35 @@ async def createComment(comment:sch.CommentCreateRequest=Body(...),db:AsyncSessi
     )
 
 @router.delete("/comments/delete_comment/{comment_id}",status_code=status.HTTP_200_OK, response_model=sch.SuccessResponse)
-async def deleteComment(comment_id:int,db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def deleteComment(comment_id:int,db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     result=await db.execute(select(models.Comments).where(and_(models.Comments.id==comment_id,models.Comments.user_id==currentUser.id)))
     commentTodelete=result.scalars().first()
     if not commentTodelete:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail=f"comment with Id {comment_id} not Found") 
     await db.delete(commentTodelete)
+    changed = await comment_previews.refresh(db, [commentTodelete.post_id])
     await db.commit()
     # Invalidate cached comments for this post
-    await delete_cache_pattern(f"comments:post:{commentTodelete.post_id}:*")
-    await delete_cache_pattern(f"post:{commentTodelete.post_id}:*")
+    await bump(f"comments:{commentTodelete.post_id}")
+    # pages showing the post only carry the preview — stale only if it changed
+    if changed:
+        await invalidate(f"post:{commentTodelete.post_id}")
     return sch.SuccessResponse(message=f"Comment {comment_id} deleted successfully")
 
 @router.patch("/comments/edit_comment/{comment_id}",status_code=status.HTTP_200_OK, response_model=sch.CommentDetailResponse)
-async def editComment(comment_id:int,editInfo:sch.CommentUpdateRequest=Body(...),db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def editComment(comment_id:int,editInfo:sch.CommentUpdateRequest=Body(...),db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     result=await db.execute(select(models.Comments).where(and_(models.Comments.id==comment_id,models.Comments.user_id==currentUser.id)))
     commentToBeEdited=result.scalars().first()
     if not commentToBeEdited:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail=f"comment with Id {comment_id} not Found")
     commentToBeEdited.comment_content=editInfo.comment_content
+    changed = await comment_previews.refresh(db, [commentToBeEdited.post_id])
     await db.commit()
     await db.refresh(commentToBeEdited)
     # Invalidate cached comments for this post
-    await delete_cache_pattern(f"comments:post:{commentToBeEdited.post_id}:*")
+    await bump(f"comments:{commentToBeEdited.post_id}")
+    if changed:
+        await invalidate(f"post:{commentToBeEdited.post_id}")
     
     # Build proper response
     user = sch.UserBasicResponse(
@@ -105,52 +119,36 @@ async def editComment(comment_id:int,editInfo:sch.CommentUpdateRequest=Body(...)
 @router.get("/comments-on/{post_id}", response_model=sch.CommentListResponse)
 async def getAllPosts(post_id:int,
     limit:int=Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     offset: int = Query(0,ge=0),
-    db:AsyncSession=Depends(db.getDb),
-    currentUser:models.User=Depends(oauth2.getCurrentUser)
+    db:AsyncSession=Depends(getReadDb),
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)
     ):
-    # Check Redis cache first
-    cache_key = f"comments:post:{post_id}:{offset}:{limit}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
+    cache_key = await versioned_key(f"comments:post:{post_id}:{page_key(cursor,offset)}:{limit}", f"comments:{post_id}")
+    return await cached(cache_key, db, _loadComments, post_id, limit, cursor, offset, ttl=30, hard_ttl=300, shared=True)
 
+async def _loadComments(db:AsyncSession, post_id:int, limit:int, cursor:Optional[str], offset:int) -> tuple[dict, list[str]]:
     # calculate the total number of comments on the post
     countResult=await db.execute(select(func.count()).select_from(models.Comments).where(models.Comments.post_id==post_id))
     total=countResult.scalar()
-    # only fetch the first 'limit' comments after skipping the first 'offset' comments
-    # and order them by the latest as first
-    commentsResult=await db.execute(select(models.Comments).where(models.Comments.post_id==post_id).offset(offset).limit(limit))
-    paginatedComments=commentsResult.scalars().all()
-    
-    # Build proper response
-    commentsResponse = []
-    for comment in paginatedComments:
-        user = sch.UserBasicResponse(
-            id=comment.user.id,
-            username=comment.user.username,
-            nickname=comment.user.nickname,
-            profile_pic=comment.user.profile_picture
-        )
-        commentsResponse.append(sch.CommentDetailResponse(
-            id=comment.id,
-            post_id=comment.post_id,
-            content=comment.comment_content,
-            likes=comment.likes,
-            created_at=comment.created_at,
-            user=user
-        ))
+    # only fetch the 'limit' comments older than the cursor (latest first)
+    commentsResult=await db.execute(keyset(
+        list_queries.comment_select().where(models.Comments.post_id==post_id),
+        models.Comments.created_at,models.Comments.id,limit,cursor,offset
+    ))
+    rows,next_cursor=page(commentsResult.all(),limit)
+    commentsResponse = [list_queries.comment_item(row) for row in rows]
     
     pagination = sch.PaginationMetadata(
         total=total,
         limit=limit,
         offset=offset,
-        has_more=(limit+offset)<total
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor
     )
     
     result = sch.CommentListResponse(
         comments=commentsResponse,
         pagination=pagination
     )
-    await set_cache(cache_key, result.model_dump(mode="json"), ttl=30)
-    return result
\ No newline at end of file
+    return result.model_dump(mode="json"), list_queries.user_tags(rows)
\ No newline at end of file
@@ -1,12 +1,12 @@
 from fastapi import status,HTTPException,Depends,Body,APIRouter,BackgroundTasks
 import app.schemas as sch
-from app import models,oauth2
+from app import models,oauth2,timeline_service
 from app.db import getDb
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select,and_,insert,delete,func
 from sqlalchemy.exc import IntegrityError
 from typing import List
-from app.redis_service import delete_cache, delete_cache_pattern
+from app.redis_service import delete_cache, bump
 from app.notification_service import create_notification
 from app.models import NotificationType
 from app.rate_limiter import follow_limiter
@@ -48,7 +48,8 @@ async def follow(user_id:int,db:AsyncSession=Depends(getDb),currentUser:models.U
     await delete_cache(f"followers:{userToFollow.id}")
     await delete_cache(f"following:{currentUser.id}")
     # Invalidate home feed cache for the follower (new posts appear)
-    await delete_cache_pattern(f"feed:home:{currentUser.id}:*")
+    await bump(f"feed:home:{currentUser.id}")
+    background_tasks.add_task(timeline_service.rebuild, currentUser.id)
     # Notify the followed user that someone started following them.
     # Self-follow is already prevented above, so no extra guard needed here.
     background_tasks.add_task(
@@ -63,7 +64,7 @@ async def follow(user_id:int,db:AsyncSession=Depends(getDb),currentUser:models.U
     return sch.FollowResponse(message=f"Followed user {userToFollow.username}", following_count=currentUser.following_cnt)
     
 @router.delete("/unfollow/{user_id}",status_code=status.HTTP_200_OK, response_model=sch.FollowResponse)
-async def unfollow(user_id:int,db:AsyncSession=Depends(getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def unfollow(user_id:int,db:AsyncSession=Depends(getDb),currentUser:models.User=Depends(oauth2.getCurrentUser),background_tasks:BackgroundTasks=BackgroundTasks()):
     result=await db.execute(select(models.User).where(models.User.id==user_id))
     userToUnFollow=result.scalars().first()
     if not userToUnFollow:
@@ -98,11 +99,12 @@ async def unfollow(user_id:int,db:AsyncSession=Depends(getDb),currentUser:models
     # Invalidate followers/following list caches
     await delete_cache(f"followers:{userToUnFollow.id}")
     await delete_cache(f"following:{currentUser.id}")
-    await delete_cache_pattern(f"feed:home:{currentUser.id}:*")
+    await bump(f"feed:home:{currentUser.id}")
+    background_tasks.add_task(timeline_service.rebuild, currentUser.id)
     return sch.FollowResponse(message=f"Unfollowed user {userToUnFollow.username}", following_count=currentUser.following_cnt)
 
 @router.delete("/remove_follower/{user_id}", status_code=status.HTTP_200_OK, response_model=sch.FollowResponse)
-async def remove_follower(user_id: int, db: AsyncSession = Depends(getDb), currentUser: models.User = Depends(oauth2.getCurrentUser)):
+async def remove_follower(user_id: int, db: AsyncSession = Depends(getDb), currentUser: models.User = Depends(oauth2.getCurrentUser), background_tasks: BackgroundTasks = BackgroundTasks()):
     result=await db.execute(select(models.User).where(models.User.id == user_id))
     userToRemove=result.scalars().first()
     if not userToRemove:
@@ -141,10 +143,13 @@ async def remove_follower(user_id: int, db: AsyncSession = Depends(getDb), curre
     # Invalidate followers/following list caches
     await delete_cache(f"followers:{currentUser.id}")
     await delete_cache(f"following:{userToRemove.id}")
+    # my posts must leave the removed follower's home feed
+    await bump(f"feed:home:{userToRemove.id}")
+    background_tasks.add_task(timeline_service.rebuild, userToRemove.id)
     return sch.FollowResponse(message=f"Removed follower {userToRemove.username}", following_count=currentUser.following_cnt)
 
 @router.get("/users/{user_id}/followers", response_model=List[sch.UserBasicResponse])
-async def get_followers(user_id:int,db:AsyncSession=Depends(getDb), currentUser: models.User = Depends(oauth2.getCurrentUser)):
+async def get_followers(user_id:int,db:AsyncSession=Depends(getDb), currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)):
     result=await db.execute(select(models.User).where(models.User.id==user_id))
     user=result.scalars().first()
     if not user:
@@ -175,7 +180,7 @@ async def get_followers(user_id:int,db:AsyncSession=Depends(getDb), currentUser:
     ]
 
 @router.get("/users/{user_id}/following", response_model=List[sch.UserBasicResponse])
-async def get_following(user_id:int,db:AsyncSession=Depends(getDb), currentUser: models.User = Depends(oauth2.getCurrentUser)):
+async def get_following(user_id:int,db:AsyncSession=Depends(getDb), currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)):
     result=await db.execute(select(models.User).where(models.User.id==user_id))
     user=result.scalars().first()
     if not user:
@@ -1,135 +1,188 @@
 from fastapi import APIRouter, Depends, HTTPException,Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select,func,desc
-from typing import List
-from app import models, schemas, oauth2 , db
-from app.redis_service import get_cache, set_cache, delete_cache
-from app.blob_service import get_blob_url
-import os
+from sqlalchemy import select,func,tuple_
+from typing import Literal,Optional
+from app import models, schemas, oauth2 , totals_service, list_queries, timeline_service, explore_ranking, explore_personal, seen_filter, feed_updates
+from app.redis_service import versioned_key
+from app.page_cache import cached
+from app.my_utils.pagination import keyset,page,page_key,encode_cursor,decode_cursor
+from app.read_routing import getReadDb
+from app.parallel_reads import gather_reads
+from datetime import datetime, timezone
 
 router = APIRouter(tags=["Feed"])
 
 @router.get("/feed/home", response_model=schemas.FeedResponse)
 async def getHomeFeed(limit:int=Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     offset: int = Query(0,ge=0),
-    db:AsyncSession=Depends(db.getDb),
-    currentUser:models.User=Depends(oauth2.getCurrentUser)
+    include_total: bool = Query(True, description="false skips the total and only returns has_more"),
+    db:AsyncSession=Depends(getReadDb),
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)
     ):
-    # Check Redis cache first (per-user, per-page)
-    cache_key = f"feed:home:{currentUser.id}:{offset}:{limit}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
+    result = await homeFeedPage(db, currentUser, limit, cursor, offset, include_total)
+    # every post on the page is an impression — explore skips them from now on
+    await seen_filter.mark_seen(currentUser.id, [item["post_id"] for item in result["feed"]])
+    return result
 
-    # Get users the current user follows via connections table
-    followingResult = await db.execute(
-        select(models.connections.c.followed_id).where(models.connections.c.follower_id == currentUser.id)
-    )
-    followed_users = [row[0] for row in followingResult.all()]
-    
-    # Query posts from followed users, recent first
-    countResult = await db.execute(
-        select(func.count()).select_from(models.Post).where(models.Post.user_id.in_(followed_users))
-    )
-    total=countResult.scalar()
-    
-    postsResult = await db.execute(
-        select(models.Post).where(models.Post.user_id.in_(followed_users))
-        .order_by(models.Post.created_at.desc())
-        .offset(offset).limit(limit)
+# the page itself, cached — split from the route so prewarm_service.py can fill the cache
+async def homeFeedPage(db:AsyncSession, currentUser:oauth2.Principal, limit:int=10,
+    cursor:Optional[str]=None, offset:int=0, include_total:bool=True) -> dict:
+    # cached per user and page; one load per miss, stale pages refreshed behind (page_cache.py)
+    cache_key = await versioned_key(f"feed:home:{currentUser.id}:{page_key(cursor,offset)}:{limit}:{int(include_total)}", "feed", f"feed:home:{currentUser.id}")
+    return await cached(cache_key, db, _loadHomeFeed, currentUser, limit, cursor, offset, include_total, ttl=30, hard_ttl=300)
+
+async def _loadHomeFeed(db:AsyncSession, currentUser:oauth2.Principal, limit:int,
+    cursor:Optional[str], offset:int, include_total:bool) -> tuple[dict, list[str]]:
+    # Users the current user follows — kept as a subquery so the page and the
+    # total don't have to wait for it and can run side by side
+    followed_users = (
+        select(models.connections.c.followed_id)
+        .where(models.connections.c.follower_id == currentUser.id)
+        .scalar_subquery()
     )
-    posts=postsResult.scalars().all()
-    
-    # Get liked post IDs
-    votesResult = await db.execute(
-        select(models.Votes.post_id).where(models.Votes.user_id == currentUser.id, models.Votes.action == True)
+    # the page's post ids come from the precomputed timeline (timeline_service.py);
+    # None → Redis is down or we paged past the trimmed end, so ask Postgres
+    timeline_ids = await timeline_service.read_page(db, currentUser.id, limit, cursor, offset)
+    sqlStmt = keyset(
+        list_queries.feed_select().where(models.Post.user_id.in_(followed_users)),
+        models.Post.created_at, models.Post.id, limit, cursor, offset
     )
-    liked_post_ids = {row[0] for row in votesResult.all()}
+    if timeline_ids is None:
+        postsStmt = sqlStmt
+    else:
+        # hydrate the whole page in one primary-key lookup
+        postsStmt = list_queries.feed_select().where(models.Post.id.in_(timeline_ids))
+    reads = [postsStmt]
+    # the feed total is just the sum of the followed users' post counters
+    if include_total:
+        reads.append(select(func.coalesce(func.sum(models.User.posts_cnt),0)).where(models.User.id.in_(followed_users)))
+    postsResult, *countResult = await gather_reads(db, *reads)
+    total = countResult[0].scalar() if countResult else None
+    rows = postsResult.all()
+    if timeline_ids is None:
+        rows,next_cursor=page(rows,limit)
+    else:
+        # back into timeline order; ids of posts deleted meanwhile (or not on this
+        # replica yet) just drop out. That shortens the page, not the feed: whether
+        # there is more comes from the timeline's extra id, not from the rows left
+        by_id = {r.id: r for r in rows}
+        rows = [by_id[i] for i in timeline_ids[:limit] if i in by_id]
+        more = len(timeline_ids) > limit
+        if more and not rows:
+            # the whole page is gone, nothing to put the cursor on — let Postgres page it
+            rows,next_cursor=page((await db.execute(sqlStmt)).all(),limit)
+        else:
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if more else None
     
-    # Build proper feed response
-    user_homeFeed = []
-    for post in posts:
-        owner = schemas.UserOut(
-            id=post.user_id,
-            username=post.user.username,
-            profile_pic=post.user.profile_picture
-        )
-        # Build the post item with is_liked
-        post_item = schemas.PostListItemResponse(
-            id=post.id,
-            title=post.title,
-            media_url=get_blob_url("posts-media", post.media_path) if post.media_path else None,
-            media_type=post.media_type,
-            likes=post.likes,
-            comments_count=post.comments_cnt,
-            created_at=post.created_at,
-            is_liked=post.id in liked_post_ids
-        )
-        
-        user_homeFeed.append(schemas.FeedItemResponse(
-            post_id=post.id,
-            post=post_item,
-            owner=owner
-        ))
+    # is_liked only for the posts on this page
+    liked_post_ids = await list_queries.liked_post_ids(db, currentUser.id, [r.id for r in rows])
+    user_homeFeed = [list_queries.feed_item(r, liked_post_ids) for r in rows]
     
-    result = schemas.FeedResponse(feed=user_homeFeed, total=total)
-    await set_cache(cache_key, result.model_dump(mode="json"), ttl=30)
-    return result
+    latest_cursor = encode_cursor(rows[0].created_at, rows[0].id) if rows else None
+    result = schemas.FeedResponse(feed=user_homeFeed, total=total, has_more=next_cursor is not None,
+                                  next_cursor=next_cursor, latest_cursor=latest_cursor)
+    return result.model_dump(mode="json"), list_queries.post_tags(rows) + list_queries.user_tags(rows)
+
+@router.get("/feed/home/new-count", response_model=schemas.NewPostsCountResponse)
+async def getHomeNewCount(since: str = Query(..., description="latest_cursor of the page on screen"),
+    db:AsyncSession=Depends(getReadDb),
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)
+    ):
+    # cheap enough to poll: one ZCOUNT per timeline source (timeline_service.py)
+    since_at, since_id = decode_cursor(since)
+    count = await timeline_service.new_count(db, currentUser.id, since_at)
+    if count is None:
+        # Redis is down — count it in Postgres, an index range per followed user
+        followed_users = select(models.connections.c.followed_id).where(models.connections.c.follower_id == currentUser.id)
+        count = (await db.execute(
+            select(func.count()).select_from(models.Post).where(
+                models.Post.user_id.in_(followed_users),
+                tuple_(models.Post.created_at, models.Post.id) > tuple_(since_at, since_id),
+            )
+        )).scalar()
+    return schemas.NewPostsCountResponse(count=count)
+
+@router.get("/feed/home/stream")
+async def streamHomeUpdates(since: Optional[str] = Query(None, description="latest_cursor of the page on screen (default: now)"),
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)
+    ):
+    # Server-Sent Events: "N new posts" hints as followed authors publish (feed_updates.py)
+    # no db dependency — it would stay checked out until the stream closes
+    since_at = decode_cursor(since)[0] if since else datetime.now(timezone.utc)
+    try:
+        stream = await feed_updates.open_stream(currentUser.id, since_at)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Feed updates are unavailable right now")
+    return StreamingResponse(stream, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/feed/explore", response_model=schemas.PostListResponse)
 async def getExploreFeed(limit:int=Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     offset: int = Query(0,ge=0),
-    db:AsyncSession=Depends(db.getDb),
-    currentUser:models.User=Depends(oauth2.getCurrentUser)
+    include_total: bool = Query(True, description="false skips the total and only returns has_more"),
+    mode: Literal["global", "personal"] = Query("global", description="personal ranks posts for the current user"),
+    hide_seen: bool = Query(True, description="skip posts the user has already opened or been shown"),
+    db:AsyncSession=Depends(getReadDb),
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)
     ):
-    # Check Redis cache (per-user because is_liked differs per user)
-    cache_key = f"feed:explore:{currentUser.id}:{offset}:{limit}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
+    result = await exploreFeedPage(db, currentUser, limit, cursor, offset, include_total, mode, hide_seen)
+    await seen_filter.mark_seen(currentUser.id, [item["id"] for item in result["posts"]])
+    return result
 
-    # For explore, get all posts (or random) - excluding potentially private ones if that existed
-    # Simple implementation: All recent posts
-    countResult = await db.execute(select(func.count()).select_from(models.Post))
-    total = countResult.scalar()
-    
-    postsResult = await db.execute(
-        select(models.Post).order_by(models.Post.created_at.desc())
-        .offset(offset).limit(limit)
-    )
-    posts = postsResult.scalars().all()
-    
-    # Get liked post IDs
-    votesResult = await db.execute(
-        select(models.Votes.post_id).where(models.Votes.user_id == currentUser.id, models.Votes.action == True)
-    )
-    liked_post_ids = {row[0] for row in votesResult.all()}
+async def exploreFeedPage(db:AsyncSession, currentUser:oauth2.Principal, limit:int=20,
+    cursor:Optional[str]=None, offset:int=0, include_total:bool=True,
+    mode:str="global", hide_seen:bool=True) -> dict:
+    if hide_seen:
+        # which posts are skipped changes with every page served (they're marked
+        # seen right after), so this page is never reused — built per request:
+        # a slice of the ranking in Redis plus one primary-key lookup
+        page, _ = await _loadExploreFeed(db, currentUser, limit, cursor, offset, include_total, mode, hide_seen)
+        return page
+    # cached per user (is_liked differs per user); one load per miss, stale pages refreshed behind
+    cache_key = await versioned_key(f"feed:explore:{mode}:{currentUser.id}:{page_key(cursor,offset)}:{limit}:{int(include_total)}", "feed")
+    return await cached(cache_key, db, _loadExploreFeed, currentUser, limit, cursor, offset, include_total, mode, hide_seen, ttl=60, hard_ttl=600)
+
+async def _loadExploreFeed(db:AsyncSession, currentUser:oauth2.Principal, limit:int,
+    cursor:Optional[str], offset:int, include_total:bool, mode:str, hide_seen:bool) -> tuple[dict, list[str]]:
+    # Ranked by engagement (explore_ranking.py): the page is a slice of the
+    # precomputed top-K, hydrated in one primary-key lookup. mode=personal
+    # pages through the user's own ranking instead (explore_personal.py).
+    # Posts the user has already seen are skipped and backfilled (seen_filter.py)
+    skip = (lambda ids: seen_filter.seen(currentUser.id, ids)) if hide_seen else None
+    ranked = None
+    if mode == "personal":
+        ranked = await explore_personal.read_page(db, currentUser.id, limit, cursor, offset, skip=skip)
+    if ranked is None:
+        ranked = await explore_ranking.read_page(limit, cursor, offset, skip=skip)
+    if ranked is not None:
+        ranked_ids, next_cursor, ranked_count = ranked
+        postsResult = await db.execute(list_queries.post_list_select().where(models.Post.id.in_(ranked_ids)))
+        by_id = {r.id: r for r in postsResult.all()}
+        rows = [by_id[i] for i in ranked_ids if i in by_id]
+        total = ranked_count if include_total else None
+    else:
+        # ranking not built yet (or Redis down) — newest first, straight from Postgres;
+        # every post is in scope here, so the table's row estimate is good enough
+        reads = [keyset(list_queries.post_list_select(), models.Post.created_at, models.Post.id, limit, cursor, offset)]
+        if include_total:
+            reads.append(lambda s: totals_service.estimate_table_rows(s, models.Post.__table__))
+        postsResult, *estimate = await gather_reads(db, *reads)
+        total = estimate[0] if estimate else None
+        rows, next_cursor = page(postsResult.all(), limit)
     
-    # helper to format posts specifically for explore (similar to user posts list)
-    explore_posts = []
-    for post in posts:
-        media_url = None
-        if post.media_path:
-            media_url = get_blob_url("posts-media", post.media_path)
-            
-        explore_posts.append(schemas.PostListItemResponse(
-            id=post.id,
-            title=post.title,
-            media_url=media_url,
-            media_type=post.media_type,
-            likes=post.likes,
-            comments_count=post.comments_cnt,
-            created_at=post.created_at,
-            is_liked=post.id in liked_post_ids
-        ))
+    liked_post_ids = await list_queries.liked_post_ids(db, currentUser.id, [r.id for r in rows])
+    explore_posts = [list_queries.post_item(r, liked_post_ids) for r in rows]
 
     pagination = schemas.PaginationMetadata(
         total=total,
         limit=limit,
         offset=offset,
-        has_more=(limit+offset)<total
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor
     )
     
     result = schemas.PostListResponse(posts=explore_posts, pagination=pagination)
-    await set_cache(cache_key, result.model_dump(mode="json"), ttl=60)
-    return result
\ No newline at end of file
+    return result.model_dump(mode="json"), list_queries.post_tags(rows)
\ No newline at end of file
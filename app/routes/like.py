@@ -1,13 +1,13 @@
 from fastapi import status,HTTPException,Depends,Body,APIRouter,BackgroundTasks
 import app.schemas as sch
-from app import models,oauth2
+from app import models,oauth2,explore_ranking,trending_service,comment_previews
 from app.db import getDb
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select,and_
 from sqlalchemy.exc import IntegrityError
 from app.notification_service import create_notification
 from app.models import NotificationType
-from app.redis_service import delete_cache_pattern
+from app.redis_service import invalidate
 
 router=APIRouter(
     tags=['likes']
@@ -15,7 +15,7 @@ router=APIRouter(
 
 @router.post("/vote/on_post",status_code=status.HTTP_201_CREATED, response_model=sch.VoteResponse)
 # get the post user that user wants to vote on with which user he is
-async def voteOnPost(post:sch.VoteRequest=Body(...),db:AsyncSession=Depends(getDb),currentUser:models.User=Depends(oauth2.getCurrentUser),background_tasks:BackgroundTasks=BackgroundTasks()):
+async def voteOnPost(post:sch.VoteRequest=Body(...),db:AsyncSession=Depends(getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal),background_tasks:BackgroundTasks=BackgroundTasks()):
     # search for the post he wants to vote on against the db 
     # to firstly check whether that particular post is present or not in the db
     result=await db.execute(select(models.Post).where(models.Post.id==post.post_id))
@@ -43,8 +43,8 @@ async def voteOnPost(post:sch.VoteRequest=Body(...),db:AsyncSession=Depends(getD
                     queriedPost.dis_likes-= 1
                 await db.commit()
                 await db.refresh(queriedPost)
-                await delete_cache_pattern(f"post:{post.post_id}:*")
-                await delete_cache_pattern("feed:*")
+                await invalidate(f"post:{post.post_id}")
+                await explore_ranking.mark_dirty(post.post_id)
                 return sch.VoteResponse(message="Vote removed successfully", likes=queriedPost.likes, dislikes=queriedPost.dis_likes)
             else:
                 # Switching vote (e.g., like to dislike or vice versa)
@@ -57,8 +57,10 @@ async def voteOnPost(post:sch.VoteRequest=Body(...),db:AsyncSession=Depends(getD
                     queriedPost.dis_likes += 1
                 await db.commit()
                 await db.refresh(queriedPost)
-                await delete_cache_pattern(f"post:{post.post_id}:*")
-                await delete_cache_pattern("feed:*")
+                await invalidate(f"post:{post.post_id}")
+                await explore_ranking.mark_dirty(post.post_id)
+                if post.choice:
+                    await trending_service.record(post.post_id, "like", queriedPost.hashtags)
                 return sch.VoteResponse(message="Vote switched successfully", likes=queriedPost.likes, dislikes=queriedPost.dis_likes)
         else:
             # New vote
@@ -76,8 +78,10 @@ async def voteOnPost(post:sch.VoteRequest=Body(...),db:AsyncSession=Depends(getD
                 queriedPost.dis_likes += 1
             await db.commit()
             await db.refresh(queriedPost)
-            await delete_cache_pattern(f"post:{post.post_id}:*")
-            await delete_cache_pattern("feed:*")
+            await invalidate(f"post:{post.post_id}")
+            await explore_ranking.mark_dirty(post.post_id)
+            if post.choice:
+                await trending_service.record(post.post_id, "like", queriedPost.hashtags)
             # Notify the post owner when someone LIKES their post.
             # Only on new likes (not dislikes, not removals, not self-likes).
             if post.choice and currentUser.id != queriedPost.user_id:
@@ -96,8 +100,13 @@ async def voteOnPost(post:sch.VoteRequest=Body(...),db:AsyncSession=Depends(getD
         await db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Database error, please try again"
                             )
+# a comment like reorders the post's preview only now and then — drop the pages showing it just then
+async def _preview_changed(post_id:int,changed:list[int]):
+    if changed:
+        await invalidate(f"post:{post_id}")
+
 @router.post("/vote/on_comment",status_code=status.HTTP_201_CREATED, response_model=sch.VoteResponse)
-async def likeAComment(comment:sch.CommentVoteRequest=Body(...),db:AsyncSession=Depends(getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def likeAComment(comment:sch.CommentVoteRequest=Body(...),db:AsyncSession=Depends(getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     # search for the comment he wants to vote on against the db 
     # to firstly check whether that particular comment is present or not in the db
     result=await db.execute(select(models.Comments).where(models.Comments.id==comment.comment_id))
@@ -121,8 +130,10 @@ async def likeAComment(comment:sch.CommentVoteRequest=Body(...),db:AsyncSession=
                 # by removing the vote (like)
                 if comment.choice:
                     queriedComment.likes-=1
+                changed = await comment_previews.refresh(db, [queriedComment.post_id])
                 await db.commit()
                 await db.refresh(queriedComment)
+                await _preview_changed(queriedComment.post_id, changed)
                 return sch.VoteResponse(message="Vote removed successfully", likes=queriedComment.likes)
         else:
             # New like on a comment
@@ -135,8 +146,10 @@ async def likeAComment(comment:sch.CommentVoteRequest=Body(...),db:AsyncSession=
             # if user choice is true increase likes count
             if comment.choice:
                 queriedComment.likes+=1
+            changed = await comment_previews.refresh(db, [queriedComment.post_id])
             await db.commit()
             await db.refresh(queriedComment)
+            await _preview_changed(queriedComment.post_id, changed)
             return sch.VoteResponse(message="New vote added successfully", likes=queriedComment.likes)
     # triggers if any thing goes wrong in db as the logic is solid
     except IntegrityError:
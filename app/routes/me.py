@@ -1,25 +1,30 @@
-from fastapi import status,HTTPException,Depends,Body,APIRouter,Form,Query
+from fastapi import status,HTTPException,Depends,Body,APIRouter,Form,Query,BackgroundTasks
 from fastapi.responses import FileResponse
 import app.schemas as sch
-from typing import List
-from app import models,db,oauth2
+from typing import List,Optional
+from app import models,db,oauth2,principal_cache,totals_service,list_queries,author_snapshots
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select,and_,distinct,func,case,update
+from sqlalchemy.orm import joinedload
 import os
 import asyncio
 from fastapi import UploadFile,File
 from app.redis_service import delete_cache
 from app.blob_service import upload_blob, delete_blob, get_blob_url
+from app.my_utils.pagination import keyset,page
 
 router=APIRouter(
     tags=['me']
 )
 
+# these listings only print the post owner's username
+def _owner_name_loader():
+    return joinedload(models.Post.user).load_only(models.User.username)
+
 @router.get("/me/profile",status_code=status.HTTP_200_OK,response_model=sch.UserProfileResponse)
 async def myProfile(db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
-    # Count posts via query for accuracy
-    posts_count_result = await db.execute(select(func.count()).select_from(models.Post).where(models.Post.user_id==currentUser.id))
-    posts_count = posts_count_result.scalar()
+    # posts_cnt is maintained on write, no COUNT(*) needed
+    posts_count = currentUser.posts_cnt
     return sch.UserProfileResponse(
         id=currentUser.id,
         username=currentUser.username,
@@ -33,7 +38,7 @@ async def myProfile(db:AsyncSession=Depends(db.getDb),currentUser:models.User=De
     )
 
 @router.get("/me/profile/pic",status_code=status.HTTP_200_OK, response_model=sch.MediaInfo)
-async def myProfilePicture(db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def myProfilePicture(db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     # get the current users profile pic
     profilePicturePath = currentUser.profile_picture
     # if he doesnt have a porfile pic return 404
@@ -44,58 +49,48 @@ async def myProfilePicture(db:AsyncSession=Depends(db.getDb),currentUser:models.
         type="image"
     )
 @router.delete("/me/profilepic/delete",status_code=status.HTTP_200_OK, response_model=sch.SuccessResponse)
-async def removeProfilePicture(db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def removeProfilePicture(background_tasks:BackgroundTasks,db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
     profilePic=currentUser.profile_picture
     if not profilePic:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="No profile picture to remove")
     await delete_blob("profilepics", profilePic)
     currentUser.profile_picture=None
     await db.commit()
-    # profile changed — bust the cached profile for this user
+    # profile changed — bust the cached profile and auth principal for this user
     await delete_cache(f"user_profile:{currentUser.id}")
+    await principal_cache.invalidate_user(currentUser.id)
+    # posts/comments carry a copy of the avatar
+    background_tasks.add_task(author_snapshots.propagate, currentUser.id)
     return sch.SuccessResponse(message="Profile picture removed successfully")
 
 # retrives all posts using sqlAlchemy
 @router.get("/me/posts", response_model=sch.PostListResponse)  
 async def getAllPosts(limit:int=Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     offset: int = Query(0,ge=0),
+    include_total: bool = Query(True, description="false skips the total and only returns has_more"),
     db:AsyncSession=Depends(db.getDb),
-    currentUser:models.User=Depends(oauth2.getCurrentUser)
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)
     ):
-    # calculate the total number of posts of the currentuser
-    countResult=await db.execute(select(func.count()).select_from(models.Post).where(models.Post.user_id==currentUser.id))
-    total=countResult.scalar()
-    # only fetch the first 'limit' posts after skipping the first 'offset' posts
-    # and order them by the latest as first
-    postsResult=await db.execute(select(models.Post).where(models.Post.user_id==currentUser.id).order_by(models.Post.created_at.desc()).offset(offset).limit(limit))
-    paginatedPosts=postsResult.scalars().all()
-    
-    # Get all post IDs the user has liked
-    votesResult=await db.execute(select(models.Votes.post_id).where(models.Votes.user_id == currentUser.id, models.Votes.action == True))
-    liked_post_ids = {row[0] for row in votesResult.all()}
+    # the post count is kept on the users row, no COUNT(*) needed
+    total=await totals_service.user_counter(db,currentUser.id,"posts_cnt") if include_total else None
+    # only fetch the 'limit' posts older than the cursor (latest first)
+    postsResult=await db.execute(keyset(
+        list_queries.post_list_select().where(models.Post.user_id==currentUser.id),
+        models.Post.created_at,models.Post.id,limit,cursor,offset
+    ))
+    rows,next_cursor=page(postsResult.all(),limit)
     
-    # Build proper response
-    posts = []
-    for post in paginatedPosts:
-        media_url = None
-        if post.media_path:
-            media_url = get_blob_url("posts-media", post.media_path)
-        posts.append(sch.PostListItemResponse(
-            id=post.id,
-            title=post.title,
-            media_url=media_url,
-            media_type=post.media_type,
-            likes=post.likes,
-            comments_count=post.comments_cnt,
-            created_at=post.created_at,
-            is_liked=post.id in liked_post_ids
-        ))
+    # is_liked for the posts on this page only
+    liked_post_ids = await list_queries.liked_post_ids(db,currentUser.id,[r.id for r in rows])
+    posts = [list_queries.post_item(r,liked_post_ids) for r in rows]
     
     pagination = sch.PaginationMetadata(
         total=total,
         limit=limit,
         offset=offset,
-        has_more=(limit+offset)<total
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor
     )
     
     return sch.PostListResponse(
@@ -108,7 +103,7 @@ async def getAllPosts(limit:int=Query(10, ge=1, le=100),
 # ambiguity as one of the section is being passed via Form and the other via Body
 # so made everything to be passed via Form only
 @router.patch("/me/updateInfo",status_code=status.HTTP_200_OK, response_model=sch.UserProfileResponse)
-async def updateUserInfo(username:str=Form(None),bio:str=Form(None),profile_picture:UploadFile=File(None),db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def updateUserInfo(background_tasks:BackgroundTasks,username:str=Form(None),bio:str=Form(None),profile_picture:UploadFile=File(None),db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
     # to store updates the user does
     updates={}
     if username:
@@ -131,12 +126,14 @@ async def updateUserInfo(username:str=Form(None),bio:str=Form(None),profile_pict
         await db.execute(update(models.User).where(models.User.id==currentUser.id).values(**updates))
         await db.commit()
         await db.refresh(currentUser)
-        # profile changed — bust the cached profile for this user
+        # profile changed — bust the cached profile and auth principal for this user
         await delete_cache(f"user_profile:{currentUser.id}")
+        await principal_cache.invalidate_user(currentUser.id)
+        # name/avatar are copied onto every post and comment — refresh them in the background
+        if "username" in updates or "profile_picture" in updates:
+            background_tasks.add_task(author_snapshots.propagate, currentUser.id)
     
-    # Count posts for response
-    posts_count_result = await db.execute(select(func.count()).select_from(models.Post).where(models.Post.user_id==currentUser.id))
-    posts_count = posts_count_result.scalar()
+    posts_count = currentUser.posts_cnt
     
     # Build proper response
     return sch.UserProfileResponse(
@@ -152,11 +149,12 @@ async def updateUserInfo(username:str=Form(None),bio:str=Form(None),profile_pict
     )
 
 @router.get("/me/votedOnPosts",status_code=status.HTTP_200_OK)
-async def getVotedPosts(db:AsyncSession=Depends(db.getDb),currentUser:models.User =Depends(oauth2.getCurrentUser)):
+async def getVotedPosts(db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal =Depends(oauth2.getCurrentPrincipal)):
     # Query voted posts via join
     result=await db.execute(
         select(models.Post).join(models.Votes, models.Votes.post_id==models.Post.id)
         .where(models.Votes.user_id==currentUser.id)
+        .options(_owner_name_loader())
     )
     voted_posts=result.scalars().all()
     return {
@@ -172,7 +170,7 @@ async def getVotedPosts(db:AsyncSession=Depends(db.getDb),currentUser:models.Use
     }
 
 @router.get("/me/voteStats",status_code=status.HTTP_200_OK, response_model=sch.VoteStatsResponse)
-async def voteStatus(db:AsyncSession=Depends(db.getDb),currentUser:models.User = Depends(oauth2.getCurrentUser)):
+async def voteStatus(db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal = Depends(oauth2.getCurrentPrincipal)):
     # using the func,case and quering - BUG FIX: summary returns a list of Row objects
     result=await db.execute(
         select(
@@ -188,12 +186,13 @@ async def voteStatus(db:AsyncSession=Depends(db.getDb),currentUser:models.User =
     )
 
 @router.get("/me/likedPosts")
-async def get_liked_posts(db:AsyncSession = Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def get_liked_posts(db:AsyncSession = Depends(db.getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     # Query liked posts
     result=await db.execute(
         select(models.Post)
         .join(models.Votes, models.Votes.post_id==models.Post.id)
         .where(and_(models.Votes.user_id==currentUser.id, models.Votes.action==True))
+        .options(_owner_name_loader())
     )
     liked_posts=result.scalars().all()
     return {
@@ -207,11 +206,12 @@ async def get_liked_posts(db:AsyncSession = Depends(db.getDb),currentUser:models
         ]
     }
 @router.get("/me/dislikedPosts")
-async def get_disliked_posts(db:AsyncSession = Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):    # Query disliked posts
+async def get_disliked_posts(db:AsyncSession = Depends(db.getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):    # Query disliked posts
     result=await db.execute(
         select(models.Post)
         .join(models.Votes,models.Votes.post_id==models.Post.id)
         .where(and_(models.Votes.user_id==currentUser.id, models.Votes.action==False))
+        .options(_owner_name_loader())
     )
     liked_posts=result.scalars().all()
     return {
@@ -226,7 +226,7 @@ async def get_disliked_posts(db:AsyncSession = Depends(db.getDb),currentUser:mod
     }
 
 @router.get("/me/commented-on",status_code=status.HTTP_200_OK)
-async def getCommentedPosts(db:AsyncSession=Depends(db.getDb),currentUser:models.User =Depends(oauth2.getCurrentUser)):
+async def getCommentedPosts(db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal =Depends(oauth2.getCurrentPrincipal)):
     # get the current users all commented posts id's ignore duplicates
     uniqueResult=await db.execute(select(distinct(models.Comments.post_id)).where(models.Comments.user_id==currentUser.id))
     uniquePostIds=uniqueResult.all()
@@ -238,6 +238,7 @@ async def getCommentedPosts(db:AsyncSession=Depends(db.getDb),currentUser:models
     postsResult=await db.execute(
         select(models.Post)
         .where(models.Post.id.in_(post_ids))
+        .options(_owner_name_loader())
     )
     commented_posts=postsResult.scalars().all()
     return {
@@ -253,7 +254,7 @@ async def getCommentedPosts(db:AsyncSession=Depends(db.getDb),currentUser:models
     }
 
 @router.get("/me/comment-stats",status_code=status.HTTP_200_OK, response_model=sch.CommentStatsResponse)
-async def commentStatus(db:AsyncSession=Depends(db.getDb),currentUser:models.User = Depends(oauth2.getCurrentUser)):
+async def commentStatus(db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal = Depends(oauth2.getCurrentPrincipal)):
     # Count total comments by user
     commentCountResult=await db.execute(select(func.count()).select_from(models.Comments).where(models.Comments.user_id==currentUser.id))
     comment_count=commentCountResult.scalar()
@@ -1,10 +1,13 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
 import app.schemas as sch
-from app import models, db, oauth2
+from app import db, oauth2, totals_service
 from app import notification_service as ns
-from app.redis_service import get_cache, set_cache, delete_cache_pattern
+from app.redis_service import delete_cache, versioned_key, bump
+from app.page_cache import cached
+from app.my_utils.pagination import page_key
+from app.parallel_reads import gather_reads
 
 router = APIRouter(tags=["notifications"])
 
@@ -16,26 +19,50 @@ router = APIRouter(tags=["notifications"])
 
 async def get_my_notifications(
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     offset: int = Query(0, ge=0),
+    include_total: bool = Query(True, description="false skips the total and only returns has_more"),
     db_session: AsyncSession = Depends(db.getDb),
-    current_user: models.User = Depends(oauth2.getCurrentUser),
+    current_user: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),
 ):
     """Return paginated notifications for the authenticated user, newest first."""
-    # Check Redis cache
-    cache_key = f"notifications:{current_user.id}:{offset}:{limit}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
+    return await notifications_page(db_session, current_user, limit, cursor, offset, include_total)
 
-    notifications = await ns.get_notifications(db_session, current_user.id, limit, offset)
-    unread_count = await ns.get_unread_count(db_session, current_user.id)
 
-    total_result = await db_session.execute(
-        select(func.count())
-        .select_from(models.Notification)
-        .where(models.Notification.owner_id == current_user.id)
+async def notifications_page(
+    db_session: AsyncSession,
+    current_user: oauth2.Principal,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    include_total: bool = True,
+) -> dict:
+    """The cached page behind GET /me/notifications — also filled ahead of time by prewarm_service."""
+    cache_key = await versioned_key(f"notifications:{current_user.id}:{page_key(cursor, offset)}:{limit}:{int(include_total)}", f"notifications:{current_user.id}")
+    return await cached(
+        cache_key, db_session, _load_notifications,
+        current_user, limit, cursor, offset, include_total,
+        ttl=20, hard_ttl=120,
     )
-    total = total_result.scalar() or 0
+
+
+async def _load_notifications(
+    db_session: AsyncSession,
+    current_user: oauth2.Principal,
+    limit: int,
+    cursor: Optional[str],
+    offset: int,
+    include_total: bool,
+) -> tuple[dict, tuple]:
+    # the page, the unread badge and the total are independent reads
+    reads = [
+        lambda s: ns.get_notifications(s, current_user.id, limit, offset, cursor),
+        lambda s: ns.get_unread_count(s, current_user.id),
+    ]
+    if include_total:
+        reads.append(lambda s: totals_service.user_counter(s, current_user.id, "notifications_cnt"))
+    (notifications, next_cursor), unread_count, *counter = await gather_reads(db_session, *reads)
+    total = counter[0] if counter else None
 
     result = sch.NotificationListResponse(
         notifications=notifications,
@@ -43,10 +70,10 @@ async def get_my_notifications(
         total=total,
         limit=limit,
         offset=offset,
-        has_more=(offset + limit) < total,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
     )
-    await set_cache(cache_key, result.model_dump(mode="json"), ttl=20)
-    return result
+    return result.model_dump(mode="json"), ()
 
 
 @router.get(
@@ -57,18 +84,14 @@ async def get_my_notifications(
 
 async def get_unread_notification_count(
     db_session: AsyncSession = Depends(db.getDb),
-    current_user: models.User = Depends(oauth2.getCurrentUser),
+    current_user: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),
 ):
     """Return the unread notification count — used for the badge number in the UI."""
-    cache_key = f"notif:unread:{current_user.id}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
+    async def load(db_session):
+        count = await ns.get_unread_count(db_session, current_user.id)
+        return sch.UnreadCountResponse(count=count).model_dump(mode="json"), ()
 
-    count = await ns.get_unread_count(db_session, current_user.id)
-    result = sch.UnreadCountResponse(count=count)
-    await set_cache(cache_key, result.model_dump(mode="json"), ttl=20)
-    return result
+    return await cached(f"notif:unread:{current_user.id}", db_session, load, ttl=20, hard_ttl=120)
 
 
 @router.patch(
@@ -78,11 +101,11 @@ async def get_unread_notification_count(
 )
 async def mark_all_notifications_read(
     db_session: AsyncSession = Depends(db.getDb),
-    current_user: models.User = Depends(oauth2.getCurrentUser),
+    current_user: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),
 ):
     """Mark every unread notification for the current user as read."""
     await ns.mark_all_read(db_session, current_user.id)
     # Invalidate notification caches for this user
-    await delete_cache_pattern(f"notifications:{current_user.id}:*")
-    await delete_cache_pattern(f"notif:unread:{current_user.id}")
+    await bump(f"notifications:{current_user.id}")
+    await delete_cache(f"notif:unread:{current_user.id}")
     return sch.SuccessResponse(message="All notifications marked as read")
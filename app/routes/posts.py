@@ -1,12 +1,14 @@
-from fastapi import status,HTTPException,Depends,APIRouter,Form,UploadFile,File
+from fastapi import status,HTTPException,Depends,APIRouter,Form,UploadFile,File,BackgroundTasks
 import app.schemas as sch
 from app.rate_limiter import create_post_limiter
 from typing import Optional
-from app import models,oauth2
+from app import models,oauth2,totals_service,author_snapshots,timeline_service,explore_ranking,seen_filter,trending_service,related_posts
 from app.db import getDb
-from app.redis_service import get_cache, set_cache, delete_cache, delete_cache_pattern
+from app.redis_service import delete_cache, bump, invalidate
+from app.page_cache import cached
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select,and_
+from sqlalchemy.orm import joinedload
 import os,uuid
 import asyncio
 from app.config import settings
@@ -15,16 +17,21 @@ router=APIRouter(
     tags=['Posts']
 )
 
+# the owner snippet shown on a post detail — nothing else of the User row
+def _owner_loader():
+    return joinedload(models.Post.user).load_only(models.User.username,models.User.nickname,models.User.profile_picture)
+
 # gets a specific post with id -> {postId}
 @router.get("/posts/getPost/{postId}", response_model=sch.PostDetailResponse)
-async def getPost(postId:int,db:AsyncSession=Depends(getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
-    # Check Redis cache first
-    cache_key = f"post:{postId}:{currentUser.id}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
+async def getPost(postId:int,db:AsyncSession=Depends(getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
+    post=await cached(f"post:{postId}:{currentUser.id}",db,_loadPost,postId,currentUser,ttl=120,hard_ttl=1200)
+    # post_views is the permanent record; explore checks the cheap one (seen_filter.py)
+    await seen_filter.mark_seen(currentUser.id, [postId])
+    return post
+
 
-    result=await db.execute(select(models.Post).where(models.Post.id==postId))
+async def _loadPost(db:AsyncSession,postId:int,currentUser:oauth2.Principal):
+    result=await db.execute(select(models.Post).where(models.Post.id==postId).options(_owner_loader()))
     reqPost=result.scalars().first()
     if reqPost==None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail=f"post with id {postId} not found")
@@ -41,6 +48,8 @@ async def getPost(postId:int,db:AsyncSession=Depends(getDb),currentUser:models.U
         reqPost.views+=1
         await db.commit()
         await db.refresh(reqPost)  # Refresh to get updated post data
+        await explore_ranking.mark_dirty(postId)
+        await trending_service.record(postId, "view", reqPost.hashtags)
     
     # Check if liked
     likeResult=await db.execute(select(models.Votes).where(models.Votes.post_id == postId, models.Votes.user_id == currentUser.id, models.Votes.action == True))
@@ -72,10 +81,10 @@ async def getPost(postId:int,db:AsyncSession=Depends(getDb),currentUser:models.U
         hashtags=reqPost.hashtags,
         created_at=reqPost.created_at,
         is_liked=is_liked,
+        top_comments=reqPost.top_comments,
         owner=owner
     )
-    await set_cache(cache_key, result_response.model_dump(mode="json"), ttl=120)
-    return result_response
+    return result_response.model_dump(mode="json"), [f"post:{postId}", f"user:{reqPost.user.id}"]
 
 
 # creates a new post using sqlAlchemy
@@ -83,9 +92,11 @@ async def getPost(postId:int,db:AsyncSession=Depends(getDb),currentUser:models.U
 async def create_post(
     title:str=Form(...),
     content:str=Form(...),
+    hashtags:Optional[str]=Form(None),
     media:Optional[UploadFile]=File(None),  # Optional file
     db: AsyncSession=Depends(getDb),
-    currentUser:models.User=Depends(oauth2.getCurrentUser),
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal),
+    background_tasks:BackgroundTasks=BackgroundTasks(),
     _:None=Depends(create_post_limiter),
 ):
     # set to None change if uploaded later
@@ -106,16 +117,25 @@ async def create_post(
     new_post = models.Post(
         title=title,
         content=content,
+        hashtags=hashtags,
         media_path=media_path,
         media_type=media_type,
-        user_id=currentUser.id
+        user_id=currentUser.id,
+        **author_snapshots.snapshot_values(currentUser)
     )
     db.add(new_post)
+    await totals_service.bump_user_counter(db, currentUser.id, "posts_cnt", 1)
     await db.commit()
     await db.refresh(new_post)
     # Invalidate feed and user posts caches
-    await delete_cache_pattern("feed:*")
-    await delete_cache_pattern(f"user:posts:{currentUser.id}:*")
+    await bump("feed", f"user_posts:{currentUser.id}")
+    # push the post into the followers' home timelines
+    background_tasks.add_task(timeline_service.fan_out, new_post.id, currentUser.id, new_post.created_at)
+    # and let the explore ranking see it on the next rescore tick
+    await explore_ranking.mark_dirty(new_post.id)
+    # a tagged post gets its related list now instead of at the next rebuild
+    if new_post.hashtags:
+        background_tasks.add_task(related_posts.index_post, new_post.id, new_post.hashtags, new_post.created_at)
     
     # Build proper response
     media_url = None
@@ -146,7 +166,7 @@ async def create_post(
     )
 # delets a specific post with the mentioned id -> {id}
 @router.delete("/posts/deletePost/{postId}", response_model=sch.SuccessResponse)
-async def deletePost(postId:int,db:AsyncSession=Depends(getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def deletePost(postId:int,db:AsyncSession=Depends(getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal),background_tasks:BackgroundTasks=BackgroundTasks()):
     result=await db.execute(select(models.Post).where(and_(models.Post.id==postId,models.Post.user_id==currentUser.id)))
     postToDelete=result.scalars().first()
     if not postToDelete:
@@ -155,24 +175,28 @@ async def deletePost(postId:int,db:AsyncSession=Depends(getDb),currentUser:model
     if postToDelete.media_path:
         await delete_blob("posts-media", postToDelete.media_path)
     await db.delete(postToDelete)
+    await totals_service.bump_user_counter(db, currentUser.id, "posts_cnt", -1)
     await db.commit()
     # Invalidate caches for this post, feeds, and user posts
-    await delete_cache_pattern(f"post:{postId}:*")
-    await delete_cache_pattern("feed:*")
-    await delete_cache_pattern(f"user:posts:{currentUser.id}:*")
-    await delete_cache_pattern(f"comments:post:{postId}:*")
+    await invalidate(f"post:{postId}")
+    await bump("feed", f"user_posts:{currentUser.id}", f"comments:{postId}")
+    background_tasks.add_task(timeline_service.retract, postId, currentUser.id)
+    await explore_ranking.forget(postId)
+    await trending_service.forget_post(postId)
+    await related_posts.forget(postId, postToDelete.hashtags)
     return sch.SuccessResponse(message=f"Post {postToDelete.id} deleted successfully")
 
 # update a specific post with id -> {id}
 @router.put("/posts/editPost/{postId}", response_model=sch.PostDetailResponse)
-async def editPost(postId:int,post:sch.PostUpdateRequest,db:AsyncSession=Depends(getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
-    result=await db.execute(select(models.Post).where(models.Post.id==postId))
+async def editPost(postId:int,post:sch.PostUpdateRequest,db:AsyncSession=Depends(getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal),background_tasks:BackgroundTasks=BackgroundTasks()):
+    result=await db.execute(select(models.Post).where(models.Post.id==postId).options(_owner_loader()))
     postToUpdate=result.scalars().first()
     if not postToUpdate:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail=f"post with Id {postId} not Found")
     # from our argument of post we exclude the None values
     # and just pick up the set values and store into a dict update_data
     update_data = post.dict(exclude_unset=True)
+    oldHashtags = postToUpdate.hashtags
     # now we traverse thorugh the update_data and put that data
     # in our postToUpdate
     for key, value in update_data.items():
@@ -184,8 +208,11 @@ async def editPost(postId:int,post:sch.PostUpdateRequest,db:AsyncSession=Depends
     # sent as {} to the front End
     await db.refresh(postToUpdate)
     # Invalidate cached post data and feeds
-    await delete_cache_pattern(f"post:{postId}:*")
-    await delete_cache_pattern("feed:*")
+    await invalidate(f"post:{postId}")
+    # re-tagged: leave the old tags' postings and score against the new ones
+    if "hashtags" in update_data and update_data["hashtags"] != oldHashtags:
+        await related_posts.forget(postId, oldHashtags)
+        background_tasks.add_task(related_posts.index_post, postId, postToUpdate.hashtags, postToUpdate.created_at)
     
     # Build proper response
     media_url = None
@@ -212,5 +239,12 @@ async def editPost(postId:int,post:sch.PostUpdateRequest,db:AsyncSession=Depends
         enable_comments=postToUpdate.enable_comments,
         hashtags=postToUpdate.hashtags,
         created_at=postToUpdate.created_at,
+        top_comments=postToUpdate.top_comments,
         owner=owner
-    )
\ No newline at end of file
+    )
+
+# posts sharing (or commonly paired with) this post's hashtags — precomputed by related_posts.py
+@router.get("/posts/{postId}/related", response_model=sch.RelatedPostsResponse)
+async def relatedPosts(postId:int,currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
+    related = await related_posts.read(postId)
+    return sch.RelatedPostsResponse(post_id=postId, related=related or [])
@@ -1,75 +1,63 @@
 from fastapi import HTTPException,status,Body,APIRouter,Depends,Request,Query
-from app import models,db,schemas as sch,oauth2,config
+from app import models,schemas as sch,oauth2,config,totals_service,list_queries
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select,func
+from sqlalchemy import select
 from typing import Annotated
-from app.blob_service import get_blob_url
+from app.read_routing import getReadDb
 router=APIRouter(tags=['search'])
 
 @router.get("/search", status_code=status.HTTP_202_ACCEPTED, response_model=sch.SearchResultResponse)
-async def search(searchParams: sch.SearchRequest = Depends(), db: AsyncSession = Depends(db.getDb), currenUser: models.User = Depends(oauth2.getCurrentUser)):
+async def search(searchParams: sch.SearchRequest = Depends(), db: AsyncSession = Depends(getReadDb), currenUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)):
     if searchParams.q and searchParams.q.startswith("#"):
         # Hashtag search - search for posts
         hashtag = searchParams.q.lstrip("#")
-        base_query=select(models.Post).where(models.Post.hashtags.ilike(f"%{hashtag}%"))
+        match=models.Post.hashtags.ilike(f"%{hashtag}%")
+        base_query=list_queries.post_list_select().where(match)
         if searchParams.orderBy == "likes":
             base_query=base_query.order_by(models.Post.likes.desc())
         base_query=base_query.order_by(models.Post.created_at.asc())
         
-        # Count total
-        count_query=select(func.count()).select_from(models.Post).where(models.Post.hashtags.ilike(f"%{hashtag}%"))
-        totalResult=await db.execute(count_query)
-        total=totalResult.scalar()
+        # an ILIKE '%..%' count is a full scan, so only the planner's estimate is returned
+        total=None
+        if searchParams.include_total:
+            total=await totals_service.estimate_rows(db,select(models.Post.id).where(match))
         
-        # Fetch paginated results
-        postsResult=await db.execute(base_query.offset(searchParams.offset).limit(searchParams.limit))
-        resPosts=postsResult.scalars().all()
-        
-        # Build proper response for posts
-        posts = []
-        for post in resPosts:
-            posts.append(sch.PostListItemResponse(
-                id=post.id,
-                title=post.title,
-                media_url=get_blob_url("posts-media", post.media_path) if post.media_path else None,
-                media_type=post.media_type,
-                likes=post.likes,
-                comments_count=post.comments_cnt,
-                created_at=post.created_at
-            ))
+        # Fetch paginated results (one extra row tells us if there is a next page)
+        postsResult=await db.execute(base_query.offset(searchParams.offset).limit(searchParams.limit+1))
+        resPosts=postsResult.all()
+        has_more=len(resPosts)>searchParams.limit
+        posts=[list_queries.post_item(row) for row in resPosts[:searchParams.limit]]
         
         return sch.SearchResultResponse(
             result_type="posts",
             posts=posts,
-            total=total
+            total=total,
+            has_more=has_more
         )
     elif searchParams.q:
         # Username search - search for users
+        match=models.User.username.ilike(f"%{searchParams.q}%")
         usersResult=await db.execute(
-            select(models.User)
-            .where(models.User.username.ilike(f"%{searchParams.q}%"))
+            list_queries.user_list_select()
+            .where(match)
             .offset(searchParams.offset)
-            .limit(searchParams.limit)
+            .limit(searchParams.limit+1)
         )
-        resUsers=usersResult.scalars().all()
+        resUsers=usersResult.all()
+        has_more=len(resUsers)>searchParams.limit
+        resUsers=resUsers[:searchParams.limit]
         
-        countResult=await db.execute(select(func.count()).select_from(models.User).where(models.User.username.ilike(f"%{searchParams.q}%")))
-        total=countResult.scalar()
+        total=None
+        if searchParams.include_total:
+            total=await totals_service.estimate_rows(db,select(models.User.id).where(match))
         
-        # Build proper response for users
-        users = []
-        for user in resUsers:
-            users.append(sch.UserBasicResponse(
-                id=user.id,
-                username=user.username,
-                nickname=user.nickname,
-                profile_pic=user.profile_picture
-            ))
+        users=[list_queries.user_item(row) for row in resUsers]
         
         return sch.SearchResultResponse(
             result_type="users",
             users=users,
-            total=total
+            total=total,
+            has_more=has_more
         )
     else:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Query Parameters Required")
\ No newline at end of file
@@ -0,0 +1,28 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+import app.schemas as sch
+from app import oauth2, trending_service
+
+router = APIRouter(tags=["trending"])
+
+# Both answered from the Redis buckets alone (trending_service.py) — no Postgres
+
+@router.get("/trending/posts", response_model=sch.TrendingPostsResponse)
+async def getTrendingPosts(window: Literal["1h", "24h"] = Query("1h"),
+    limit: int = Query(20, ge=1, le=100),
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)
+    ):
+    top = await trending_service.top("posts", window, limit)
+    return sch.TrendingPostsResponse(window=window, posts=[
+        sch.TrendingPostItem(post_id=int(member), score=score) for member, score in top
+    ])
+
+@router.get("/trending/hashtags", response_model=sch.TrendingHashtagsResponse)
+async def getTrendingHashtags(window: Literal["1h", "24h"] = Query("1h"),
+    limit: int = Query(20, ge=1, le=100),
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)
+    ):
+    top = await trending_service.top("tags", window, limit)
+    return sch.TrendingHashtagsResponse(window=window, hashtags=[
+        sch.TrendingHashtagItem(tag=member, score=score) for member, score in top
+    ])
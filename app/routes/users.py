@@ -1,67 +1,57 @@
 from fastapi import status,HTTPException,Depends,Body,APIRouter,Query
-from typing import List
+from typing import List,Optional
 import app.schemas as sch
-from app import models,db,oauth2
+from app import models,db,oauth2,totals_service,list_queries
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select,func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
 import app.my_utils.utils as utils
 import os
-from app.redis_service import get_cache, set_cache, delete_cache, delete_cache_pattern
+from app.redis_service import delete_cache, versioned_key
+from app.page_cache import cached
 from app.rate_limiter import signup_limiter
 from app.blob_service import get_blob_url
+from app.my_utils.pagination import keyset,page,page_key
+from app.read_routing import getReadDb
 router=APIRouter(
     tags=['Users']
 )
 
 @router.get("/users/{user_id}/profile",status_code=status.HTTP_200_OK,response_model=sch.UserProfileResponse)
-async def userProfile(user_id:int,db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def userProfile(user_id:int,db:AsyncSession=Depends(getReadDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     # Explicitly check if following
-    is_following_query = await db.execute(
-        select(models.connections).where(
-            models.connections.c.follower_id == currentUser.id,
-            models.connections.c.followed_id == user_id
-        )
+    is_following_stmt = select(models.connections.c.follower_id).where(
+        models.connections.c.follower_id == currentUser.id,
+        models.connections.c.followed_id == user_id
     )
-    is_following = is_following_query.first() is not None
-
-    # Check Redis cache first 
-    cache_key = f"user_profile:{user_id}"
-    cached = await get_cache(cache_key)
-    if cached:
-        # Cache HIT → return the cached dict directly (FastAPI serializes it)
-        cached["is_following"] = is_following
-        return cached
 
-    # Cache MISS → query the database
-    result=await db.execute(select(models.User).where(models.User.id==user_id))
-    user=result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
-    
-    # Count posts via query instead of len(user.posts) for efficiency
-    posts_count_result = await db.execute(select(func.count()).select_from(models.Post).where(models.Post.user_id==user_id))
-    posts_count = posts_count_result.scalar()
-    
-    result_response = sch.UserProfileResponse(
-        id=user.id,
-        username=user.username,
-        nickname=user.nickname,
-        bio=user.bio or "",
-        profile_picture=user.profile_picture,
-        posts_count=posts_count,
-        followers_count=user.followers_cnt,
-        following_count=user.following_cnt,
-        is_following=is_following,
-        created_at=user.created_at
-    )
-
-    #  Store in Redis for 120 seconds
-    await set_cache(cache_key, result_response.model_dump(mode="json"), ttl=120)
-    return result_response
+    # the profile is the same for every viewer — fresh for 120 seconds, served
+    # stale (and refreshed behind) up to 20 minutes, loaded once per miss, from
+    # the primary (shared entry, see page_cache.py)
+    async def load(db):
+        result=await db.execute(select(models.User).where(models.User.id==user_id))
+        user=result.scalars().first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
+        # posts_cnt is maintained on write, no COUNT(*) needed
+        profile = sch.UserProfileResponse(
+            id=user.id,
+            username=user.username,
+            nickname=user.nickname,
+            bio=user.bio or "",
+            profile_picture=user.profile_picture,
+            posts_count=user.posts_cnt,
+            followers_count=user.followers_cnt,
+            following_count=user.following_cnt,
+            created_at=user.created_at
+        )
+        return profile.model_dump(mode="json"), ()
+    profile = await cached(f"user_profile:{user_id}", db, load, ttl=120, hard_ttl=1200, shared=True)
+    # is_following is per viewer; the cached dict is shared (L1), so answer with a copy
+    is_following = (await db.execute(is_following_stmt)).first() is not None
+    return {**profile, "is_following": is_following}
 
 @router.get("/users/{user_id}/profile/pic",status_code=status.HTTP_200_OK, response_model=sch.MediaInfo)
-async def myProfilePicture(user_id:int,db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
+async def myProfilePicture(user_id:int,db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     # get the current users profile pic
     result=await db.execute(select(models.User).where(models.User.id==user_id))
     user=result.scalars().first()
@@ -89,136 +79,78 @@ async def createUser(userData:sch.UserSignupRequest=Body(...),db:AsyncSession=De
 
 @router.get("/users/getAllUsers",status_code=status.HTTP_201_CREATED,response_model=List[sch.UserResponse])
 async def getAllUsers(db:AsyncSession=Depends(db.getDb)):
-    # Check the cache first
-    cached = await get_cache("all_users")
-    if cached:
-        return cached   # cache HIT
-
-    #  Cache MISS → hit DB
-    result=await db.execute(select(models.User))
-    allUsers=result.scalars().all()
-
-    # Build serializable list & cache it for 60 seconds
-    users_data = [sch.UserResponse.model_validate(u).model_dump(mode="json") for u in allUsers]
-    await set_cache("all_users", users_data, ttl=60)
-
-    return allUsers
+    # Cache MISS → hit DB, build a serializable list & cache it for 60 seconds
+    async def load(db):
+        result=await db.execute(select(models.User))
+        return [sch.UserResponse.model_validate(u).model_dump(mode="json") for u in result.scalars().all()], ()
+    return await cached("all_users", db, load, ttl=60, hard_ttl=600)
+
+async def _ensure_user(db:AsyncSession,user_id:int):
+    exists=await db.execute(select(models.User.id).where(models.User.id==user_id))
+    if exists.scalar() is None:
+        raise HTTPException(status_code=404,detail="User not found")
 
 @router.get("/users/{user_id}/followers",status_code=status.HTTP_200_OK, response_model=List[sch.UserBasicResponse])
-async def get_followers(user_id:int,db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
-    # Check Redis cache
-    cache_key = f"followers:{user_id}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
-
-    # explicit selectinload needed for self-referential many-to-many in async
-    result=await db.execute(
-        select(models.User)
-        .where(models.User.id == user_id)
-        .options(selectinload(models.User.followers))
-    )
-    user=result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404,detail="User not found")
-    # Build proper response
-    followers = []
-    for follower in user.followers:
-        followers.append(sch.UserBasicResponse(
-            id=follower.id,
-            username=follower.username,
-            nickname=follower.nickname,
-            profile_pic=follower.profile_picture
-        ))
-    await set_cache(cache_key, [f.model_dump(mode="json") for f in followers], ttl=120)
-    return followers
+async def get_followers(user_id:int,db:AsyncSession=Depends(getReadDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
+    async def load(db):
+        await _ensure_user(db,user_id)
+        # people whose follower_id points at user_id, straight off the connections table
+        result=await db.execute(
+            list_queries.user_list_select()
+            .join(models.connections, models.connections.c.follower_id == models.User.id)
+            .where(models.connections.c.followed_id == user_id)
+        )
+        return [list_queries.user_item(row) for row in result.all()], ()
+    return await cached(f"followers:{user_id}", db, load, ttl=120, hard_ttl=1200, shared=True)
 
 @router.get("/users/{user_id}/following",status_code=status.HTTP_200_OK, response_model=List[sch.UserBasicResponse])
-async def get_following(user_id:int,db:AsyncSession=Depends(db.getDb),currentUser:models.User=Depends(oauth2.getCurrentUser)):
-    # Check Redis cache
-    cache_key = f"following:{user_id}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
-
-    # explicit selectinload needed for self-referential many-to-many in async
-    result=await db.execute(
-        select(models.User)
-        .where(models.User.id == user_id)
-        .options(selectinload(models.User.following))
-    )
-    user=result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404,detail="User not found")
-    # Build proper response
-    following = []
-    for followed_user in user.following:
-        following.append(sch.UserBasicResponse(
-            id=followed_user.id,
-            username=followed_user.username,
-            nickname=followed_user.nickname,
-            profile_pic=followed_user.profile_picture
-        ))
-    await set_cache(cache_key, [f.model_dump(mode="json") for f in following], ttl=120)
-    return following
+async def get_following(user_id:int,db:AsyncSession=Depends(getReadDb),currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
+    async def load(db):
+        await _ensure_user(db,user_id)
+        result=await db.execute(
+            list_queries.user_list_select()
+            .join(models.connections, models.connections.c.followed_id == models.User.id)
+            .where(models.connections.c.follower_id == user_id)
+        )
+        return [list_queries.user_item(row) for row in result.all()], ()
+    return await cached(f"following:{user_id}", db, load, ttl=120, hard_ttl=1200, shared=True)
 
 @router.get("/users/{user_id}/posts", response_model=sch.PostListResponse)  
 async def getAllPosts(user_id:int,limit:int=Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     offset: int = Query(0,ge=0),
-    db:AsyncSession=Depends(db.getDb),
-    currentUser:models.User=Depends(oauth2.getCurrentUser)
+    include_total: bool = Query(True, description="false skips the total and only returns has_more"),
+    db:AsyncSession=Depends(getReadDb),
+    currentUser:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)
     ):
-    # Check Redis cache
-    cache_key = f"user:posts:{user_id}:{offset}:{limit}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return cached
-
-    # calculate the total number of posts of the user
-    countResult=await db.execute(select(func.count()).select_from(models.Post).where(models.Post.user_id==user_id))
-    total=countResult.scalar()
-    # only fetch the first 'limit' posts after skipping the first 'offset' posts
-    # and order them by the latest as first
-    postsResult=await db.execute(select(models.Post).where(models.Post.user_id==user_id).order_by(models.Post.created_at.desc()).offset(offset).limit(limit))
-    paginatedPosts=postsResult.scalars().all()
+    cache_key = await versioned_key(f"user:posts:{user_id}:{page_key(cursor,offset)}:{limit}:{int(include_total)}", f"user_posts:{user_id}")
+    return await cached(cache_key, db, _loadUserPosts, currentUser, user_id, limit, cursor, offset, include_total, ttl=60, hard_ttl=600, shared=True)
+
+async def _loadUserPosts(db:AsyncSession, currentUser:oauth2.Principal, user_id:int, limit:int,
+    cursor:Optional[str], offset:int, include_total:bool) -> tuple[dict, list[str]]:
+    # the post count is kept on the users row, no COUNT(*) needed
+    total=await totals_service.user_counter(db,user_id,"posts_cnt") if include_total else None
+    # only fetch the 'limit' posts older than the cursor (latest first)
+    postsResult=await db.execute(keyset(
+        list_queries.post_list_select().where(models.Post.user_id==user_id),
+        models.Post.created_at,models.Post.id,limit,cursor,offset
+    ))
+    rows,next_cursor=page(postsResult.all(),limit)
 
     # Determine which posts the current user has liked
-    liked_ids: set[int] = set()
-    if paginatedPosts:
-        post_ids = [p.id for p in paginatedPosts]
-        liked_result = await db.execute(
-            select(models.Votes.post_id)
-            .where(models.Votes.user_id == currentUser.id, models.Votes.post_id.in_(post_ids), models.Votes.action == True)
-        )
-        liked_ids = {row[0] for row in liked_result.all()}
-
-    # Build proper response
-    posts = []
-    for post in paginatedPosts:
-        media_url = None
-        if post.media_path:
-            media_url = get_blob_url("posts-media", post.media_path)
-        posts.append(sch.PostListItemResponse(
-            id=post.id,
-            title=post.title,
-            media_url=media_url,
-            media_type=post.media_type,
-            likes=post.likes,
-            comments_count=post.comments_cnt,
-            is_liked=post.id in liked_ids,
-            created_at=post.created_at
-        ))
+    liked_ids = await list_queries.liked_post_ids(db,currentUser.id,[r.id for r in rows])
+    posts = [list_queries.post_item(r,liked_ids) for r in rows]
     
     pagination = sch.PaginationMetadata(
         total=total,
         limit=limit,
         offset=offset,
-        has_more=(limit+offset)<total
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor
     )
     
     result = sch.PostListResponse(
         posts=posts,
         pagination=pagination
     )
-    await set_cache(cache_key, result.model_dump(mode="json"), ttl=60)
-    return result
\ No newline at end of file
+    return result.model_dump(mode="json"), list_queries.post_tags(rows)
\ No newline at end of file
@@ -8,10 +8,11 @@ from fastapi import Query
 
 class PaginationMetadata(BaseModel):
     """Reusable pagination metadata"""
-    total: int
+    total: Optional[int] = None  # None when the client passed include_total=false
     limit: int
     offset: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 class SuccessResponse(BaseModel):
     """General Success response"""
@@ -126,6 +127,20 @@ class PostUpdateRequest(BaseModel):
     enable_comments: Optional[bool] = None
     hashtags: Optional[str] = None
 
+class CommentPreviewItem(BaseModel):
+    """A comment inside a post's comment preview"""
+    id: int
+    post_id: int
+    content: str
+    likes: int
+    created_at: datetime
+    user: UserBasicResponse
+
+class CommentPreview(BaseModel):
+    """Most liked comments plus the newest one, shown under a post card"""
+    top: List[CommentPreviewItem] = []
+    latest: Optional[CommentPreviewItem] = None
+
 class PostDetailResponse(BaseModel):
     """Complete post details"""
     id: int
@@ -141,6 +156,7 @@ class PostDetailResponse(BaseModel):
     hashtags: Optional[str] = None
     created_at: datetime
     is_liked: bool = False
+    top_comments: Optional[CommentPreview] = None
     owner: UserBasicResponse
     
     model_config = ConfigDict(from_attributes=True)
@@ -155,6 +171,7 @@ class PostListItemResponse(BaseModel):
     comments_count: int
     created_at: datetime
     is_liked: bool = False
+    top_comments: Optional[CommentPreview] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -232,13 +249,15 @@ class SearchRequest(BaseModel):
     limit: int = Field(10, ge=1, le=100)
     offset: int = Field(0, ge=0)
     orderBy: Optional[str] = "created_at"
+    include_total: bool = True
 
 class SearchResultResponse(BaseModel):
     """Search result response"""
     result_type: str  # "users" or "posts"
     users: Optional[List[UserBasicResponse]] = None
     posts: Optional[List[PostListItemResponse]] = None
-    total: int
+    total: Optional[int] = None  # planner estimate, not an exact count
+    has_more: bool = False
 
 # FEED SCHEMAS
 
@@ -251,7 +270,37 @@ class FeedItemResponse(BaseModel):
 class FeedResponse(BaseModel):
     """Feed response with pagination"""
     feed: List[FeedItemResponse]
-    total: int
+    total: Optional[int] = None
+    has_more: bool = False
+    next_cursor: Optional[str] = None
+    # cursor of the newest post on the page — pass it as `since` to /feed/home/new-count
+    latest_cursor: Optional[str] = None
+
+class NewPostsCountResponse(BaseModel):
+    """Home feed posts newer than the client's `since` cursor"""
+    count: int
+
+class RelatedPostsResponse(BaseModel):
+    """Ids of posts related to post_id by hashtags, best first"""
+    post_id: int
+    related: List[int]
+
+class TrendingPostItem(BaseModel):
+    """A trending post id and its decayed score (hydrate with /posts/getPost)"""
+    post_id: int
+    score: float
+
+class TrendingPostsResponse(BaseModel):
+    window: str
+    posts: List[TrendingPostItem]
+
+class TrendingHashtagItem(BaseModel):
+    tag: str
+    score: float
+
+class TrendingHashtagsResponse(BaseModel):
+    window: str
+    hashtags: List[TrendingHashtagItem]
 
 # PASSWORD & OTP SCHEMAS
 
@@ -483,10 +532,11 @@ class NotificationListResponse(BaseModel):
     """Paginated list of notifications."""
     notifications: List[NotificationResponse]
     unread_count: int
-    total: int
+    total: Optional[int] = None
     limit: int
     offset: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 class UnreadCountResponse(BaseModel):
     """Unread notification badge count."""
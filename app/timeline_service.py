@@ -0,0 +1,343 @@
+# timeline_service.py
+# Precomputed home timelines: one Redis sorted set per user.
+#
+# WHY?
+#   Building /feed/home on demand means "posts WHERE user_id IN (everyone I
+#   follow) ORDER BY created_at" — the more people you follow, the more
+#   index ranges Postgres has to merge for every page. Instead each new
+#   post is pushed once, at write time, into the timeline of every follower
+#   ("fan-out on write"), and reading a page is a single ZRANGE.
+#
+# LAYOUT:
+#   timeline:<user_id>  ZSET  member = post id, zero-padded (member()),
+#                             score  = post created_at in µs since the epoch
+#   plus one SENTINEL member with score 0 that marks the timeline as built
+#   (an empty ZSET doesn't exist in Redis, and "follows nobody" must not
+#   look like "never built"). Pages are read with min "(0" so it never
+#   shows up. Redis orders equal scores by member bytes, and padding makes
+#   that the id order — so a timeline is sorted by (created_at, id) exactly
+#   like the SQL fallback, and a cursor continues after the last
+#   (score, id) served: the rest of its score, then strictly below it.
+#   Each timeline keeps the newest TIMELINE_MAX_LEN posts and
+#   expires after TIMELINE_TTL seconds without reads.
+#
+# WHO WRITES:
+#   - create_post → fan_out()    (BackgroundTask)
+#   - deletePost  → retract()    (BackgroundTask)
+#   - follow / unfollow / remove_follower → rebuild() for the follower
+#   - a cold user (no key, e.g. expired) → rebuild() inline on first read
+#   rebuild() WATCHes the timeline while it reads the database and swaps a
+#   freshly built copy in with RENAME; a fan_out() landing in between
+#   voids the swap and the rebuild starts over with that post included.
+#   Fan-out only touches timelines that already exist; cold followers get
+#   the post when their timeline is rebuilt from the database.
+#
+# PULL MODEL (big authors):
+#   Pushing one post into a million timelines is too much work per post,
+#   so authors with FEED_PULL_THRESHOLD+ followers are never fanned out.
+#   Each of them keeps author:recent:<author_id> instead — the same ZSET
+#   layout, AUTHOR_RECENT_LEN ids long. A reader's page is then a lazy
+#   k-way merge (heapq.merge) of their own timeline and the recent lists
+#   of the big authors they follow, cut off as soon as the page is full.
+#   The threshold is checked per author, so both models run side by side.
+#
+# NEW POSTS:
+#   count_since() answers "how many newer than the post I'm showing" with
+#   one ZCOUNT per source (GET /feed/home/new-count). fan_out() also
+#   publishes the post id on feed-updates:<follower_id>, or once on
+#   feed-updates:author:<author_id> for a big author, which is what the SSE
+#   stream in feed_updates.py listens to.
+#
+# Redis being down is never fatal: read_page() returns None and the route
+# falls back to the SQL query it has always run.
+
+import heapq
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Iterable, Optional
+from sqlalchemy import func, select
+from redis.exceptions import WatchError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, redis_service
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.my_utils.pagination import decode_cursor
+
+# ── Patchable session factory (same pattern as notification_service) ──
+_session_factory = AsyncSessionLocal
+
+SENTINEL = "-"
+_MEMBER_WIDTH = 12
+_REBUILD_ATTEMPTS = 3
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def timeline_key(user_id: int) -> str:
+    return f"timeline:{user_id}"
+
+
+def recent_key(author_id: int) -> str:
+    return f"author:recent:{author_id}"
+
+
+def updates_channel(user_id: int) -> str:
+    return f"feed-updates:{user_id}"
+
+
+def author_channel(author_id: int) -> str:
+    return f"feed-updates:author:{author_id}"
+
+
+def member(post_id: int) -> str:
+    return f"{post_id:0{_MEMBER_WIDTH}d}"
+
+
+def score(created_at: datetime) -> int:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (created_at - _EPOCH) // _MICROSECOND
+
+
+def _followers_of(author_id: int):
+    return select(models.connections.c.follower_id).where(models.connections.c.followed_id == author_id)
+
+
+def _followed_by(user_id: int, pull: bool):
+    """Authors `user_id` follows on one side of the push/pull split."""
+    big = models.User.followers_cnt >= settings.feed_pull_threshold
+    return (
+        select(models.connections.c.followed_id)
+        .join(models.User, models.User.id == models.connections.c.followed_id)
+        .where(models.connections.c.follower_id == user_id, big if pull else ~big)
+    )
+
+
+def _trim(pipe, key: str, max_len: int) -> None:
+    # rank 0 is the sentinel (score 0) — keep it and the newest max_len posts
+    pipe.zremrangebyrank(key, 1, -(max_len + 2))
+
+
+async def _is_pull_author(db: AsyncSession, author_id: int) -> bool:
+    followers = (await db.execute(select(models.User.followers_cnt).where(models.User.id == author_id))).scalar()
+    return (followers or 0) >= settings.feed_pull_threshold
+
+
+# ── Writes ──
+
+async def fan_out(post_id: int, author_id: int, created_at: datetime) -> None:
+    """Push a new post into the timelines of the author's (warm) followers."""
+    post = {member(post_id): score(created_at)}
+    async with _session_factory() as db:
+        pull = await _is_pull_author(db, author_id)
+        followers = [] if pull else (await db.execute(_followers_of(author_id))).scalars().all()
+    try:
+        # keep the author's own recent list current if anyone has built it
+        pipe = redis_service.redis_client.pipeline(transaction=False)
+        pipe.exists(recent_key(author_id))
+        for follower_id in followers:
+            pipe.exists(timeline_key(follower_id))
+        has_recent, *warm = await pipe.execute()
+
+        pipe = redis_service.redis_client.pipeline(transaction=False)
+        if has_recent:
+            pipe.zadd(recent_key(author_id), post)
+            _trim(pipe, recent_key(author_id), settings.author_recent_len)
+        if pull:
+            # a big author's followers listen on the author's own channel
+            pipe.publish(author_channel(author_id), post_id)
+        for follower_id, exists in zip(followers, warm):
+            if exists:
+                pipe.zadd(timeline_key(follower_id), post)
+                _trim(pipe, timeline_key(follower_id), settings.timeline_max_len)
+                pipe.publish(updates_channel(follower_id), post_id)
+        await pipe.execute()
+    except Exception:
+        # the post is in the DB; timelines catch up on their next rebuild
+        pass
+
+
+async def retract(post_id: int, author_id: int) -> None:
+    """Remove a deleted post from its author's followers' timelines."""
+    async with _session_factory() as db:
+        # a big author's posts only live in their own recent list
+        pull = await _is_pull_author(db, author_id)
+        followers = [] if pull else (await db.execute(_followers_of(author_id))).scalars().all()
+    try:
+        pipe = redis_service.redis_client.pipeline(transaction=False)
+        pipe.zrem(recent_key(author_id), member(post_id))
+        for follower_id in followers:
+            pipe.zrem(timeline_key(follower_id), member(post_id))
+        await pipe.execute()
+    except Exception:
+        # a stale id is harmless: hydration skips posts that no longer exist
+        pass
+
+
+async def _timeline_rows(user_id: int):
+    async with _session_factory() as db:
+        return (await db.execute(
+            select(models.Post.id, models.Post.created_at)
+            # big authors are merged in at read time, not stored here
+            .where(models.Post.user_id.in_(_followed_by(user_id, pull=False).scalar_subquery()))
+            .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+            .limit(settings.timeline_max_len)
+        )).all()
+
+
+async def rebuild(user_id: int) -> None:
+    """Recompute a user's timeline from the database (follow graph changed or cold user)."""
+    key = timeline_key(user_id)
+    tmp = f"{key}:building"
+    try:
+        async with redis_service.redis_client.pipeline(transaction=True) as pipe:
+            for _ in range(_REBUILD_ATTEMPTS):
+                # a fan_out() into the live key while we read makes EXEC fail
+                await pipe.watch(key)
+                rows = await _timeline_rows(user_id)
+                pipe.multi()
+                pipe.delete(tmp)
+                pipe.zadd(tmp, {SENTINEL: 0, **{member(r.id): score(r.created_at) for r in rows}})
+                pipe.expire(tmp, settings.timeline_ttl)
+                pipe.rename(tmp, key)
+                try:
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+        # still racing with fan-outs — drop it; the next read rebuilds it cold
+        await redis_service.redis_client.delete(key)
+    except Exception:
+        pass
+
+
+async def _build_recent(db: AsyncSession, author_ids: list[int]) -> None:
+    """Load the newest AUTHOR_RECENT_LEN post ids of each author into Redis."""
+    rank = func.row_number().over(
+        partition_by=models.Post.user_id,
+        order_by=(models.Post.created_at.desc(), models.Post.id.desc()),
+    ).label("rank")
+    newest = (
+        select(models.Post.id, models.Post.user_id, models.Post.created_at, rank)
+        .where(models.Post.user_id.in_(author_ids))
+        .subquery()
+    )
+    rows = (await db.execute(
+        select(newest.c.id, newest.c.user_id, newest.c.created_at).where(newest.c.rank <= settings.author_recent_len)
+    )).all()
+    posts = {author_id: {SENTINEL: 0} for author_id in author_ids}
+    for r in rows:
+        posts[r.user_id][member(r.id)] = score(r.created_at)
+    pipe = redis_service.redis_client.pipeline(transaction=False)
+    for author_id, members in posts.items():
+        pipe.delete(recent_key(author_id))
+        pipe.zadd(recent_key(author_id), members)
+        pipe.expire(recent_key(author_id), settings.timeline_ttl)
+    await pipe.execute()
+
+
+# ── Reads ──
+
+def merge(sources: Iterable[list[tuple[str, float]]], start: int, stop: int) -> list[int]:
+    """
+    Lazy k-way merge of (score, id)-descending (member, score) lists into
+    post ids [start:stop]. heapq.merge only ever looks at the head of each
+    list, so it stops after `stop` items no matter how many authors are
+    merged. Duplicates (an author who just crossed the threshold is in both
+    the timeline and the pull side) are dropped.
+    """
+    seen = set()
+
+    def unique():
+        for post, _ in heapq.merge(*sources, key=lambda item: (item[1], int(item[0])), reverse=True):
+            post_id = int(post)
+            if post_id not in seen:
+                seen.add(post_id)
+                yield post_id
+
+    return list(islice(unique(), start, stop))
+
+
+async def sources(db: AsyncSession, user_id: int) -> tuple[list[str], list[int]]:
+    """
+    The ZSETs a user's home feed is read from — their own timeline, then the
+    recent list of every big author they follow — built first if cold.
+    Returns (keys, pull author ids); raises if Redis is down.
+    """
+    pull_authors = (await db.execute(_followed_by(user_id, pull=True))).scalars().all()
+    keys = [timeline_key(user_id)] + [recent_key(a) for a in pull_authors]
+    client = redis_service.redis_client
+    if not await client.exists(keys[0]):
+        await rebuild(user_id)
+    if pull_authors:
+        pipe = client.pipeline(transaction=False)
+        for key in keys[1:]:
+            pipe.exists(key)
+        cold = [a for a, exists in zip(pull_authors, await pipe.execute()) if not exists]
+        if cold:
+            await _build_recent(db, cold)
+    return keys, list(pull_authors)
+
+
+async def read_page(db: AsyncSession, user_id: int, limit: int,
+                    cursor: Optional[str] = None, offset: int = 0) -> Optional[list[int]]:
+    """
+    Post ids for one page, newest first, with one extra id when there is more.
+    None means "can't answer from Redis" — Redis is down, or the page runs
+    past the end of a trimmed timeline — and the caller should use SQL.
+    """
+    client = redis_service.redis_client
+    # every source must supply enough rows to fill the page on its own
+    start = 0 if cursor else offset
+    wanted = start + limit + 1
+    try:
+        keys, pull_authors = await sources(db, user_id)
+        after = None
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            after = (score(created_at), last_id)
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            if after:
+                # the posts sharing the cursor's µs (all of them — a handful at
+                # most), then the ones strictly older
+                pipe.zrevrangebyscore(key, after[0], after[0], withscores=True)
+                pipe.zrevrangebyscore(key, f"({after[0]}", "(0", start=0, num=wanted, withscores=True)
+            else:
+                pipe.zrevrangebyscore(key, "+inf", "(0", start=0, num=wanted, withscores=True)
+            pipe.zcard(key)
+            pipe.expire(key, settings.timeline_ttl)
+        replies = iter(await pipe.execute())
+    except Exception:
+        return None
+
+    caps = [settings.timeline_max_len] + [settings.author_recent_len] * len(pull_authors)
+    merged = []
+    for cap in caps:
+        items = next(replies)
+        if after:
+            ties = [(m, s) for m, s in items if int(m) < after[1]]
+            items = (ties + next(replies))[:wanted]
+        size, _ = next(replies), next(replies)
+        if len(items) < wanted and size > cap:
+            # older posts were trimmed off this list — only SQL has them
+            return None
+        merged.append(items)
+    return merge(merged, start, wanted)
+
+
+async def count_since(keys: list[str], since: int) -> int:
+    """Posts newer than score `since` across the given ZSETs — one ZCOUNT each."""
+    pipe = redis_service.redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.zcount(key, f"({since}", "+inf")
+    return sum(await pipe.execute())
+
+
+async def new_count(db: AsyncSession, user_id: int, since: datetime) -> Optional[int]:
+    """How many feed posts are newer than `since`; None if Redis can't say."""
+    try:
+        keys, _ = await sources(db, user_id)
+        return await count_since(keys, score(since))
+    except Exception:
+        return None
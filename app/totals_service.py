@@ -0,0 +1,79 @@
+# totals_service.py
+# Where list endpoints get their `total` from — without COUNT(*) per page.
+#
+# TWO KINDS OF TOTALS:
+#   1. Exact per-user counters (users.posts_cnt, users.notifications_cnt).
+#      They are bumped with an atomic UPDATE ... SET x = x + 1 inside the
+#      SAME transaction as the write, so they commit or roll back together
+#      with the row they count.
+#   2. Estimates for global / ad-hoc counts (explore feed, search).
+#      Postgres already keeps a row estimate per table in pg_class.reltuples
+#      (refreshed by ANALYZE/autovacuum), and the planner can estimate any
+#      WHERE clause via EXPLAIN. Both are O(1) instead of a full scan.
+#
+# Clients that don't need a total at all pass include_total=false and only
+# get has_more (worked out by fetching limit+1 rows).
+
+import json
+from sqlalchemy import Select, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.my_utils.ttl_cache import TTLCache
+
+# reltuples only moves when autovacuum runs, no point asking more often
+_ESTIMATE_TTL = 30
+_table_estimates = TTLCache(maxsize=64, ttl=_ESTIMATE_TTL)
+
+# ── Exact per-user counters ──
+
+_USER_COUNTERS = {"posts_cnt", "notifications_cnt"}
+
+
+async def bump_user_counter(db: AsyncSession, user_id: int, counter: str, delta: int = 1) -> None:
+    """Atomically add `delta` to a users.<counter> column in the caller's transaction."""
+    if counter not in _USER_COUNTERS:
+        raise ValueError(f"unknown user counter {counter!r}")
+    column = getattr(models.User, counter)
+    await db.execute(
+        update(models.User).where(models.User.id == user_id).values({column: column + delta})
+    )
+
+
+async def user_counter(db: AsyncSession, user_id: int, counter: str) -> int:
+    if counter not in _USER_COUNTERS:
+        raise ValueError(f"unknown user counter {counter!r}")
+    result = await db.execute(select(getattr(models.User, counter)).where(models.User.id == user_id))
+    return result.scalar() or 0
+
+
+# ── Estimates ──
+
+async def estimate_rows(db: AsyncSession, stmt: Select) -> int:
+    """Planner's row estimate for `stmt` (no rows are read)."""
+    # compiled for the driver with its real bind parameters — user input
+    # (':word', '%', '\\') must reach the planner exactly as the query sends it
+    conn = await db.connection()
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def estimate_table_rows(db: AsyncSession, table) -> int:
+    """Approximate row count of a whole table from pg_class.reltuples."""
+    cached = _table_estimates.get(table.name)
+    if cached is not None:
+        return cached
+    result = await db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table.name},
+    )
+    estimate = result.scalar()
+    if estimate is None or estimate < 0:
+        # never analyzed yet (-1) — let the planner guess from the page count
+        estimate = await estimate_rows(db, select(table))
+    _table_estimates.set(table.name, int(estimate))
+    return int(estimate)
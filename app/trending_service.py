@@ -0,0 +1,109 @@
+# trending_service.py
+# What's hot right now: sliding-window counters for posts and hashtags.
+#
+# BUCKETS:
+#   Every like, comment, (first) view and share is counted in Redis, never
+#   Postgres, in two time buckets at once:
+#     trending:<entity>:<kind>:m:<minute>   ZSET, kept 61 minutes
+#     trending:<entity>:<kind>:h:<hour>     ZSET, kept 25 hours
+#   entity = posts | tags, kind = like | comment | view | share; the member
+#   is the post id or the hashtag, the score the number of events.
+#
+# SCORE:
+#   window=1h  → the last 60 minute buckets, window=24h → the last 24 hour
+#   buckets. One ZUNIONSTORE adds them up with
+#       weight = KIND_WEIGHTS[kind] · 0.5 ** (bucket age / half-life)
+#   where the half-life is a quarter of the window — a like a minute ago
+#   beats a like 50 minutes ago, but both count. Kind weights are applied
+#   at read time, so retuning them doesn't lose any history.
+#   The union is kept for RESULT_TTL seconds, so a burst of readers costs
+#   one union per window per entity.
+#
+# Redis being down just means nothing is trending for a while.
+
+import time
+from typing import Optional
+from app import redis_service
+from app.my_utils.utils import parseHashtags
+
+KINDS = ("like", "comment", "view", "share")
+KIND_WEIGHTS = {"like": 1.0, "comment": 2.0, "view": 0.2, "share": 3.0}
+# window name → (bucket resolution, bucket length in seconds, buckets in the window)
+WINDOWS = {"1h": ("m", 60, 60), "24h": ("h", 3600, 24)}
+_KEEP = {"m": 60 * 61, "h": 3600 * 25}
+RESULT_TTL = 30
+
+
+def _bucket_key(entity: str, kind: str, resolution: str, bucket: int) -> str:
+    return f"trending:{entity}:{kind}:{resolution}:{bucket}"
+
+
+def _result_key(entity: str, window: str) -> str:
+    return f"trending:{entity}:top:{window}"
+
+
+async def record(post_id: int, kind: str, hashtags: Optional[str] = None) -> None:
+    """Count one event for a post and each of its hashtags."""
+    now = int(time.time())
+    tags = parseHashtags(hashtags)
+    try:
+        pipe = redis_service.redis_client.pipeline(transaction=False)
+        for resolution, length, _ in WINDOWS.values():
+            bucket = now // length
+            for entity, members in (("posts", [str(post_id)]), ("tags", tags)):
+                if not members:
+                    continue
+                key = _bucket_key(entity, kind, resolution, bucket)
+                for member in members:
+                    pipe.zincrby(key, 1, member)
+                pipe.expire(key, _KEEP[resolution])
+        await pipe.execute()
+    except Exception:
+        # a missed event only nudges a score
+        pass
+
+
+async def forget_post(post_id: int) -> None:
+    """Drop a deleted post from every live bucket and cached result."""
+    now = int(time.time())
+    try:
+        pipe = redis_service.redis_client.pipeline(transaction=False)
+        for resolution, length, count in WINDOWS.values():
+            newest = now // length
+            for kind in KINDS:
+                for bucket in range(newest - count, newest + 1):
+                    pipe.zrem(_bucket_key("posts", kind, resolution, bucket), str(post_id))
+        for window in WINDOWS:
+            pipe.zrem(_result_key("posts", window), str(post_id))
+        await pipe.execute()
+    except Exception:
+        pass
+
+
+def _weights(entity: str, window: str, now: float) -> dict[str, float]:
+    resolution, length, count = WINDOWS[window]
+    half_life = length * count / 4
+    newest = int(now) // length
+    weights = {}
+    for bucket in range(newest - count + 1, newest + 1):
+        # age measured to the middle of the bucket
+        decay = 0.5 ** ((now - (bucket + 0.5) * length) / half_life)
+        for kind in KINDS:
+            weights[_bucket_key(entity, kind, resolution, bucket)] = KIND_WEIGHTS[kind] * decay
+    return weights
+
+
+async def top(entity: str, window: str, limit: int) -> list[tuple[str, float]]:
+    """The `limit` highest decayed scores in the window, as (member, score)."""
+    client = redis_service.redis_client
+    key = _result_key(entity, window)
+    try:
+        if not await client.exists(key):
+            weights = _weights(entity, window, time.time())
+            pipe = client.pipeline(transaction=True)
+            pipe.zunionstore(key, weights, aggregate="SUM")
+            pipe.expire(key, RESULT_TTL)
+            await pipe.execute()
+        return await client.zrevrange(key, 0, limit - 1, withscores=True)
+    except Exception:
+        return []
@@ -0,0 +1,104 @@
+# list_read_path.py
+# ORM vs Core read path for one feed page: CPU time and peak Python memory.
+#
+# Seeds users/posts inside a transaction that is rolled back at the end, so it
+# can be pointed at any dev database (the one in .env by default):
+#
+#   python -m benchmarks.list_read_path --posts 5000 --limit 50 --rounds 200
+#
+# Only the Python side is measured (process_time + tracemalloc); both paths
+# send the same SQL shape to Postgres, the difference is what happens to the
+# rows once they arrive.
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from sqlalchemy import select, text
+from sqlalchemy.orm import joinedload
+from app import list_queries, models, schemas
+from app.blob_service import get_blob_url
+from app.db import async_engine, _make_sessionmaker
+from app.my_utils.pagination import keyset, page
+
+SEED_SQL = (
+    """INSERT INTO users (username, password, nickname)
+       SELECT 'bench_u' || g, 'x', 'bench ' || g FROM generate_series(1, :users) g""",
+    """INSERT INTO posts (title, content, user_id, likes, comments_cnt, created_at,
+                          author_username, author_nickname)
+       SELECT 'post ' || g, 'content ' || g, u.id, g % 97, g % 13, now() - make_interval(secs => g),
+              u.username, u.nickname
+       FROM generate_series(1, :posts) g
+       JOIN users u ON u.username = 'bench_u' || (1 + g % :users)""",
+)
+
+
+async def orm_page(db, user_ids, limit):
+    result = await db.execute(keyset(
+        select(models.Post).where(models.Post.user_id.in_(user_ids))
+        .options(joinedload(models.Post.user).load_only(models.User.username, models.User.profile_picture)),
+        models.Post.created_at, models.Post.id, limit,
+    ))
+    posts, _ = page(result.scalars().all(), limit)
+    feed = [
+        schemas.FeedItemResponse(
+            post_id=post.id,
+            post=schemas.PostListItemResponse(
+                id=post.id, title=post.title,
+                media_url=get_blob_url("posts-media", post.media_path) if post.media_path else None,
+                media_type=post.media_type, likes=post.likes,
+                comments_count=post.comments_cnt, created_at=post.created_at,
+            ),
+            owner=schemas.UserOut(id=post.user_id, username=post.user.username, profile_pic=post.user.profile_picture),
+        )
+        for post in posts
+    ]
+    db.expunge_all()
+    return schemas.FeedResponse(feed=feed).model_dump(mode="json")
+
+
+async def core_page(db, user_ids, limit):
+    result = await db.execute(keyset(
+        list_queries.feed_select().where(models.Post.user_id.in_(user_ids)),
+        models.Post.created_at, models.Post.id, limit,
+    ))
+    rows, _ = page(result.all(), limit)
+    feed = [list_queries.feed_item(row) for row in rows]
+    return schemas.FeedResponse(feed=feed).model_dump(mode="json")
+
+
+async def measure(name, fn, db, user_ids, limit, rounds):
+    await fn(db, user_ids, limit)  # warm statement caches
+    cpu = time.process_time()
+    for _ in range(rounds):
+        await fn(db, user_ids, limit)
+    cpu = time.process_time() - cpu
+
+    tracemalloc.start()
+    await fn(db, user_ids, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>5}: {cpu / rounds * 1000:8.3f} ms CPU/page   {peak / 1024:8.1f} KiB peak/page")
+
+
+async def main(args):
+    async with _make_sessionmaker(async_engine)() as db:
+        for sql in SEED_SQL:
+            await db.execute(text(sql), {"users": args.users, "posts": args.posts})
+        ids = await db.execute(select(models.User.id).where(models.User.username.like("bench_u%")))
+        user_ids = ids.scalars().all()
+        try:
+            await measure("orm", orm_page, db, user_ids, args.limit, args.rounds)
+            await measure("core", core_page, db, user_ids, args.limit, args.rounds)
+        finally:
+            await db.rollback()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect,Depends,Query
-from app import schemas, models, oauth2,db
+from app import schemas, models, oauth2,db,read_routing,prewarm_service
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.my_utils.socket_manager import manager
 from chat_system import delete_msg,delete_shares,dm,edit_msg,load_missed_msgs,msg_reaction,share_reaction,reply_msg,reply_to_share,media_msg,read_receipt
@@ -24,7 +24,7 @@ async def chat(
         return
     try:
         # get the user from the token passed token
-        current_user = await oauth2.getCurrentUser(token,db)
+        current_user = await oauth2.getCurrentPrincipal(token,db)
         # if he is a different guy well then close the socket connection
         # this prevents spoofing other users acccessing or pretending to be the actual user
         if current_user.id != user_id:
@@ -37,6 +37,8 @@ async def chat(
     # make a connection request by using the manager obj 
 
     await manager.connect(user_id,websocket)   
+    # a socket connect usually means the app just opened — warm its first pages
+    prewarm_service.schedule(user_id)
     # load missed content  
     missed_content=await load_missed_msgs.load_missed_content(current_user.id,db)
     if missed_content:
@@ -60,6 +62,10 @@ async def chat(
         # Not a JSON message (could be plain chat text) — handle or ignore
                   print("Received non-JSON chat payload; ignoring or handle as needed:", repr(data))
                   continue
+            # everything except keep-alives and typing writes to the DB,
+            # so this user's reads must stay on the primary for a bit
+            if message_data.get("type") not in ("pong","typing"):
+                await read_routing.mark_write(current_user.id)
             # if the type is delete_for_everyone
             if message_data.get("type") == "delete_for_everyone":
                     try:
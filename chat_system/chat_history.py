@@ -2,19 +2,44 @@ from app.my_utils.time_formatting import format_timestamp
 from fastapi import status,HTTPException,Depends,Body,APIRouter
 import app.schemas as sch
 from app import models,oauth2,config
-from app.db import getDb
+from app.read_routing import getReadDb
+from app.parallel_reads import gather_reads
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import or_,and_,select
+from sqlalchemy.orm import joinedload,selectinload
 from typing import List
 from sqlalchemy.exc import IntegrityError
 
 router = APIRouter(prefix="/chat", tags=["chat_history"])
 
+# loader options for rendering chat items — shared with load_missed_msgs.
+# relationships are lazy="raise", so everything the payload touches is listed here
+def message_loaders():
+    return (
+        selectinload(models.Message.reactions),
+        selectinload(models.Message.reply_to_shared_post).options(
+            joinedload(models.SharedPost.post).load_only(models.Post.media_path),
+            joinedload(models.SharedPost.from_user).load_only(models.User.username),
+        ),
+        selectinload(models.Message.replies_to)
+            .joinedload(models.MessageReplies.original_msg)
+            .joinedload(models.Message.sender).load_only(models.User.username),
+    )
+
+def shared_post_loaders():
+    return (
+        joinedload(models.SharedPost.post).load_only(
+            models.Post.title,models.Post.media_type,models.Post.media_path
+        ),
+        joinedload(models.SharedPost.from_user).load_only(models.User.nickname),
+        selectinload(models.SharedPost.reactions),
+    )
+
 @router.get("/history/{friend_id}")
 async def get_chat_history(
     friend_id: int,
-    db: AsyncSession = Depends(getDb),
-    currentUser: models.User = Depends(oauth2.getCurrentUser),
+    db: AsyncSession = Depends(getReadDb),
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),
 ):
     # CRITICAL: Hide undelivered messages from friend
     # firstly let us fetch out the 'delted for me' msgs by the current user
@@ -24,7 +49,7 @@ async def get_chat_history(
         .scalar_subquery()
     )
     # now let us use that subquery in NOT EXISTS and simply query off the final messages
-    messages_result = await db.execute(
+    messages_stmt = (
         select(models.Message).where(
             # 1. Not deleted for everyone
             models.Message.is_deleted_for_everyone == False,
@@ -35,9 +60,8 @@ async def get_chat_history(
             ),
             # 3. Not deleted by THIS user (NOT EXISTS)
             ~models.Message.id.in_(subq)
-        ).order_by(models.Message.created_at.desc())
+        ).options(*message_loaders()).order_by(models.Message.created_at.desc())
     )
-    messages = messages_result.scalars().all()
     # shared posts
 
     deleted_shared_subq = (
@@ -45,7 +69,7 @@ async def get_chat_history(
         .where(models.DeletedSharedPost.user_id == currentUser.id)
         .scalar_subquery()
     )
-    shared_result = await db.execute(
+    shared_stmt = (
         select(models.SharedPost).where(
             models.SharedPost.is_deleted_for_everyone == False,
             or_(
@@ -53,8 +77,11 @@ async def get_chat_history(
                 and_(models.SharedPost.from_user_id == friend_id, models.SharedPost.to_user_id == currentUser.id)
             ),
             ~models.SharedPost.id.in_(deleted_shared_subq)
-        ).order_by(models.SharedPost.created_at.desc())
+        ).options(*shared_post_loaders()).order_by(models.SharedPost.created_at.desc())
     )
+    # messages and shared posts don't depend on each other — fetch both at once
+    messages_result, shared_result = await gather_reads(db, messages_stmt, shared_stmt)
+    messages = messages_result.scalars().all()
     shared_posts = shared_result.scalars().all()
 
     chat_history=[]
@@ -126,8 +153,8 @@ async def get_chat_history(
 
 @router.get("/recent-chats")
 async def get_recent_chats(
-    db: AsyncSession = Depends(getDb),
-    currentUser: models.User = Depends(oauth2.getCurrentUser)
+    db: AsyncSession = Depends(getReadDb),
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)
 ):
     all_messages_result = await db.execute(
         select(models.Message).where(
@@ -8,7 +8,7 @@ from typing import List
 router=APIRouter(tags=['clear-chat'])
 
 @router.delete("/clear-chat/{friend_id}")
-async def clear_chat(friend_id:int,db:AsyncSession =Depends(db.getDb),current_user:models.User=Depends(oauth2.getCurrentUser)):
+async def clear_chat(friend_id:int,db:AsyncSession =Depends(db.getDb),current_user:oauth2.Principal=Depends(oauth2.getCurrentPrincipal)):
     
     # messages already deleted by me
     deleted_subq = (
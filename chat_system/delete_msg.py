@@ -16,7 +16,7 @@ router=APIRouter(tags=['delete msg'])
 async def deleteForMe(
     msg_id: int,
     db: AsyncSession=Depends(db.getDb),
-    me: models.User = Depends(oauth2.getCurrentUser),
+    me: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),
 ):
     result = await db.execute(
         select(models.Message).where(models.Message.id==msg_id)
@@ -15,7 +15,7 @@ router=APIRouter(tags=['delete share'])
 async def deleteForMe(
     share_id: int,
     db: AsyncSession=Depends(db.getDb),
-    me: models.User = Depends(oauth2.getCurrentUser),
+    me: oauth2.Principal = Depends(oauth2.getCurrentPrincipal),
 ):
     result = await db.execute(
         select(models.SharedPost).where(models.SharedPost.id==share_id)
@@ -12,7 +12,7 @@ from app.my_utils.time_formatting import format_timestamp
 router=APIRouter(tags=['can_edit'])
 
 @router.get("/msg/{msg_id}/can_edit", response_model=CanEditResponse)
-async def can_edit(msg_id:int,db:AsyncSession=Depends(db.getDb),currentUser:models.User = Depends(oauth2.getCurrentUser)):
+async def can_edit(msg_id:int,db:AsyncSession=Depends(db.getDb),currentUser:oauth2.Principal = Depends(oauth2.getCurrentPrincipal)):
     result = await db.execute(
         select(models.Message).where(
             models.Message.id == msg_id,
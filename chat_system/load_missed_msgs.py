@@ -2,10 +2,12 @@ from fastapi import Depends
 from app import schemas, models, oauth2,db,config
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload
 from app.my_utils.socket_manager import manager
 from datetime import datetime
 from app.my_utils.time_formatting import format_timestamp
 from app.models import Notification
+from chat_system.chat_history import message_loaders, shared_post_loaders
 
 async def load_missed_content(
     user_id: int,
@@ -16,7 +18,7 @@ async def load_missed_content(
                 models.Message.is_deleted_for_everyone==False,
                 models.Message.receiver_id == user_id,
                 models.Message.is_read == False
-            ).order_by(models.Message.created_at.asc())
+            ).options(*message_loaders()).order_by(models.Message.created_at.asc())
         )
         missed_messages = missed_result.scalars().all()
 
@@ -36,7 +38,7 @@ async def load_missed_content(
             select(models.SharedPost).where(
                 models.SharedPost.to_user_id == user_id,
                 models.SharedPost.is_read == False
-            ).order_by(models.SharedPost.created_at.asc())
+            ).options(*shared_post_loaders()).order_by(models.SharedPost.created_at.asc())
         )
         missed_shares = missed_shares_result.scalars().all()
         
@@ -117,7 +119,7 @@ async def load_missed_content(
             })
         # On every WebSocket connect we also push any notifications the user
         # missed while they were offline.
-        # The actor relationship is eager-loaded (lazy="selectin" on the model),
+        # The actor is joined in with just its username,
         # so n.actor.username is available without an extra query.
         missed_notifs_result = await db.execute(
             select(Notification)
@@ -125,6 +127,7 @@ async def load_missed_content(
                 Notification.owner_id == user_id,
                 Notification.is_read == False,
             )
+            .options(joinedload(Notification.actor).load_only(models.User.username))
             .order_by(Notification.created_at.asc())
         )
         missed_notifs = missed_notifs_result.scalars().all()
@@ -7,7 +7,7 @@ router = APIRouter()
 @router.post("/upload-media")
 async def upload_media(
     file:UploadFile = File(...),
-    current_user = Depends(oauth2.getCurrentUser)
+    current_user = Depends(oauth2.getCurrentPrincipal)
 ):
     # 'video', 'audio', 'image'
     media_type = file.content_type.split("/")[0]
@@ -10,7 +10,7 @@ router = APIRouter(tags=['Message Info'])
 async def get_message_info(
     msg_id: int,
     db: AsyncSession = Depends(db.getDb),
-    currentUser: models.User = Depends(oauth2.getCurrentUser)
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)
 ):
     result = await db.execute(
         select(models.Message).where(models.Message.id == msg_id)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException ,Depends
 from app import schemas, models, oauth2,db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from app.my_utils.socket_manager import manager
 from datetime import datetime
 from typing import List
@@ -12,7 +13,7 @@ router=APIRouter(tags=['msg reactions'])
 async def msg_reactions(
     msg_id:int,
     db: AsyncSession = Depends(db.getDb),
-    currentUser: models.User = Depends(oauth2.getCurrentUser)
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)
 ):
   result = await db.execute(
       select(models.Message).where(models.Message.id == msg_id)
@@ -25,6 +26,7 @@ async def msg_reactions(
         return
   reactions_result = await db.execute(
       select(models.MessageReaction).where(models.MessageReaction.message_id == msg_id)
+      .options(joinedload(models.MessageReaction.user).load_only(models.User.username,models.User.profile_picture))
   )
   reactions = reactions_result.scalars().all()
   return [
@@ -2,6 +2,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect,Depends,Query
 from app import schemas, models, oauth2,db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from app.my_utils.socket_manager import manager
 from datetime import datetime
 from app.my_utils.time_formatting import format_timestamp
@@ -51,6 +52,7 @@ async def reply_msg(
         receiver_id = msg.receiver_id
         orig_result = await db.execute(
             select(models.Message).where(models.Message.id == payload.reply_msg_id)
+            .options(joinedload(models.Message.sender).load_only(models.User.username))
         )
         original_msg = orig_result.scalars().first()
         if receiver_id in manager.active_connections:
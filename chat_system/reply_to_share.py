@@ -2,6 +2,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect,Depends,Query
 from app import schemas, models, oauth2,db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from app.my_utils.socket_manager import manager
 from datetime import datetime
 from app.my_utils.time_formatting import format_timestamp
@@ -45,6 +46,7 @@ async def reply_share(
     # Load original post details for context
     post_result = await db.execute(
         select(models.Post).where(models.Post.id == shared_post.post_id)
+        .options(joinedload(models.Post.user).load_only(models.User.username))
     )
     original_post = post_result.scalars().first()
 
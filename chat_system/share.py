@@ -2,13 +2,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from typing import Optional
 from app.db import getDb
 from app.models import SharedPost, Post, User
 from app.schemas import SharePostRequest, SharedPostDetailResponse
-from app.oauth2 import getCurrentUser
+from app.oauth2 import getCurrentPrincipal, Principal
 from app.my_utils.socket_manager import manager  # your WebSocket ConnectionManager
 from app.my_utils.time_formatting import format_timestamp
+from app import trending_service
 
 
 router = APIRouter(tags=["Share Post"])
@@ -17,7 +19,7 @@ router = APIRouter(tags=["Share Post"])
 async def share_post(
     payload: SharePostRequest,
     db: AsyncSession = Depends(getDb),
-    me: User = Depends(getCurrentUser),
+    me: Principal = Depends(getCurrentPrincipal),
 ):
     """
     1. Validate post exists
@@ -26,7 +28,10 @@ async def share_post(
     4. Push a **preview** to receiver via WebSocket (if online)
     5. Return the DB record (for sender UI)
     """
-    post_result = await db.execute(select(Post).where(Post.id == payload.post_id))
+    post_result = await db.execute(
+        select(Post).where(Post.id == payload.post_id)
+        .options(joinedload(Post.user).load_only(User.nickname))
+    )
     post: Post = post_result.scalars().first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -46,6 +51,7 @@ async def share_post(
     db.add(shared)
     await db.commit()
     await db.refresh(shared)
+    await trending_service.record(post.id, "share", post.hashtags)
 
     preview = {
         "type": "shared_post",
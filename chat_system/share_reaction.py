@@ -2,6 +2,7 @@ from fastapi import APIRouter,Depends
 from app import schemas, models, oauth2, db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from app.my_utils.socket_manager import manager
 from typing import List
 
@@ -14,7 +15,7 @@ router = APIRouter(tags=['shared post reactions'])
 async def get_shared_post_reactions(
     shared_id: int,
     db: AsyncSession = Depends(db.getDb),
-    currentUser: models.User = Depends(oauth2.getCurrentUser)
+    currentUser: oauth2.Principal = Depends(oauth2.getCurrentPrincipal)
 ):
     result = await db.execute(
         select(models.SharedPost).where(models.SharedPost.id == shared_id)
@@ -29,6 +30,7 @@ async def get_shared_post_reactions(
 
     reactions_result = await db.execute(
         select(models.SharedPostReaction).where(models.SharedPostReaction.shared_post_id == shared_id)
+        .options(joinedload(models.SharedPostReaction.user).load_only(models.User.username,models.User.profile_picture))
     )
     reactions = reactions_result.scalars().all()
     return [
@@ -156,6 +156,31 @@ TestingAsyncSessionLocal = async_sessionmaker(
 # _session_factory.  Without this change it would try to write to the
 # production DB which doesn't have the test users, causing FK violations and other errors.
 notification_service._session_factory = TestingAsyncSessionLocal
+# same for the author snapshot propagation run after profile edits
+from app import author_snapshots
+author_snapshots._session_factory = TestingAsyncSessionLocal
+# and for the timeline fan-out / rebuild tasks
+from app import timeline_service
+timeline_service._session_factory = TestingAsyncSessionLocal
+# and for the explore ranking job
+from app import explore_ranking
+explore_ranking._session_factory = TestingAsyncSessionLocal
+from app import explore_personal
+explore_personal._session_factory = TestingAsyncSessionLocal
+# and for the login/socket pre-warm. Warm-ups would race the tests' own
+# requests for the same cache keys, so they are off unless a test turns them on
+from app import prewarm_service
+from app import related_posts
+related_posts._session_factory = TestingAsyncSessionLocal
+prewarm_service._session_factory = TestingAsyncSessionLocal
+settings.prewarm_max_pending = 0
+# background refreshes of stale cached pages
+from app import page_cache
+page_cache._session_factory = TestingAsyncSessionLocal
+
+# and for the SSE stream's up-front source lookup
+from app import feed_updates
+feed_updates._session_factory = TestingAsyncSessionLocal
 
 # pytest fixtures very helpful
 @pytest.fixture(scope="session", autouse=True)
@@ -191,6 +216,12 @@ def setup_test_db():
     finally:
         cleanup_engine.dispose()
 
+# ── Sync connection for tests that inspect the database itself (EXPLAIN etc.) ──
+@pytest.fixture(scope="module")
+def sync_db():
+    with sync_test_engine.connect() as conn:
+        yield conn
+
 # ── Async DB dependency override ──
 async def override_getDb():
     async with TestingAsyncSessionLocal() as db:
@@ -231,3 +262,32 @@ async def get_token(client, create_test_user):
     assert resp.status_code == 202
     token = resp.json()["accessToken"]
     return token
+
+# ── Explore ranking teardown, for tests that build explore:ranked ──
+@pytest_asyncio.fixture
+async def ranking():
+    # other tests expect the newest-first SQL path, so never leave a ranking behind
+    yield
+    await redis_service.redis_client.delete(explore_ranking.RANKED_KEY, explore_ranking.DIRTY_KEY)
+
+# ── Shared helpers: tests import them (`from conftest import signup_and_login`) ──
+async def signup_and_login(client, username: str, password: str = "password123") -> str:
+    """Create a fresh user and return their access token."""
+    await client.post("/user/signup", json={
+        "username": username,
+        "password": password,
+        "nickname": username,
+    })
+    login = await client.post("/login", data={"username": username, "password": password})
+    assert login.status_code == 202, f"login failed for {username}: {login.text}"
+    return login.json()["accessToken"]
+
+
+async def make_pair(client, prefix: str):
+    """An author and a reader following them: (author headers, reader headers, author id, reader id)."""
+    author = {"Authorization": f"Bearer {await signup_and_login(client, f'{prefix}_author')}"}
+    reader = {"Authorization": f"Bearer {await signup_and_login(client, f'{prefix}_reader')}"}
+    author_id = (await client.get("/me/profile", headers=author)).json()["id"]
+    reader_id = (await client.get("/me/profile", headers=reader)).json()["id"]
+    await client.post(f"/follow/{author_id}", headers=reader)
+    return author, reader, author_id, reader_id
@@ -0,0 +1,35 @@
+"""
+Tests for the author snapshot on posts/comments (app/author_snapshots.py).
+
+Covers:
+  - New posts and comments carry the author's name in the snapshot
+  - A username change reaches every post/comment, across several batches
+"""
+from app import author_snapshots
+from conftest import signup_and_login
+
+
+async def test_rename_propagates_to_posts_and_comments(client, monkeypatch):
+    monkeypatch.setattr(author_snapshots, "BATCH_SIZE", 2)
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'snap_author')}"}
+    reader = {"Authorization": f"Bearer {await signup_and_login(client, 'snap_reader')}"}
+    author_id = (await client.get("/me/profile", headers=author)).json()["id"]
+    await client.post(f"/follow/{author_id}", headers=reader)
+
+    post_ids = []
+    for i in range(5):
+        resp = await client.post("/posts/createPost", data={"title": f"snap {i}", "content": "x"}, headers=author)
+        post_ids.append(resp.json()["id"])
+    await client.post("/comment/createComment", json={"post_id": post_ids[0], "content": "mine"}, headers=author)
+
+    feed = (await client.get("/feed/home?limit=10", headers=reader)).json()["feed"]
+    assert {item["owner"]["username"] for item in feed} == {"snap_author"}
+
+    resp = await client.patch("/me/updateInfo", data={"username": "snap_renamed"}, headers=author)
+    assert resp.status_code == 200
+
+    feed = (await client.get("/feed/home?limit=10", headers=reader)).json()["feed"]
+    assert len(feed) == 5
+    assert {item["owner"]["username"] for item in feed} == {"snap_renamed"}
+    comments = (await client.get(f"/comments-on/{post_ids[0]}", headers=reader)).json()["comments"]
+    assert comments[0]["user"]["username"] == "snap_renamed"
@@ -0,0 +1,63 @@
+"""
+Tests for generation-versioned cache keys (redis_service.versioned_key / bump).
+
+Covers:
+  - bump() moves every key of the namespace to a new version, other namespaces untouched
+  - Writes through the routes invalidate cached post/feed/comment pages
+  - No request path issues a SCAN
+"""
+import pytest
+from app import redis_service
+from conftest import signup_and_login
+
+
+@pytest.fixture
+def no_scan(monkeypatch):
+    scans = []
+
+    async def scan(*args, **kwargs):
+        scans.append(kwargs.get("match"))
+        return 0, []
+
+    monkeypatch.setattr(redis_service.redis_client, "scan", scan)
+    return scans
+
+
+async def test_bump_moves_namespace_to_new_keys():
+    key = await redis_service.versioned_key("page:1", "gen_test:a", "gen_test:b")
+    assert key == "page:1@0.0"
+    await redis_service.set_cache(key, {"v": 1})
+
+    await redis_service.bump("gen_test:b")
+    fresh = await redis_service.versioned_key("page:1", "gen_test:a", "gen_test:b")
+    assert fresh == "page:1@0.1"
+    assert await redis_service.get_cache(fresh) is None
+    assert await redis_service.versioned_key("page:2", "gen_test:a") == "page:2@0"
+    # the old key isn't deleted, it just expires on its own TTL
+    assert 0 < await redis_service.redis_client.ttl(key) <= 60
+
+
+async def test_writes_invalidate_without_scanning(client, no_scan):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'gen_author')}"}
+    reader = {"Authorization": f"Bearer {await signup_and_login(client, 'gen_reader')}"}
+    author_id = (await client.get("/me/profile", headers=author)).json()["id"]
+    await client.post(f"/follow/{author_id}", headers=reader)
+    post_id = (await client.post("/posts/createPost", data={"title": "g", "content": "x"}, headers=author)).json()["id"]
+
+    # fill the caches
+    assert (await client.get(f"/posts/getPost/{post_id}", headers=reader)).json()["likes"] == 0
+    feed = (await client.get("/feed/home?limit=10", headers=reader)).json()["feed"]
+    assert next(i for i in feed if i["post_id"] == post_id)["post"]["likes"] == 0
+    assert (await client.get(f"/comments-on/{post_id}", headers=reader)).json()["comments"] == []
+
+    await client.post("/vote/on_post", json={"post_id": post_id, "choice": True}, headers=reader)
+    await client.post("/comment/createComment", json={"post_id": post_id, "content": "hi"}, headers=reader)
+
+    assert (await client.get(f"/posts/getPost/{post_id}", headers=reader)).json()["likes"] == 1
+    feed = (await client.get("/feed/home?limit=10", headers=reader)).json()["feed"]
+    assert next(i for i in feed if i["post_id"] == post_id)["post"]["likes"] == 1
+    assert len((await client.get(f"/comments-on/{post_id}", headers=reader)).json()["comments"]) == 1
+
+    await client.delete(f"/posts/deletePost/{post_id}", headers=author)
+    await client.patch("/me/notifications/read", headers=author)
+    assert no_scan == []
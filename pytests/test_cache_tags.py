@@ -0,0 +1,66 @@
+"""
+Tests for tag-based cache invalidation (redis_service.set_cache(tags=...) / invalidate).
+
+Covers:
+  - invalidate() deletes exactly the keys stored under the tag
+  - Tag sets drop expired members and expire with their newest key
+  - A like drops the cached pages showing that post and keeps the others
+"""
+import time
+from app import redis_service
+from conftest import signup_and_login
+
+
+async def test_invalidate_deletes_tagged_keys_only():
+    r = redis_service.redis_client
+    await redis_service.set_cache("tagtest:a", 1, ttl=60, tags=["post:-1", "user:-1"])
+    await redis_service.set_cache("tagtest:b", 2, ttl=60, tags=["post:-2"])
+    await redis_service.set_cache("tagtest:c", 3, ttl=60, tags=["user:-1"])
+
+    await redis_service.invalidate("post:-1")
+    assert not await r.exists("tagtest:a")
+    assert await r.exists("tagtest:b") and await r.exists("tagtest:c")
+
+    await redis_service.invalidate("user:-1")
+    assert not await r.exists("tagtest:c")
+    assert not await r.exists("tag:post:-1") and not await r.exists("tag:user:-1")
+    await redis_service.invalidate("post:-2")
+
+
+async def test_tag_sets_stay_bounded():
+    r = redis_service.redis_client
+    # a member whose key expired a while ago
+    await r.zadd("tag:post:-3", {"tagtest:gone": time.time() - 5})
+    await redis_service.set_cache("tagtest:short", 1, ttl=30, tags=["post:-3"])
+    assert await r.zrange("tag:post:-3", 0, -1) == ["tagtest:short"]
+    assert 0 < await r.ttl("tag:post:-3") <= 30
+
+    # a longer-lived key pushes the set's expiry out, a shorter one never pulls it in
+    await redis_service.set_cache("tagtest:long", 1, ttl=120, tags=["post:-3"])
+    await redis_service.set_cache("tagtest:short2", 1, ttl=10, tags=["post:-3"])
+    assert await r.ttl("tag:post:-3") > 30
+    await redis_service.invalidate("post:-3")
+
+
+async def test_like_drops_only_pages_showing_the_post(client):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'tag_author')}"}
+    reader = {"Authorization": f"Bearer {await signup_and_login(client, 'tag_reader')}"}
+    author_id = (await client.get("/me/profile", headers=author)).json()["id"]
+    reader_id = (await client.get("/me/profile", headers=reader)).json()["id"]
+    await client.post(f"/follow/{author_id}", headers=reader)
+    older = (await client.post("/posts/createPost", data={"title": "old", "content": "x"}, headers=author)).json()["id"]
+    newer = (await client.post("/posts/createPost", data={"title": "new", "content": "x"}, headers=author)).json()["id"]
+
+    page = (await client.get("/feed/home?limit=1", headers=reader)).json()["feed"]
+    assert [i["post_id"] for i in page] == [newer]
+    key = await redis_service.versioned_key(f"feed:home:{reader_id}:o:0:1:1", "feed", f"feed:home:{reader_id}")
+    r = redis_service.redis_client
+    assert await r.exists(key)
+
+    await client.post("/vote/on_post", json={"post_id": older, "choice": True}, headers=reader)
+    assert await r.exists(key)
+    await client.post("/vote/on_post", json={"post_id": newer, "choice": True}, headers=reader)
+    assert not await r.exists(key)
+
+    page = (await client.get("/feed/home?limit=1", headers=reader)).json()["feed"]
+    assert page[0]["post"]["likes"] == 1 and page[0]["post"]["is_liked"] is True
@@ -0,0 +1,82 @@
+"""
+Tests for post comment previews (app/comment_previews.py, posts.top_comments).
+
+Covers:
+  - Home feed, explore and post detail carry the top-liked + latest comments
+  - Comment likes and deletes re-rank the preview; no comments → null
+  - A commenter's rename reaches the previews that show their comments
+"""
+from app import explore_ranking, redis_service
+from conftest import signup_and_login
+
+
+async def comment(client, headers, post_id: int, content: str) -> int:
+    resp = await client.post("/comment/createComment", json={"post_id": post_id, "content": content}, headers=headers)
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+async def test_preview_in_feed_explore_and_detail(client):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'preview_author')}"}
+    reader = {"Authorization": f"Bearer {await signup_and_login(client, 'preview_reader')}"}
+    author_id = (await client.get("/me/profile", headers=author)).json()["id"]
+    await client.post(f"/follow/{author_id}", headers=reader)
+    post_id = (await client.post("/posts/createPost", data={"title": "p", "content": "x"}, headers=author)).json()["id"]
+
+    await comment(client, reader, post_id, "first")
+    liked = await comment(client, reader, post_id, "second")
+    await comment(client, author, post_id, "third")
+    await client.post("/vote/on_comment", json={"comment_id": liked, "choice": True}, headers=author)
+
+    feed = (await client.get("/feed/home?limit=10", headers=reader)).json()["feed"]
+    preview = next(i for i in feed if i["post_id"] == post_id)["post"]["top_comments"]
+    assert [c["content"] for c in preview["top"]] == ["second", "third"]
+    assert preview["top"][0]["likes"] == 1
+    assert preview["latest"]["content"] == "third"
+    assert preview["latest"]["user"]["username"] == "preview_author"
+
+    await redis_service.redis_client.delete(explore_ranking.RANKED_KEY)
+    explore = (await client.get("/feed/explore?limit=50&hide_seen=false", headers=reader)).json()["posts"]
+    assert next(p for p in explore if p["id"] == post_id)["top_comments"] == preview
+
+    detail = (await client.get(f"/posts/getPost/{post_id}", headers=reader)).json()
+    assert detail["top_comments"] == preview
+
+
+async def test_likes_and_deletes_rerank_the_preview(client):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'rerank_author')}"}
+    fan = {"Authorization": f"Bearer {await signup_and_login(client, 'rerank_fan')}"}
+    post_id = (await client.post("/posts/createPost", data={"title": "p", "content": "x"}, headers=author)).json()["id"]
+    assert (await client.get(f"/posts/getPost/{post_id}", headers=author)).json()["top_comments"] is None
+
+    old = await comment(client, fan, post_id, "old")
+    new = await comment(client, fan, post_id, "new")
+    await client.post("/vote/on_comment", json={"comment_id": old, "choice": True}, headers=author)
+    preview = (await client.get(f"/posts/getPost/{post_id}", headers=author)).json()["top_comments"]
+    assert [c["id"] for c in preview["top"]] == [old, new]
+
+    # unliking puts the newer one back on top (equal likes → newest first)
+    await client.post("/vote/on_comment", json={"comment_id": old, "choice": True}, headers=author)
+    preview = (await client.get(f"/posts/getPost/{post_id}", headers=author)).json()["top_comments"]
+    assert [c["id"] for c in preview["top"]] == [new, old]
+
+    await client.delete(f"/comments/delete_comment/{new}", headers=fan)
+    preview = (await client.get(f"/posts/getPost/{post_id}", headers=author)).json()["top_comments"]
+    assert [c["id"] for c in preview["top"]] == [old]
+    assert preview["latest"]["id"] == old
+
+    await client.delete(f"/comments/delete_comment/{old}", headers=fan)
+    assert (await client.get(f"/posts/getPost/{post_id}", headers=author)).json()["top_comments"] is None
+
+
+async def test_commenter_rename_updates_preview(client):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'rename_post_author')}"}
+    commenter = {"Authorization": f"Bearer {await signup_and_login(client, 'rename_commenter')}"}
+    post_id = (await client.post("/posts/createPost", data={"title": "p", "content": "x"}, headers=author)).json()["id"]
+    await comment(client, commenter, post_id, "hello")
+
+    resp = await client.patch("/me/updateInfo", data={"username": "rename_commenter2"}, headers=commenter)
+    assert resp.status_code == 200
+    preview = (await client.get(f"/posts/getPost/{post_id}", headers=author)).json()["top_comments"]
+    assert preview["latest"]["user"]["username"] == "rename_commenter2"
+    assert preview["top"][0]["user"]["username"] == "rename_commenter2"
@@ -71,6 +71,33 @@ async def test_pagination_has_more_calculation(client, get_token):
         assert data1["pagination"]["has_more"] == False
 
 
+async def test_cursor_pagination_walks_every_post_once(client, get_token):
+    """Following next_cursor visits each post exactly once, newest first"""
+    headers = {"Authorization": f"Bearer {get_token}"}
+    for i in range(3):
+        await client.post("/posts/createPost",
+            data={"title": f"Cursor {i}", "content": "paging"}, headers=headers)
+
+    seen, cursor = [], None
+    while True:
+        url = "/me/posts?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        data = (await client.get(url, headers=headers)).json()
+        seen.extend(p["id"] for p in data["posts"])
+        cursor = data["pagination"]["next_cursor"]
+        assert data["pagination"]["has_more"] == (cursor is not None)
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == data["pagination"]["total"]
+    assert seen == sorted(seen, reverse=True)
+
+
+async def test_invalid_cursor_rejected(client, get_token):
+    resp = await client.get("/me/posts?cursor=not-a-cursor",
+        headers={"Authorization": f"Bearer {get_token}"})
+    assert resp.status_code == 400
+
+
 async def test_media_info_response(client, get_token):
     """Verify MediaInfo schema for profile pictures"""
     # First try to get profile pic
@@ -0,0 +1,79 @@
+"""
+Tests for the engagement-ranked explore feed (app/explore_ranking.py).
+
+Covers:
+  - refresh() ranks a liked post above a newer unliked one
+  - /feed/explore serves the ranked order and pages with "rank." cursors
+  - A vote marks the post dirty and rescore_dirty() moves it up
+  - Deleting a post drops it from the ranking
+"""
+from app import explore_ranking, redis_service
+from conftest import signup_and_login
+
+
+async def ranked_ids() -> list[int]:
+    return [int(i) for i in await redis_service.redis_client.zrevrange(explore_ranking.RANKED_KEY, 0, -1)]
+
+
+async def make_posts(client, prefix: str, n: int):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, f'{prefix}_author')}"}
+    fans = [{"Authorization": f"Bearer {await signup_and_login(client, f'{prefix}_fan{i}')}"} for i in range(3)]
+    ids = [
+        (await client.post("/posts/createPost", data={"title": f"{prefix}{i}", "content": "x"}, headers=author)).json()["id"]
+        for i in range(n)
+    ]
+    return author, fans, ids
+
+
+async def like(client, post_id: int, headers: dict) -> None:
+    resp = await client.post("/vote/on_post", json={"post_id": post_id, "choice": True}, headers=headers)
+    assert resp.status_code == 201, resp.text
+
+
+async def test_refresh_ranks_by_engagement(client, ranking):
+    _, fans, (liked, fresh) = await make_posts(client, "rank_eng", 2)
+    for fan in fans:
+        await like(client, liked, fan)
+
+    await explore_ranking.refresh()
+    ids = await ranked_ids()
+    assert ids.index(liked) < ids.index(fresh)
+
+
+async def test_explore_pages_through_ranking(client, ranking):
+    _, fans, ids = await make_posts(client, "rank_page", 3)
+    await like(client, ids[0], fans[0])
+    await explore_ranking.refresh()
+    expected = await ranked_ids()
+
+    first = (await client.get("/feed/explore?limit=2", headers=fans[1])).json()
+    assert [p["id"] for p in first["posts"]] == expected[:2]
+    assert first["pagination"]["next_cursor"] == "rank.2"
+    assert first["pagination"]["total"] == len(expected)
+
+    second = (await client.get(f"/feed/explore?limit=2&cursor={first['pagination']['next_cursor']}", headers=fans[1])).json()
+    assert [p["id"] for p in second["posts"]] == expected[2:4]
+
+
+async def test_vote_rescores_dirty_post(client, ranking):
+    _, fans, (old, new) = await make_posts(client, "rank_dirty", 2)
+    await explore_ranking.refresh()
+    await redis_service.redis_client.delete(explore_ranking.DIRTY_KEY)
+    ids = await ranked_ids()
+    assert ids.index(new) < ids.index(old)
+
+    for fan in fans:
+        await like(client, old, fan)
+    assert await redis_service.redis_client.sismember(explore_ranking.DIRTY_KEY, str(old))
+    assert await explore_ranking.rescore_dirty() == 1
+    ids = await ranked_ids()
+    assert ids.index(old) < ids.index(new)
+
+
+async def test_delete_forgets_post(client, ranking):
+    author, _, (post,) = await make_posts(client, "rank_del", 1)
+    await explore_ranking.refresh()
+    assert post in await ranked_ids()
+
+    await client.delete(f"/posts/deletePost/{post}", headers=author)
+    assert post not in await ranked_ids()
@@ -0,0 +1,61 @@
+"""
+Tests for new-post polling and the SSE stream (app/feed_updates.py).
+
+Covers:
+  - /feed/home/new-count counts posts newer than the page's latest_cursor
+  - An open stream sends the current count, then a new one when a followed author posts
+  - An open stream holds no pooled DB connection
+"""
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app import feed_updates
+from app.principal_cache import Principal
+from app.routes.feed import streamHomeUpdates
+from conftest import TEST_ASYNC_URL, make_pair
+
+
+async def test_new_count_since_latest_cursor(client):
+    author, reader, _, _ = await make_pair(client, "nc")
+    await client.post("/posts/createPost", data={"title": "first", "content": "x"}, headers=author)
+    feed = (await client.get("/feed/home", headers=reader)).json()
+    since = feed["latest_cursor"]
+
+    assert (await client.get(f"/feed/home/new-count?since={since}", headers=reader)).json() == {"count": 0}
+    for i in range(2):
+        await client.post("/posts/createPost", data={"title": f"new {i}", "content": "x"}, headers=author)
+    assert (await client.get(f"/feed/home/new-count?since={since}", headers=reader)).json() == {"count": 2}
+
+    assert (await client.get("/feed/home/new-count?since=garbage", headers=reader)).status_code == 400
+
+
+async def test_stream_pushes_new_post_hints(client):
+    author, reader, _, reader_id = await make_pair(client, "sse")
+    listener = asyncio.create_task(feed_updates.listen())
+    await asyncio.sleep(0.05)
+    try:
+        stream = await feed_updates.open_stream(reader_id, datetime.now(timezone.utc))
+        assert await stream.__anext__() == 'event: new_posts\ndata: {"count": 0}\n\n'
+
+        next_event = asyncio.ensure_future(stream.__anext__())
+        await client.post("/posts/createPost", data={"title": "live", "content": "x"}, headers=author)
+        assert await asyncio.wait_for(next_event, 5) == 'event: new_posts\ndata: {"count": 1}\n\n'
+        await stream.aclose()
+    finally:
+        listener.cancel()
+    assert not feed_updates._waiting
+
+
+async def test_open_stream_holds_no_connection(client, monkeypatch):
+    _, _, _, reader_id = await make_pair(client, "ssepool")
+    pooled = create_async_engine(TEST_ASYNC_URL)
+    monkeypatch.setattr(feed_updates, "_session_factory", async_sessionmaker(pooled, expire_on_commit=False))
+    try:
+        baseline = pooled.pool.checkedout()
+        response = await streamHomeUpdates(since=None, currentUser=Principal(id=reader_id, username="ssepool_reader"))
+        assert await response.body_iterator.__anext__() == 'event: new_posts\ndata: {"count": 0}\n\n'
+        # the stream is open and the sources were looked up — the connection is back
+        assert pooled.pool.checkedout() == baseline
+        await response.body_iterator.aclose()
+    finally:
+        await pooled.dispose()
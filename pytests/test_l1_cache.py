@@ -0,0 +1,72 @@
+"""
+Tests for the per-worker L1 in front of the Redis page cache (app/redis_service.py).
+
+Covers:
+  - A repeat get_cache is answered from L1 without a Redis round trip
+  - delete_cache / invalidate / pattern deletes drop L1 entries, and an
+    invalidation published by another worker reaches this one's L1
+  - Cached profiles are shared, so per-viewer fields never leak between users
+  - /health/cache reports the L1/L2 hit ratios
+"""
+import asyncio
+import json
+from app import redis_service
+from conftest import signup_and_login
+
+
+async def test_repeat_reads_skip_redis(monkeypatch):
+    await redis_service.set_cache("l1test:a", {"v": 1}, ttl=60)
+    before = dict(redis_service._stats)
+
+    async def no_round_trip(key):
+        raise AssertionError("went to Redis")
+
+    monkeypatch.setattr(redis_service.redis_client, "get", no_round_trip)
+    assert await redis_service.get_cache("l1test:a") == {"v": 1}
+    assert await redis_service.get_cache("l1test:a") == {"v": 1}
+    assert redis_service._stats["l1_hits"] == before["l1_hits"] + 2
+    await redis_service.delete_cache("l1test:a")
+
+
+async def test_invalidation_drops_l1_entries():
+    r = redis_service.redis_client
+    for key in ("l1test:del", "l1test:tag", "l1test:pat:1"):
+        await redis_service.set_cache(key, {"k": key}, ttl=60, tags=["post:-10"] if key == "l1test:tag" else ())
+
+    await redis_service.delete_cache("l1test:del")
+    await redis_service.invalidate("post:-10")
+    await redis_service.delete_cache_pattern("l1test:pat:*")
+    for key in ("l1test:del", "l1test:tag", "l1test:pat:1"):
+        assert await redis_service.get_cache(key) is None
+
+    # another worker deleting a key: only its message tells this worker
+    await redis_service.set_cache("l1test:remote", {"v": 1}, ttl=60)
+    listener = asyncio.create_task(redis_service.listen_invalidations())
+    await asyncio.sleep(0.05)
+    await r.delete("l1test:remote")
+    assert await redis_service.get_cache("l1test:remote") == {"v": 1}  # stale L1 copy
+    await r.publish(redis_service.INVALIDATION_CHANNEL, json.dumps({"keys": ["l1test:remote"]}))
+    for _ in range(50):
+        await asyncio.sleep(0.02)
+        if "l1test:remote" not in redis_service._l1:
+            break
+    assert await redis_service.get_cache("l1test:remote") is None
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+
+
+async def test_cached_profile_is_not_shared_per_viewer(client):
+    star = {"Authorization": f"Bearer {await signup_and_login(client, 'l1_star')}"}
+    fan = {"Authorization": f"Bearer {await signup_and_login(client, 'l1_fan')}"}
+    other = {"Authorization": f"Bearer {await signup_and_login(client, 'l1_other')}"}
+    star_id = (await client.get("/me/profile", headers=star)).json()["id"]
+    await client.post(f"/follow/{star_id}", headers=fan)
+
+    assert (await client.get(f"/users/{star_id}/profile", headers=fan)).json()["is_following"] is True
+    assert (await client.get(f"/users/{star_id}/profile", headers=other)).json()["is_following"] is False
+    assert (await client.get(f"/users/{star_id}/profile", headers=fan)).json()["is_following"] is True
+
+    stats = (await client.get("/health/cache")).json()
+    assert stats["l1_hits"] >= 2
+    assert 0 < stats["l1_hit_ratio"] <= 1
+    assert set(stats) >= {"l2_hits", "misses", "lookups", "l1_entries", "l2_hit_ratio"}
@@ -0,0 +1,39 @@
+"""
+Tests for the row-tuple read path of the list endpoints (app/list_queries.py).
+
+Covers:
+  - Home feed items carry the joined owner and a per-page is_liked
+  - Followers/following come straight off the connections table (404 for unknown users)
+"""
+from conftest import signup_and_login
+
+
+async def test_home_feed_rows_map_to_response(client):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'lq_author')}"}
+    reader = {"Authorization": f"Bearer {await signup_and_login(client, 'lq_reader')}"}
+    author_id = (await client.get("/me/profile", headers=author)).json()["id"]
+
+    liked = (await client.post("/posts/createPost", data={"title": "liked", "content": "x"}, headers=author)).json()["id"]
+    await client.post("/posts/createPost", data={"title": "not liked", "content": "y"}, headers=author)
+    await client.post(f"/follow/{author_id}", headers=reader)
+    await client.post("/vote/on_post", json={"post_id": liked, "choice": True}, headers=reader)
+
+    feed = (await client.get("/feed/home?limit=10", headers=reader)).json()["feed"]
+    assert [item["post"]["title"] for item in feed] == ["not liked", "liked"]
+    assert all((item["owner"]["id"], item["owner"]["username"]) == (author_id, "lq_author") for item in feed)
+    assert {item["post_id"]: item["post"]["is_liked"] for item in feed} == {liked: True, feed[0]["post_id"]: False}
+
+
+async def test_followers_and_following_lists(client):
+    a = {"Authorization": f"Bearer {await signup_and_login(client, 'lq_follow_a')}"}
+    b = {"Authorization": f"Bearer {await signup_and_login(client, 'lq_follow_b')}"}
+    a_id = (await client.get("/me/profile", headers=a)).json()["id"]
+    b_id = (await client.get("/me/profile", headers=b)).json()["id"]
+    await client.post(f"/follow/{b_id}", headers=a)
+
+    followers = (await client.get(f"/users/{b_id}/followers", headers=a)).json()
+    assert [(u["id"], u["username"], u["nickname"]) for u in followers] == [(a_id, "lq_follow_a", "lq_follow_a")]
+    following = (await client.get(f"/users/{a_id}/following", headers=b)).json()
+    assert [u["id"] for u in following] == [b_id]
+
+    assert (await client.get("/users/999999/followers", headers=a)).status_code == 404
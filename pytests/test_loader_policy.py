@@ -0,0 +1,37 @@
+"""
+Tests for the relationship loading policy in app/models.py.
+
+Covers:
+  - Every mapped relationship is lazy="raise" (no hidden eager loads)
+  - Touching a relationship the query did not load raises instead of querying
+"""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import configure_mappers
+from app import models, notification_service
+from app.db import Base
+
+
+def test_every_relationship_is_lazy_raise():
+    configure_mappers()
+    eager = [
+        f"{mapper.class_.__name__}.{rel.key}"
+        for mapper in Base.registry.mappers
+        for rel in mapper.relationships
+        if rel.lazy != "raise"
+    ]
+    assert eager == []
+
+
+async def test_unloaded_relationship_raises(client):
+    await client.post("/user/signup", json={
+        "username": "lazy_raise_user", "password": "password123", "nickname": "lazy",
+    })
+    # conftest points this factory at the test DB
+    async with notification_service._session_factory() as session:
+        user = (await session.execute(
+            select(models.User).where(models.User.username == "lazy_raise_user")
+        )).scalars().one()
+        with pytest.raises(InvalidRequestError):
+            user.followers
@@ -1,15 +1,4 @@
-# helpers
-
-async def signup_and_login(client, username: str, password: str = "password123") -> str:
-    """Create a fresh user and return their access token."""
-    await client.post("/user/signup", json={
-        "username": username,
-        "password": password,
-        "nickname": username,
-    })
-    login = await client.post("/login", data={"username": username, "password": password})
-    assert login.status_code == 202, f"login failed for {username}: {login.text}"
-    return login.json()["accessToken"]
+from conftest import signup_and_login
 
 
 # empty-state tests (main test user has no notifications yet)
@@ -0,0 +1,83 @@
+"""
+Tests for concurrent request reads (app/parallel_reads.py).
+
+Covers:
+  - Statements and callables come back in argument order
+  - Each read gets its own session, never the request's one
+  - No more than `fanout` reads hold a connection at the same time
+  - The limit holds per request across several and nested gather_reads() calls
+"""
+import asyncio
+from sqlalchemy import select, literal
+from app import notification_service, parallel_reads
+from app.config import settings
+from app.parallel_reads import gather_reads
+
+
+async def test_results_keep_argument_order():
+    async with notification_service._session_factory() as db:
+        one, two, three = await gather_reads(
+            db,
+            select(literal(1)),
+            lambda s: s.scalar(select(literal(2))),
+            select(literal(3)),
+        )
+    assert (one.scalar(), two, three.scalar()) == (1, 2, 3)
+
+
+async def test_fanout_is_bounded():
+    running, peak, sessions = 0, 0, []
+
+    async def read(session):
+        nonlocal running, peak
+        sessions.append(session)
+        running += 1
+        peak = max(peak, running)
+        await session.execute(select(literal(1)))
+        await asyncio.sleep(0.05)
+        running -= 1
+
+    async with notification_service._session_factory() as db:
+        await gather_reads(db, *[read] * 5, fanout=2)
+        assert all(session is not db for session in sessions)
+    assert peak == 2
+    assert len({id(session) for session in sessions}) == 5
+
+
+async def test_fanout_one_runs_in_order_on_request_session():
+    seen = []
+
+    async def read(session):
+        seen.append(session)
+
+    async with notification_service._session_factory() as db:
+        await gather_reads(db, read, read, fanout=1)
+        assert seen == [db, db]
+
+
+async def test_fanout_is_per_request(monkeypatch):
+    monkeypatch.setattr(settings, "db_request_fanout", 2)
+    running, peak = 0, 0
+
+    async def read(session):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await session.execute(select(literal(1)))
+        await asyncio.sleep(0.05)
+        running -= 1
+
+    async def nested(session):
+        # already holds a slot: its own reads run in order on `session`
+        await gather_reads(session, read, read)
+
+    async def request(db):
+        parallel_reads.start_request()      # what main.py's middleware does
+        await asyncio.gather(
+            gather_reads(db, read, read, read),
+            gather_reads(db, read, nested, read),
+        )
+
+    async with notification_service._session_factory() as db:
+        await asyncio.create_task(request(db))
+    assert peak == 2
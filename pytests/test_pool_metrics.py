@@ -0,0 +1,29 @@
+"""
+Tests for the connection pool gauges (app/pool_metrics.py).
+
+Covers:
+  - /health/pool reports the configured pool and the wait histogram
+  - Checkout waits land in the right cumulative bucket
+"""
+from app import pool_metrics
+from app.config import settings
+
+
+async def test_pool_health_endpoint(client):
+    resp = await client.get("/health/pool")
+    assert resp.status_code == 200
+    data = resp.json()["primary"]
+    assert data["pool_class"] == "InstrumentedQueuePool"
+    assert data["size"] == settings.db_pool_size
+    assert data["max_overflow"] == settings.db_max_overflow
+    assert {"checked_out", "overflow", "checkout_wait"} <= data.keys()
+
+
+def test_wait_histogram_buckets():
+    hist = pool_metrics.WaitHistogram(buckets=(1, 10, 100))
+    for ms in (0.5, 3, 10, 250):
+        hist.observe(ms)
+    snap = hist.snapshot()
+    assert snap["buckets_ms"] == {"1": 1, "10": 3, "100": 3, "+Inf": 4}
+    assert snap["count"] == 4
+    assert snap["sum_ms"] == 263.5
@@ -0,0 +1,75 @@
+"""
+Tests for first-page pre-warming (app/prewarm_service.py).
+
+Covers:
+  - Login warms home and notifications under the routes' own cache keys
+  - A second warm-up inside the dedupe window is skipped
+  - The semaphore keeps concurrent warm-ups at PREWARM_CONCURRENCY
+  - Warming records no impressions in the seen filter
+"""
+import asyncio
+import pytest
+from app import prewarm_service, redis_service, seen_filter
+from app.config import settings
+from conftest import signup_and_login
+
+
+@pytest.fixture
+def prewarm_on(monkeypatch):
+    monkeypatch.setattr(settings, "prewarm_max_pending", 200)
+
+
+async def drain():
+    while prewarm_service._pending:
+        await asyncio.gather(*prewarm_service._pending)
+
+
+async def test_login_warms_first_pages(client, prewarm_on):
+    await client.post("/user/signup", json={"username": "warm_user", "password": "password123", "nickname": "w"})
+    login = (await client.post("/login", data={"username": "warm_user", "password": "password123"})).json()
+    await drain()
+
+    user_id = login["id"]
+    client_ = redis_service.redis_client
+    assert await client_.exists(await redis_service.versioned_key(f"feed:home:{user_id}:o:0:10:1", "feed", f"feed:home:{user_id}"))
+    assert await client_.exists(await redis_service.versioned_key(f"notifications:{user_id}:o:0:20:1", f"notifications:{user_id}"))
+    # nothing warmed was shown yet, so nothing counts as seen
+    assert not await client_.exists(seen_filter._key(user_id, seen_filter._generation()))
+
+    headers = {"Authorization": f"Bearer {login['accessToken']}"}
+    assert (await client.get("/feed/home", headers=headers)).status_code == 200
+
+
+async def test_repeat_warm_is_skipped(client):
+    token = await signup_and_login(client, "warm_twice")
+    user_id = (await client.get("/me/profile", headers={"Authorization": f"Bearer {token}"})).json()["id"]
+    assert await prewarm_service.warm(user_id) is True
+    assert await prewarm_service.warm(user_id) is False
+
+
+async def test_concurrency_is_capped(client, monkeypatch, prewarm_on):
+    running, peak = 0, 0
+
+    async def slow_page(db, principal):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    monkeypatch.setattr(prewarm_service, "_gate", asyncio.Semaphore(2))
+    monkeypatch.setattr(prewarm_service, "homeFeedPage", slow_page)
+    monkeypatch.setattr(prewarm_service, "notifications_page", slow_page)
+    token = await signup_and_login(client, "warm_storm")
+    user_id = (await client.get("/me/profile", headers={"Authorization": f"Bearer {token}"})).json()["id"]
+    await drain()
+
+    async def no_dedupe(name, ttl):
+        return True
+
+    # a login storm of one user — let every warm-up past the dedupe key
+    monkeypatch.setattr(redis_service, "try_lock", no_dedupe)
+    for _ in range(6):
+        prewarm_service.schedule(user_id)
+    await drain()
+    assert peak == 2
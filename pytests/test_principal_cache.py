@@ -0,0 +1,66 @@
+"""
+Tests for the per-worker auth principal cache (app/principal_cache.py).
+
+Covers:
+  - A cache hit needs no DB session at all
+  - Logout drops the cached principal so the token is rejected at once
+  - Profile edits invalidate the cached snapshot (new username is served)
+  - The user → tokens index forgets users whose tokens expired or were evicted
+"""
+import time
+from fastapi import HTTPException
+from app import oauth2, principal_cache
+from app.my_utils.ttl_cache import TTLCache
+from conftest import signup_and_login
+
+
+async def test_cache_hit_needs_no_db(client):
+    token = await signup_and_login(client, "pc_hit_user")
+    # first authenticated request warms the cache
+    resp = await client.get("/feed/home", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    # dbs=None would blow up on any query — a hit must not touch it
+    principal = await oauth2.verifyPrincipal(token, HTTPException(status_code=401), None)
+    assert principal.username == "pc_hit_user"
+
+
+async def test_logout_invalidates_cached_principal(client):
+    token = await signup_and_login(client, "pc_logout_user")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await client.get("/feed/home", headers=headers)).status_code == 200
+    assert principal_cache.get(token) is not None
+
+    assert (await client.post("/logout", headers=headers)).status_code == 200
+    assert principal_cache.get(token) is None
+    assert (await client.get("/feed/home", headers=headers)).status_code == 401
+
+
+async def test_profile_update_refreshes_snapshot(client):
+    token = await signup_and_login(client, "pc_rename_user")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await client.get("/feed/home", headers=headers)).status_code == 200
+
+    resp = await client.patch("/me/updateInfo", data={"username": "pc_renamed_user"}, headers=headers)
+    assert resp.status_code == 200
+
+    post = await client.post("/posts/createPost",
+        data={"title": "renamed", "content": "hello"}, headers=headers)
+    assert post.status_code == 201
+    assert post.json()["owner"]["username"] == "pc_renamed_user"
+
+
+def test_token_index_stays_bounded(monkeypatch):
+    monkeypatch.setattr(principal_cache, "_cache", TTLCache(maxsize=4, ttl=60))
+    monkeypatch.setattr(principal_cache, "_tokens_by_user", {})
+    exp = int(time.time()) + 3600
+    for user_id in range(1, 101):
+        principal_cache.put(f"token-{user_id}", principal_cache.Principal(id=user_id, username=f"u{user_id}"), exp)
+        assert len(principal_cache._tokens_by_user) <= 8
+    # the users still cached are all indexed, so invalidation still reaches them
+    assert set(principal_cache._tokens_by_user) >= {97, 98, 99, 100}
+
+    # a token that expires on lookup takes its user's empty entry with it
+    principal_cache.put("short", principal_cache.Principal(id=500, username="s"), int(time.time()) + 1)
+    principal_cache._cache.set(principal_cache.token_hash("short"), (principal_cache.Principal(id=500, username="s"), time.time() - 1))
+    assert principal_cache.get("short") is None
+    assert 500 not in principal_cache._tokens_by_user
@@ -0,0 +1,123 @@
+"""
+Query-plan regression suite for the hot-path indexes (see app/models.py).
+
+Each hot query from app/routes and chat_system is EXPLAINed against a seeded
+(and ANALYZEd) database. With a few thousand rows per table the planner only
+picks a Seq Scan — or walks some unrelated index end to end (an index scan
+with no Index Cond) — when no index fits, so either one fails the test: an
+index is missing or the query changed shape. Seed rows live in one transaction
+that is rolled back at the end, so other tests never see them.
+"""
+import json
+import pytest
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.dialects import postgresql
+from app import models
+from app.my_utils.pagination import keyset
+
+SEED_SQL = [
+    "INSERT INTO users (username, password, nickname, email) "
+    "SELECT 'plan_seed_' || g, 'x', 'seed', 'plan_seed_' || g || '@example.com' FROM generate_series(1, 300) g",
+    "CREATE TEMP TABLE seed_users ON COMMIT DROP AS SELECT id FROM users WHERE username LIKE 'plan_seed_%'",
+    "INSERT INTO posts (title, content, user_id) "
+    "SELECT 'seed post ' || g, 'body', (SELECT id FROM seed_users ORDER BY id OFFSET g % 300 LIMIT 1) "
+    "FROM generate_series(1, 3000) g",
+    "INSERT INTO comments (post_id, user_id, comment_content) "
+    "SELECT p.id, p.user_id, 'nice' FROM posts p JOIN seed_users u ON u.id = p.user_id",
+    "INSERT INTO votes (post_id, user_id, action) "
+    "SELECT p.id, p.user_id, p.id % 2 = 0 FROM posts p JOIN seed_users u ON u.id = p.user_id",
+    "INSERT INTO connections (followed_id, follower_id) "
+    "SELECT a.id, b.id FROM seed_users a JOIN seed_users b ON b.id <> a.id AND (a.id + b.id) % 20 = 0",
+    "INSERT INTO notifications (owner_id, actor_id, type, text, is_read) "
+    "SELECT a.id, b.id, 'like', 'seed', (a.id + b.id) % 3 = 0 "
+    "FROM seed_users a JOIN seed_users b ON (a.id + b.id) % 15 = 0",
+    "INSERT INTO messages (content, sender_id, receiver_id, is_read) "
+    "SELECT 'hi', a.id, b.id, (a.id + b.id) % 2 = 0 FROM seed_users a JOIN seed_users b ON (a.id * b.id) % 11 = 0",
+    "INSERT INTO shared_posts (post_id, from_user_id, to_user_id, is_read) "
+    "SELECT p.id, p.user_id, p.user_id + 1, p.id % 2 = 0 FROM posts p JOIN seed_users u ON u.id = p.user_id "
+    "WHERE p.user_id + 1 IN (SELECT id FROM seed_users)",
+    "INSERT INTO deleted_messages (user_id, message_id) SELECT sender_id, id FROM messages WHERE id % 7 = 0",
+    "INSERT INTO deleted_shared_posts (user_id, shared_post_id) SELECT from_user_id, id FROM shared_posts WHERE id % 7 = 0",
+    "ANALYZE",
+]
+
+
+@pytest.fixture(scope="module")
+def plan_conn(sync_db):
+    trans = sync_db.begin()
+    for stmt in SEED_SQL:
+        sync_db.execute(text(stmt))
+    uid, friend = sync_db.execute(text("SELECT min(id), min(id) + 1 FROM seed_users")).one()
+    yield sync_db, uid, friend
+    trans.rollback()
+
+
+def hot_queries(uid: int, friend: int):
+    M, S = models.Message, models.SharedPost
+    deleted_msgs = select(models.DeletedMessage.message_id).where(models.DeletedMessage.user_id == uid).scalar_subquery()
+    deleted_shares = select(models.DeletedSharedPost.shared_post_id).where(models.DeletedSharedPost.user_id == uid).scalar_subquery()
+    following = select(models.connections.c.followed_id).where(models.connections.c.follower_id == uid)
+    return {
+        "user_posts": keyset(select(models.Post).where(models.Post.user_id == uid), models.Post.created_at, models.Post.id, 10),
+        "home_feed": keyset(select(models.Post).where(models.Post.user_id.in_([uid, friend])), models.Post.created_at, models.Post.id, 10),
+        "explore_feed": keyset(select(models.Post), models.Post.created_at, models.Post.id, 20),
+        "comments_on_post": keyset(select(models.Comments).where(models.Comments.post_id == 1), models.Comments.created_at, models.Comments.id, 10),
+        "my_comment_stats": select(func.count()).select_from(models.Comments).where(models.Comments.user_id == uid),
+        "liked_posts": select(models.Votes.post_id).where(models.Votes.user_id == uid, models.Votes.action == True),  # noqa: E712
+        "following_ids": following,
+        "follower_ids": select(models.connections.c.follower_id).where(models.connections.c.followed_id == uid),
+        "user_by_email": select(models.User).where(models.User.email == "plan_seed_1@example.com"),
+        "notifications": keyset(select(models.Notification).where(models.Notification.owner_id == uid),
+                                models.Notification.created_at, models.Notification.id, 20),
+        "unread_notifications": select(func.count()).select_from(models.Notification)
+            .where(models.Notification.owner_id == uid, models.Notification.is_read == False),  # noqa: E712
+        "chat_history_messages": select(M).where(
+            M.is_deleted_for_everyone == False,  # noqa: E712
+            or_(and_(M.sender_id == uid, M.receiver_id == friend), and_(M.sender_id == friend, M.receiver_id == uid)),
+            ~M.id.in_(deleted_msgs),
+        ).order_by(M.created_at.desc()),
+        "chat_history_shares": select(S).where(
+            S.is_deleted_for_everyone == False,  # noqa: E712
+            or_(and_(S.from_user_id == uid, S.to_user_id == friend), and_(S.from_user_id == friend, S.to_user_id == uid)),
+            ~S.id.in_(deleted_shares),
+        ).order_by(S.created_at.desc()),
+        "recent_chats": select(M).where(
+            or_(M.sender_id == uid, M.receiver_id == uid), M.is_deleted_for_everyone == False,  # noqa: E712
+        ).order_by(M.created_at.desc()).limit(1000),
+        "missed_messages": select(M).where(
+            M.is_deleted_for_everyone == False, M.receiver_id == uid, M.is_read == False,  # noqa: E712
+        ).order_by(M.created_at.asc()),
+        "missed_shares": select(S).where(S.to_user_id == uid, S.is_read == False).order_by(S.created_at.asc()),  # noqa: E712
+    }
+
+
+QUERY_NAMES = list(hot_queries(0, 0))
+# newest-first over the whole table: walking the (created_at, id) index in
+# order and stopping at LIMIT is exactly the plan we want
+FULL_INDEX_WALK_OK = {"explore_feed"}
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def full_scans(node: dict, allow_index_walk: bool) -> list[str]:
+    kind = node["Node Type"]
+    found = []
+    if kind == "Seq Scan":
+        found.append(f"Seq Scan on {node.get('Relation Name')}")
+    elif kind in INDEX_SCANS and "Index Cond" not in node and not allow_index_walk:
+        found.append(f"full walk of {node.get('Index Name')}")
+    for child in node.get("Plans", []):
+        found += full_scans(child, allow_index_walk)
+    return found
+
+
+@pytest.mark.parametrize("name", QUERY_NAMES)
+def test_hot_query_uses_an_index(plan_conn, name):
+    conn, uid, friend = plan_conn
+    stmt = hot_queries(uid, friend)[name]
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans = full_scans(plan[0]["Plan"], name in FULL_INDEX_WALK_OK)
+    assert not scans, f"{name} does {scans}:\n{json.dumps(plan, indent=1)}"
@@ -0,0 +1,80 @@
+"""
+Tests for read-replica routing (app/read_routing.py).
+
+The test DB stands in for the replica; a counting session factory shows
+which side served each read.
+
+Covers:
+  - Read-only routes use the replica session
+  - After a write the same user's reads stay on the primary
+  - Other users are not pinned by someone else's write
+  - A lagging replica doesn't refill a shared cache entry with pre-write data
+"""
+from contextlib import asynccontextmanager
+import pytest
+from sqlalchemy import select
+from app import db, models, notification_service, read_routing, redis_service
+from conftest import signup_and_login
+
+
+@pytest.fixture
+def replica_sessions(monkeypatch):
+    opened = []
+
+    def factory():
+        opened.append(1)
+        # conftest points this factory at the test DB
+        return notification_service._session_factory()
+
+    monkeypatch.setattr(db, "ReplicaSessionLocal", factory)
+    return opened
+
+
+async def test_reads_go_to_replica(client, replica_sessions):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'rr_reader')}"}
+    resp = await client.get("/feed/explore", headers=headers)
+    assert resp.status_code == 200
+    assert len(replica_sessions) == 1
+
+
+async def test_write_pins_reads_to_primary(client, replica_sessions):
+    writer = {"Authorization": f"Bearer {await signup_and_login(client, 'rr_writer')}"}
+    other = {"Authorization": f"Bearer {await signup_and_login(client, 'rr_other')}"}
+
+    post = await client.post("/posts/createPost", data={"title": "rw", "content": "fresh"}, headers=writer)
+    assert post.status_code == 201
+    user_id = post.json()["owner"]["id"]
+    assert await redis_service.redis_client.exists(read_routing.sticky_key(user_id))
+
+    assert (await client.get("/feed/explore?limit=5", headers=writer)).status_code == 200
+    assert replica_sessions == []
+
+    assert (await client.get("/feed/explore?limit=5", headers=other)).status_code == 200
+    assert len(replica_sessions) == 1
+
+
+async def test_lagging_replica_does_not_refill_shared_entries(client, monkeypatch):
+    star = {"Authorization": f"Bearer {await signup_and_login(client, 'rr_star')}"}
+    fan = {"Authorization": f"Bearer {await signup_and_login(client, 'rr_fan')}"}
+    viewer = {"Authorization": f"Bearer {await signup_and_login(client, 'rr_viewer')}"}
+    star_id = (await client.get("/me/profile", headers=star)).json()["id"]
+
+    async with notification_service._session_factory() as lagging:
+        # a REPEATABLE READ snapshot taken now: this "replica" never sees the follow below
+        await lagging.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        await lagging.execute(select(models.User.id).limit(1))
+
+        @asynccontextmanager
+        async def replica():
+            yield lagging
+
+        monkeypatch.setattr(db, "ReplicaSessionLocal", replica)
+        assert (await client.post(f"/follow/{star_id}", headers=fan)).status_code < 300
+        # someone else misses the cache first, on the replica
+        assert (await client.get(f"/users/{star_id}/followers", headers=viewer)).status_code == 200
+        assert (await client.get(f"/users/{star_id}/profile", headers=viewer)).status_code == 200
+
+    # what the viewer's misses stored is what the fan is served from now on
+    followers = await redis_service.get_cache(f"followers:{star_id}")
+    assert [u["username"] for u in followers] == ["rr_fan"]
+    assert (await redis_service.get_cache(f"user_profile:{star_id}"))["followers_count"] == 1
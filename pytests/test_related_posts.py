@@ -0,0 +1,73 @@
+"""
+Tests for related posts (app/related_posts.py, GET /posts/{id}/related).
+
+Covers:
+  - build(): a shared rare tag outranks a shared common one, and tag
+    co-occurrence finds posts that share no tag at all
+  - rebuild() stores the lists the endpoint serves
+  - A post created with hashtags is indexed right away
+  - Deleting a post removes its list and drops it from other posts' candidates
+"""
+from types import SimpleNamespace
+from app import related_posts
+from conftest import signup_and_login
+
+
+def test_build_ranks_rare_tags_and_cooccurrence():
+    rows = [SimpleNamespace(id=i, hashtags=tags) for i, tags in [
+        (7, "#common #rare"),
+        (6, "#common"),
+        (5, "#rare"),
+        (4, "#common"),
+        (3, "#sunset #beach"),
+        (2, "#sunset #beach"),
+        (1, "#beach"),
+        (0, "#common #other"),
+    ]]
+    index = related_posts.build(rows)
+    # 5 shares the rare tag, 6/4/0 only the common one
+    assert index["related"][7][0] == 5
+    assert set(index["related"][7]) == {5, 6, 4, 0}
+    # #sunset always comes with #beach — P(beach | sunset) = 1
+    assert index["cooc"]["sunset"]["beach"] == 1.0
+    assert index["postings"]["beach"].tolist() == [3, 2, 1]
+    assert index["n_posts"] == 8
+
+
+async def test_rebuild_serves_related_lists(client):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'related_author')}"}
+    ids = []
+    for title, tags in (("a", "#relA #relB"), ("b", "#relA"), ("c", "#relB"), ("d", "#unrelated")):
+        ids.append((await client.post("/posts/createPost", data={"title": title, "content": "x", "hashtags": tags}, headers=headers)).json()["id"])
+    assert await related_posts.rebuild() >= 4
+
+    body = (await client.get(f"/posts/{ids[0]}/related", headers=headers)).json()
+    assert body["post_id"] == ids[0]
+    assert set(body["related"]) >= {ids[1], ids[2]}
+    assert ids[3] not in body["related"]
+
+
+async def test_new_post_is_indexed_on_create(client):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'related_new')}"}
+    old = (await client.post("/posts/createPost", data={"title": "old", "content": "x", "hashtags": "#relNew"}, headers=headers)).json()
+    await related_posts.rebuild()
+    new = (await client.post("/posts/createPost", data={"title": "new", "content": "x", "hashtags": "#relNew"}, headers=headers)).json()
+
+    body = (await client.get(f"/posts/{new['id']}/related", headers=headers)).json()
+    assert body["related"][0] == old["id"]
+    untagged = (await client.post("/posts/createPost", data={"title": "plain", "content": "x"}, headers=headers)).json()
+    assert (await client.get(f"/posts/{untagged['id']}/related", headers=headers)).json()["related"] == []
+
+
+async def test_delete_forgets_the_post(client):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'related_delete')}"}
+    keep = (await client.post("/posts/createPost", data={"title": "keep", "content": "x", "hashtags": "#relGone"}, headers=headers)).json()
+    gone = (await client.post("/posts/createPost", data={"title": "gone", "content": "x", "hashtags": "#relGone"}, headers=headers)).json()
+    await related_posts.rebuild()
+    assert gone["id"] in (await client.get(f"/posts/{keep['id']}/related", headers=headers)).json()["related"]
+
+    await client.delete(f"/posts/deletePost/{gone['id']}", headers=headers)
+    assert (await client.get(f"/posts/{gone['id']}/related", headers=headers)).json()["related"] == []
+    # a post indexed after the delete can't pick it up from the postings
+    later = (await client.post("/posts/createPost", data={"title": "later", "content": "x", "hashtags": "#relGone"}, headers=headers)).json()
+    assert (await client.get(f"/posts/{later['id']}/related", headers=headers)).json()["related"] == [keep["id"]]
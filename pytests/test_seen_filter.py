@@ -0,0 +1,52 @@
+"""
+Tests for the per-user seen-post filter (app/seen_filter.py).
+
+Covers:
+  - Marked posts read back as seen, others don't; a bitmap never outgrows SEEN_FILTER_BITS
+  - The previous generation still counts, older ones have rotated out
+  - Explore skips opened/served posts and backfills the page from further down
+"""
+from app import explore_ranking, redis_service, seen_filter
+from app.config import settings
+from conftest import signup_and_login
+
+
+async def test_mark_and_check():
+    await seen_filter.mark_seen(9001, range(1, 500))
+    assert await seen_filter.seen(9001, [1, 250, 499]) == [True, True, True]
+    # 4 bits out of 65536 per post: a false positive among a handful of ids is vanishingly rare
+    assert await seen_filter.seen(9001, [100000, 100001, 100002]) == [False, False, False]
+    key = f"seen:9001:{seen_filter._generation()}"
+    assert await redis_service.redis_client.strlen(key) <= settings.seen_filter_bits // 8
+
+
+async def test_generations_rotate(monkeypatch):
+    monkeypatch.setattr(seen_filter, "_generation", lambda: 100)
+    await seen_filter.mark_seen(9002, [7])
+    monkeypatch.setattr(seen_filter, "_generation", lambda: 101)
+    assert await seen_filter.seen(9002, [7]) == [True]
+    monkeypatch.setattr(seen_filter, "_generation", lambda: 102)
+    assert await seen_filter.seen(9002, [7]) == [False]
+
+
+async def test_explore_skips_seen_posts(client, ranking):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'seen_author')}"}
+    reader = {"Authorization": f"Bearer {await signup_and_login(client, 'seen_reader')}"}
+    for i in range(6):
+        await client.post("/posts/createPost", data={"title": f"seen {i}", "content": "x"}, headers=author)
+    await explore_ranking.refresh()
+    ranked = [int(i) for i in await redis_service.redis_client.zrevrange(explore_ranking.RANKED_KEY, 0, -1)]
+
+    # open the top two posts, then ask for the first page
+    for post_id in ranked[:2]:
+        await client.get(f"/posts/getPost/{post_id}", headers=reader)
+    first = (await client.get("/feed/explore?limit=2", headers=reader)).json()
+    assert [p["id"] for p in first["posts"]] == ranked[2:4]
+    assert first["pagination"]["next_cursor"] == "rank.4"
+
+    # the served page counts as seen too — asking for the first page again moves on past it
+    again = (await client.get("/feed/explore?limit=2", headers=reader)).json()
+    assert [p["id"] for p in again["posts"]] == ranked[4:6]
+
+    everything = (await client.get("/feed/explore?limit=2&hide_seen=false", headers=reader)).json()
+    assert [p["id"] for p in everything["posts"]] == ranked[:2]
@@ -0,0 +1,107 @@
+"""
+Tests for single-flight cache loads (redis_service.get_or_set).
+
+Covers:
+  - Concurrent misses of one key run the loader once
+  - A worker that loses lock:<key> waits for the winner's value instead of loading
+  - A load that outlives its lock leaves the next holder's lock in place
+  - A failed load reaches its own caller; the requests waiting on it load for themselves
+  - Concurrent requests for a cold profile query the database once
+"""
+import asyncio
+from app import redis_service
+from conftest import signup_and_login
+
+
+def counting_loader(value, delay: float = 0.05):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value, ["post:-20"]
+
+    return load, calls
+
+
+async def test_concurrent_misses_load_once():
+    load, calls = counting_loader({"v": 1})
+    results = await asyncio.gather(*(redis_service.get_or_set("sftest:a", load, ttl=60) for _ in range(20)))
+    assert results == [{"v": 1}] * 20
+    assert calls == [1]
+    assert not await redis_service.redis_client.exists("lock:sftest:a")
+    assert await redis_service.redis_client.zrange("tag:post:-20", 0, -1) == ["sftest:a"]
+    await redis_service.invalidate("post:-20")
+
+
+async def test_lock_loser_waits_for_the_winner():
+    r = redis_service.redis_client
+    # another worker holds the lock and is loading the key
+    await r.set("lock:sftest:b", 1, ex=5)
+    load, calls = counting_loader({"v": "mine"})
+
+    async def other_worker():
+        await asyncio.sleep(0.1)
+        await redis_service.set_cache("sftest:b", {"v": "theirs"}, ttl=60)
+
+    value, _ = await asyncio.gather(redis_service.get_or_set("sftest:b", load, ttl=60), other_worker())
+    assert value == {"v": "theirs"}
+    assert calls == []
+    await redis_service.delete_cache("sftest:b")
+    await r.delete("lock:sftest:b")
+
+
+async def test_overrunning_load_keeps_the_next_lock():
+    r = redis_service.redis_client
+
+    async def slow():
+        # our lock expires mid-load and another worker takes it
+        await r.delete("lock:sftest:e")
+        await r.set("lock:sftest:e", "their-token", ex=5)
+        return {"v": 1}, ()
+
+    assert await redis_service.get_or_set("sftest:e", slow, ttl=60) == {"v": 1}
+    assert await r.get("lock:sftest:e") == "their-token"
+    await r.delete("lock:sftest:e")
+    await redis_service.delete_cache("sftest:e")
+
+
+async def test_failed_load_lets_waiters_load():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        if len(calls) == 1:
+            raise RuntimeError("db hiccup")
+        return {"v": 2}, ()
+
+    first, second = await asyncio.gather(
+        redis_service.get_or_set("sftest:c", flaky, ttl=60),
+        redis_service.get_or_set("sftest:c", flaky, ttl=60),
+        return_exceptions=True,
+    )
+    assert isinstance(first, RuntimeError)
+    assert second == {"v": 2}
+    assert len(calls) == 2
+    assert redis_service._inflight == {}
+    await redis_service.delete_cache("sftest:c")
+
+
+async def test_cold_profile_queried_once(client, monkeypatch):
+    viewer = {"Authorization": f"Bearer {await signup_and_login(client, 'sf_viewer')}"}
+    star = {"Authorization": f"Bearer {await signup_and_login(client, 'sf_star')}"}
+    star_id = (await client.get("/me/profile", headers=star)).json()["id"]
+
+    loads = []
+    real = redis_service._load
+
+    async def counted(key, loader, ttl, hard_ttl):
+        loads.append(key)
+        return await real(key, loader, ttl, hard_ttl)
+
+    monkeypatch.setattr(redis_service, "_load", counted)
+    responses = await asyncio.gather(*(client.get(f"/users/{star_id}/profile", headers=viewer) for _ in range(5)))
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.text for r in responses}) == 1
+    assert len(loads) == 1
@@ -0,0 +1,88 @@
+"""
+Tests for stale-while-revalidate cache entries (set_cache hard_ttl, get_or_set, page_cache.py).
+
+Covers:
+  - An entry lives in Redis for hard_ttl; L1 copies never outlive the fresh window
+  - Past the fresh window get_or_set answers with the stale value and refreshes
+    it once in the background, however many readers see it stale
+  - Invalidation removes a stale entry outright
+  - A stale profile is refreshed with a session of its own after the response
+"""
+import asyncio
+import json
+import time
+from app import redis_service
+from conftest import signup_and_login
+
+
+async def go_stale(key: str, value=None) -> None:
+    """Move a cached entry past its fresh window (optionally swapping its value)."""
+    r = redis_service.redis_client
+    _, _, json_value = (await r.get(key)).split("~", 2)
+    if value is not None:
+        json_value = json.dumps(value)
+    await r.set(key, f"~{time.time() - 1:.3f}~{json_value}", keepttl=True)
+    redis_service._l1.pop(key)
+
+
+async def refreshes_done() -> None:
+    await asyncio.gather(*list(redis_service._refreshing.values()))
+
+
+async def test_hard_ttl_keeps_the_entry_past_its_fresh_window():
+    r = redis_service.redis_client
+    await redis_service.set_cache("swrtest:a", {"v": 1}, ttl=10, hard_ttl=100, tags=["post:-30"])
+    assert 90 < await r.ttl("swrtest:a") <= 100
+    assert await r.ttl("tag:post:-30") > 90
+    redis_service._l1.pop("swrtest:a")
+    assert await redis_service.get_cache("swrtest:a") == {"v": 1}
+    assert redis_service._l1.get("swrtest:a") == {"v": 1}
+
+    await go_stale("swrtest:a")
+    before = redis_service._stats["stale_hits"]
+    assert await redis_service.get_cache("swrtest:a") == {"v": 1}
+    assert redis_service._stats["stale_hits"] == before + 1
+    assert "swrtest:a" not in redis_service._l1
+
+    await redis_service.invalidate("post:-30")
+    assert await redis_service.get_cache("swrtest:a") is None
+
+
+async def test_stale_value_served_while_one_refresh_runs():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"v": len(calls) + 1}, ()
+
+    await redis_service.set_cache("swrtest:b", {"v": 1}, ttl=30, hard_ttl=300)
+    await go_stale("swrtest:b")
+
+    results = await asyncio.gather(*(
+        redis_service.get_or_set("swrtest:b", load, ttl=30, hard_ttl=300) for _ in range(10)
+    ))
+    assert results == [{"v": 1}] * 10          # nobody waited for the reload
+    await refreshes_done()
+    assert calls == [1]
+    redis_service._l1.pop("swrtest:b")
+    assert await redis_service.get_or_set("swrtest:b", load, ttl=30, hard_ttl=300) == {"v": 2}
+    assert calls == [1]                        # fresh again: no further reload
+    await redis_service.delete_cache("swrtest:b")
+
+
+async def test_stale_profile_refreshed_in_background(client):
+    viewer = {"Authorization": f"Bearer {await signup_and_login(client, 'swr_viewer')}"}
+    star = {"Authorization": f"Bearer {await signup_and_login(client, 'swr_star')}"}
+    star_id = (await client.get("/me/profile", headers=star)).json()["id"]
+    fresh = (await client.get(f"/users/{star_id}/profile", headers=viewer)).json()
+    assert fresh["username"] == "swr_star"
+
+    key = f"user_profile:{star_id}"
+    await go_stale(key, {**{k: v for k, v in fresh.items() if k != "is_following"}, "bio": "outdated"})
+    assert (await client.get(f"/users/{star_id}/profile", headers=viewer)).json()["bio"] == "outdated"
+
+    # the request's session is long closed; the refresh used its own
+    await refreshes_done()
+    assert (await client.get(f"/users/{star_id}/profile", headers=viewer)).json()["bio"] == ""
+    assert redis_service._refreshing == {}
@@ -0,0 +1,182 @@
+"""
+Tests for the fan-out-on-write home timelines (app/timeline_service.py).
+
+Covers:
+  - New posts are pushed into a warm follower timeline, deleted ones removed
+  - Cold users (no timeline key) are rebuilt from the database on read
+  - Unfollow rebuilds the timeline without that user's posts
+  - Paging past the trimmed end of a timeline falls back to SQL
+  - Big authors are merged in at read time (lazy k-way merge), not fanned out
+  - Posts sharing a created_at page in id order, like the SQL fallback
+  - A fan-out during a rebuild restarts the rebuild instead of being lost
+  - Timeline ids missing from the database shorten a page without ending the feed
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from app import models, redis_service, timeline_service
+from app.config import settings
+from conftest import make_pair, signup_and_login
+
+
+async def timeline_ids(user_id: int) -> list[int]:
+    members = await redis_service.redis_client.zrevrange(timeline_service.timeline_key(user_id), 0, -1)
+    return [int(m) for m in members if m != timeline_service.SENTINEL]
+
+
+async def test_fan_out_and_retract(client):
+    author, reader, _, reader_id = await make_pair(client, "tl_fan")
+    assert (await client.get("/feed/home", headers=reader)).json()["feed"] == []
+
+    first = (await client.post("/posts/createPost", data={"title": "one", "content": "x"}, headers=author)).json()["id"]
+    second = (await client.post("/posts/createPost", data={"title": "two", "content": "y"}, headers=author)).json()["id"]
+    assert await timeline_ids(reader_id) == [second, first]
+
+    feed = (await client.get("/feed/home", headers=reader)).json()["feed"]
+    assert [item["post_id"] for item in feed] == [second, first]
+
+    await client.delete(f"/posts/deletePost/{first}", headers=author)
+    assert await timeline_ids(reader_id) == [second]
+
+
+async def test_cold_user_is_rebuilt_on_read(client):
+    author, reader, _, reader_id = await make_pair(client, "tl_cold")
+    post = (await client.post("/posts/createPost", data={"title": "cold", "content": "x"}, headers=author)).json()["id"]
+    await redis_service.redis_client.delete(timeline_service.timeline_key(reader_id))
+
+    feed = (await client.get("/feed/home", headers=reader)).json()["feed"]
+    assert [item["post_id"] for item in feed] == [post]
+    assert await timeline_ids(reader_id) == [post]
+
+
+async def test_unfollow_rebuilds_timeline(client):
+    author, reader, author_id, reader_id = await make_pair(client, "tl_unf")
+    await client.post("/posts/createPost", data={"title": "gone", "content": "x"}, headers=author)
+    await client.get("/feed/home", headers=reader)
+    assert len(await timeline_ids(reader_id)) == 1
+
+    await client.delete(f"/unfollow/{author_id}", headers=reader)
+    assert await timeline_ids(reader_id) == []
+    assert (await client.get("/feed/home", headers=reader)).json()["feed"] == []
+
+
+async def test_paging_past_trimmed_timeline_uses_sql(client, monkeypatch):
+    monkeypatch.setattr(settings, "timeline_max_len", 2)
+    author, reader, _, reader_id = await make_pair(client, "tl_trim")
+    ids = [
+        (await client.post("/posts/createPost", data={"title": f"t{i}", "content": "x"}, headers=author)).json()["id"]
+        for i in range(3)
+    ]
+    await redis_service.redis_client.delete(timeline_service.timeline_key(reader_id))
+
+    first = (await client.get("/feed/home?limit=2", headers=reader)).json()
+    assert [item["post_id"] for item in first["feed"]] == ids[:0:-1]
+    assert await timeline_ids(reader_id) == ids[:0:-1]
+
+    second = (await client.get(f"/feed/home?limit=2&cursor={first['next_cursor']}", headers=reader)).json()
+    assert [item["post_id"] for item in second["feed"]] == [ids[0]]
+    assert second["has_more"] is False
+
+
+def test_merge_is_lazy_and_dedupes():
+    def source(*scores):
+        for s in scores:
+            yield str(s), float(s)
+        raise AssertionError("merge read past the page")
+
+    # every source yields at most 2 items before the page (3 ids) is full
+    page = timeline_service.merge([source(9, 5), source(8, 5), source(7, 6)], 0, 3)
+    assert page == [9, 8, 7]
+    assert timeline_service.merge([[("3", 3.0), ("1", 1.0)], [("3", 3.0), ("2", 2.0)]], 0, 10) == [3, 2, 1]
+
+
+async def test_big_authors_are_pulled_not_pushed(client, monkeypatch):
+    monkeypatch.setattr(settings, "feed_pull_threshold", 2)
+    big, reader, big_id, reader_id = await make_pair(client, "tl_big")
+    extra = {"Authorization": f"Bearer {await signup_and_login(client, 'tl_big_fan')}"}
+    await client.post(f"/follow/{big_id}", headers=extra)
+    small = {"Authorization": f"Bearer {await signup_and_login(client, 'tl_small')}"}
+    small_id = (await client.get("/me/profile", headers=small)).json()["id"]
+    await client.post(f"/follow/{small_id}", headers=reader)
+
+    old_big = (await client.post("/posts/createPost", data={"title": "b1", "content": "x"}, headers=big)).json()["id"]
+    mid_small = (await client.post("/posts/createPost", data={"title": "s1", "content": "x"}, headers=small)).json()["id"]
+    new_big = (await client.post("/posts/createPost", data={"title": "b2", "content": "x"}, headers=big)).json()["id"]
+
+    # only the small author was fanned out
+    await client.get("/feed/home", headers=reader)
+    assert await timeline_ids(reader_id) == [mid_small]
+
+    feed = (await client.get("/feed/home?limit=2", headers=reader)).json()
+    assert [item["post_id"] for item in feed["feed"]] == [new_big, mid_small]
+    rest = (await client.get(f"/feed/home?limit=2&cursor={feed['next_cursor']}", headers=reader)).json()
+    assert [item["post_id"] for item in rest["feed"]] == [old_big]
+    recent = await redis_service.redis_client.zrevrange(timeline_service.recent_key(big_id), 0, -1)
+    assert [int(m) for m in recent[:2]] == [new_big, old_big]
+
+
+async def test_same_microsecond_posts_page_by_id(client):
+    author, reader, _, reader_id = await make_pair(client, "tl_tie")
+    ids = [
+        (await client.post("/posts/createPost", data={"title": f"tie{i}", "content": "x"}, headers=author)).json()["id"]
+        for i in range(3)
+    ]
+    async with timeline_service._session_factory() as db:
+        first = (await db.get(models.Post, ids[0])).created_at
+        await db.execute(update(models.Post).where(models.Post.id.in_(ids)).values(created_at=first))
+        await db.commit()
+    await timeline_service.rebuild(reader_id)
+
+    seen, cursor = [], None
+    for _ in range(4):
+        url = "/feed/home?limit=1" + (f"&cursor={cursor}" if cursor else "")
+        page = (await client.get(url, headers=reader)).json()
+        seen += [item["post_id"] for item in page["feed"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ids[::-1]
+
+
+async def test_fan_out_during_rebuild_is_kept(client, monkeypatch):
+    author, reader, _, reader_id = await make_pair(client, "tl_race")
+    await client.get("/feed/home", headers=reader)
+    reads = []
+    real = timeline_service._timeline_rows
+
+    async def racing(user_id):
+        rows = await real(user_id)
+        if not reads:
+            # a post is created and fanned out while the first read is in flight
+            post = (await client.post("/posts/createPost", data={"title": "race", "content": "x"}, headers=author)).json()["id"]
+            reads.append(post)
+        return rows
+
+    monkeypatch.setattr(timeline_service, "_timeline_rows", racing)
+    await timeline_service.rebuild(reader_id)
+    assert await timeline_ids(reader_id) == reads
+
+
+async def test_missing_posts_keep_has_more(client):
+    author, reader, _, reader_id = await make_pair(client, "tl_gone")
+    ids = [
+        (await client.post("/posts/createPost", data={"title": f"g{i}", "content": "x"}, headers=author)).json()["id"]
+        for i in range(3)
+    ]
+    await client.get("/feed/home", headers=reader)
+    # ids the database doesn't have (deleted, or not on the replica yet) on top of the timeline
+    newest = timeline_service.score(datetime.now(timezone.utc) + timedelta(minutes=1))
+    ghosts = {timeline_service.member(10**9 + i): newest + i for i in range(2)}
+    await redis_service.redis_client.zadd(timeline_service.timeline_key(reader_id), ghosts)
+
+    # the whole first page is gone: Postgres pages it instead
+    first = (await client.get("/feed/home?limit=2", headers=reader)).json()
+    assert [item["post_id"] for item in first["feed"]] == ids[:0:-1]
+    assert first["has_more"] is True
+
+    # one id of the page is gone: a short page, still with a next one
+    short = (await client.get("/feed/home?limit=3", headers=reader)).json()
+    assert [item["post_id"] for item in short["feed"]] == [ids[2]]
+    assert short["has_more"] is True
+    rest = (await client.get(f"/feed/home?limit=3&cursor={short['next_cursor']}", headers=reader)).json()
+    assert [item["post_id"] for item in rest["feed"]] == ids[1::-1]
+    assert rest["has_more"] is False
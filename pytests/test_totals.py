@@ -0,0 +1,54 @@
+"""
+Tests for the totals subsystem (app/totals_service.py).
+
+Covers:
+  - users.posts_cnt follows post creation and deletion
+  - include_total=false drops the total but keeps has_more
+  - Global / search totals come back as (estimated) integers
+  - Search estimates take the query as a bind parameter (':word', '%', '\\' are plain text)
+"""
+from conftest import signup_and_login
+
+
+async def test_post_counter_tracks_create_and_delete(client):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'totals_user')}"}
+    ids = []
+    for i in range(3):
+        resp = await client.post("/posts/createPost",
+            data={"title": f"Totals {i}", "content": "count me"}, headers=headers)
+        ids.append(resp.json()["id"])
+    await client.delete(f"/posts/deletePost/{ids[0]}", headers=headers)
+
+    data = (await client.get("/me/posts?limit=1", headers=headers)).json()
+    assert data["pagination"]["total"] == 2
+    profile = (await client.get("/me/profile", headers=headers)).json()
+    assert profile["posts_count"] == 2
+
+
+async def test_include_total_false_only_reports_has_more(client):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'totals_skip_user')}"}
+    for i in range(2):
+        await client.post("/posts/createPost",
+            data={"title": f"Skip {i}", "content": "no count"}, headers=headers)
+
+    data = (await client.get("/me/posts?limit=1&include_total=false", headers=headers)).json()
+    assert data["pagination"]["total"] is None
+    assert data["pagination"]["has_more"] is True
+
+
+async def test_estimated_totals_are_integers(client):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'totals_est_user')}"}
+    explore = (await client.get("/feed/explore?limit=1", headers=headers)).json()
+    assert isinstance(explore["pagination"]["total"], int)
+
+    search = (await client.get("/search?q=totals", headers=headers)).json()
+    assert isinstance(search["total"], int)
+    assert len(search["users"]) >= 1
+
+
+async def test_search_estimate_binds_the_query(client):
+    headers = {"Authorization": f"Bearer {await signup_and_login(client, 'totals_bind_user')}"}
+    for q in ("a :foo", "50%_off", "back\\slash", "#tag :word %"):
+        resp = await client.get("/search", params={"q": q}, headers=headers)
+        assert resp.status_code == 202, (q, resp.text)
+        assert isinstance(resp.json()["total"], int)
@@ -0,0 +1,63 @@
+"""
+Tests for sliding-window trending (app/trending_service.py, /trending/*).
+
+Covers:
+  - Likes, comments and views of a tagged post push it and its hashtags up
+  - Older buckets count for less than fresh ones (decay)
+  - Deleted posts drop out of the trending list
+"""
+import pytest
+from app import redis_service, trending_service
+from conftest import signup_and_login
+
+
+@pytest.fixture
+async def fresh_results():
+    # results are cached for RESULT_TTL seconds — every test starts from the buckets
+    await redis_service.delete_cache_pattern("trending:*:top:*")
+    yield
+    await redis_service.delete_cache_pattern("trending:*:top:*")
+
+
+async def test_engagement_makes_posts_and_tags_trend(client, fresh_results):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'trend_author')}"}
+    fan = {"Authorization": f"Bearer {await signup_and_login(client, 'trend_fan')}"}
+    hot = (await client.post("/posts/createPost", data={"title": "hot", "content": "x", "hashtags": "#TrendTest #sun"}, headers=author)).json()
+    assert hot["hashtags"] == "#TrendTest #sun"
+    cold = (await client.post("/posts/createPost", data={"title": "cold", "content": "x"}, headers=author)).json()
+
+    await client.get(f"/posts/getPost/{hot['id']}", headers=fan)
+    await client.post("/vote/on_post", json={"post_id": hot["id"], "choice": True}, headers=fan)
+    await client.post("/comment/createComment", json={"post_id": hot["id"], "content": "nice"}, headers=fan)
+    await client.get(f"/posts/getPost/{cold['id']}", headers=fan)
+
+    posts = (await client.get("/trending/posts?window=1h&limit=100", headers=fan)).json()
+    assert posts["window"] == "1h"
+    scores = {p["post_id"]: p["score"] for p in posts["posts"]}
+    # like + comment + view beats a single view
+    assert scores[hot["id"]] > scores.get(cold["id"], 0)
+
+    tags = (await client.get("/trending/hashtags?window=24h", headers=fan)).json()["hashtags"]
+    assert {"trendtest", "sun"} <= {t["tag"] for t in tags}
+    assert (await client.get("/trending/hashtags?window=7d", headers=fan)).status_code == 422
+
+
+def test_older_buckets_decay():
+    now = 1_000_000 * 60 + 30
+    weights = trending_service._weights("posts", "1h", now)
+    newest = trending_service._bucket_key("posts", "like", "m", now // 60)
+    oldest = trending_service._bucket_key("posts", "like", "m", now // 60 - 59)
+    assert len(weights) == 60 * len(trending_service.KINDS)
+    # the window's half-life is 15 minutes: an hour back is ~4 half-lives
+    assert weights[newest] > 0.9
+    assert 0.05 < weights[oldest] < 0.08
+
+
+async def test_deleted_post_leaves_trending(client, fresh_results):
+    author = {"Authorization": f"Bearer {await signup_and_login(client, 'trend_gone')}"}
+    post = (await client.post("/posts/createPost", data={"title": "gone", "content": "x"}, headers=author)).json()["id"]
+    await trending_service.record(post, "share")
+    assert post in [p["post_id"] for p in (await client.get("/trending/posts", headers=author)).json()["posts"]]
+
+    await client.delete(f"/posts/deletePost/{post}", headers=author)
+    assert post not in [p["post_id"] for p in (await client.get("/trending/posts", headers=author)).json()["posts"]]